@@ -0,0 +1,46 @@
+"""Add proxy_job table for async /proxy/jobs fetches
+
+Job state and results live in the database so every API worker sees
+the same jobs.
+
+Revision ID: d2e3f4a5b6c7
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e3f4a5b6c7'
+down_revision = 'c1d2e3f4a5b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table('proxy_job'):
+        op.create_table(
+            'proxy_job',
+            sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+            sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False, index=True),
+            sa.Column('status', sa.String(length=20), nullable=False, index=True),
+            sa.Column('spec', sa.JSON(), nullable=True),
+            sa.Column('result_meta', sa.JSON(), nullable=True),
+            sa.Column('result', sa.LargeBinary(), nullable=True),
+            sa.Column('status_code', sa.Integer(), nullable=True),
+            sa.Column('error', sa.String(length=1024), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False, index=True),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        )
+
+
+def downgrade():
+    op.drop_table('proxy_job')
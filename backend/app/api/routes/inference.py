@@ -7,21 +7,56 @@ from typing import Annotated
 import logging
 import uuid
 import time
+from functools import partial
 from datetime import datetime
-import httpx
 import os
+import httpx
 from app.models import (
     User, InferenceModel, ModelUsage, UsageRecord,
     InferenceRequest, InferenceResponse, InferenceModelPublic, InferenceModelsPublic
 )
 from app.api.deps import get_current_user, get_current_active_superuser, SessionDep
+from app.core.config import settings
+from app.core.http import http_clients
 from app.models import InferenceModelCreate
+from app.services.adaptive_timeout import AdaptiveTimeouts
+from app.services.request_budget import RequestBudget
+from app.services.retry_policy import RETRYABLE_STATUS_CODES, RetryPolicy, is_unprocessed
 
 logger = logging.getLogger(__name__)
 
+# Only requests the provider cannot have run are retried, so a retry never bills twice
+inference_retry_policy = RetryPolicy(
+    max_attempts=3,
+    base_delay=0.5,
+    max_delay=8.0,
+    budget=RequestBudget(ratio=settings.RETRY_BUDGET_RATIO),
+    retryable=is_unprocessed,
+)
+# Timeouts from observed latency, per model and request size (see timeout_key);
+# the client's fixed 60s until enough samples exist
+inference_timeouts = AdaptiveTimeouts(
+    fallback=http_clients.config("openai").timeout,
+    minimum=10.0,
+    maximum=120.0,
+    multiplier=settings.ADAPTIVE_TIMEOUT_MULTIPLIER,
+    min_samples=settings.ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+)
+
 router = APIRouter(tags=["inference"])
 
 
+def timeout_key(model: InferenceModel, request: InferenceRequest) -> tuple:
+    """
+    Generation time grows with the output and prompt length, so latency is
+    tracked per power-of-two bucket of max_tokens and prompt size. A long
+    generation is then judged against others of its size, not cut off by
+    a p99 learned from short ones.
+    """
+    max_tokens = request.max_tokens or model.max_tokens or 0
+    return (model.id, max_tokens.bit_length(), len(request.prompt).bit_length())
+
+
 def record_model_usage(
     session: Session,
     user_id: uuid.UUID,
@@ -192,14 +227,13 @@ async def run_inference(
 
     try:
         # Route to appropriate provider
-        if model.provider == "openai":
-            result = await _call_openai(model, request)
-        elif model.provider == "anthropic":
-            result = await _call_anthropic(model, request)
-        elif model.provider == "huggingface":
-            result = await _call_huggingface(model, request)
-        else:
+        call = PROVIDER_CALLS.get(model.provider)
+        if call is None:
             raise HTTPException(status_code=400, detail=f"Unsupported provider: {model.provider}")
+        result = await inference_retry_policy.call(
+            lambda: inference_timeouts.run(timeout_key(model, request), partial(call, model, request)),
+            f"{model.provider} inference for model {model.id}",
+        )
 
         # Calculate latency
         latency_ms = int((time.time() - start_time) * 1000)
@@ -231,124 +265,141 @@ async def run_inference(
             latency_ms=latency_ms
         )
 
+    except httpx.TimeoutException as e:
+        # Not retried: the provider may still be generating (and billing) it
+        logger.error(f"Inference timed out for model {model.id}: {e}")
+        raise HTTPException(status_code=504, detail="Inference timed out")
     except Exception as e:
         logger.error(f"Inference failed for model {model.id}: {e}")
         raise HTTPException(status_code=500, detail=f"Inference failed: {str(e)}")
 
 
-async def _call_openai(model: InferenceModel, request: InferenceRequest) -> dict:
+async def _call_openai(model: InferenceModel, request: InferenceRequest, timeout: float) -> dict:
     """Call OpenAI API"""
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise Exception("OpenAI API key not configured")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": model.model_id,
-                "messages": [{"role": "user", "content": request.prompt}],
-                "max_tokens": request.max_tokens or model.max_tokens,
-                "temperature": request.temperature,
-                "stream": False
-            },
-            timeout=60.0
-        )
+    client = http_clients.get("openai")
+    response = await client.post(
+        "https://api.openai.com/v1/chat/completions",
+        timeout=timeout,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        },
+        json={
+            "model": model.model_id,
+            "messages": [{"role": "user", "content": request.prompt}],
+            "max_tokens": request.max_tokens or model.max_tokens,
+            "temperature": request.temperature,
+            "stream": False
+        }
+    )
 
-        if response.status_code != 200:
-            raise Exception(f"OpenAI API error: {response.text}")
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        response.raise_for_status()
+    if response.status_code != 200:
+        raise Exception(f"OpenAI API error: {response.text}")
 
-        data = response.json()
-        usage = data.get("usage", {})
+    data = response.json()
+    usage = data.get("usage", {})
 
-        return {
-            "completion": data["choices"][0]["message"]["content"],
-            "prompt_tokens": usage.get("prompt_tokens", 0),
-            "completion_tokens": usage.get("completion_tokens", 0),
-            "total_tokens": usage.get("total_tokens", 0)
-        }
+    return {
+        "completion": data["choices"][0]["message"]["content"],
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "total_tokens": usage.get("total_tokens", 0)
+    }
 
 
-async def _call_anthropic(model: InferenceModel, request: InferenceRequest) -> dict:
+async def _call_anthropic(model: InferenceModel, request: InferenceRequest, timeout: float) -> dict:
     """Call Anthropic API"""
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         raise Exception("Anthropic API key not configured")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.anthropic.com/v1/messages",
-            headers={
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": model.model_id,
-                "messages": [{"role": "user", "content": request.prompt}],
-                "max_tokens": request.max_tokens or model.max_tokens,
-                "temperature": request.temperature
-            },
-            timeout=60.0
-        )
+    client = http_clients.get("anthropic")
+    response = await client.post(
+        "https://api.anthropic.com/v1/messages",
+        timeout=timeout,
+        headers={
+            "x-api-key": api_key,
+            "anthropic-version": "2023-06-01",
+            "Content-Type": "application/json"
+        },
+        json={
+            "model": model.model_id,
+            "messages": [{"role": "user", "content": request.prompt}],
+            "max_tokens": request.max_tokens or model.max_tokens,
+            "temperature": request.temperature
+        }
+    )
 
-        if response.status_code != 200:
-            raise Exception(f"Anthropic API error: {response.text}")
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        response.raise_for_status()
+    if response.status_code != 200:
+        raise Exception(f"Anthropic API error: {response.text}")
 
-        data = response.json()
-        usage = data.get("usage", {})
+    data = response.json()
+    usage = data.get("usage", {})
 
-        return {
-            "completion": data["content"][0]["text"],
-            "prompt_tokens": usage.get("input_tokens", 0),
-            "completion_tokens": usage.get("output_tokens", 0),
-            "total_tokens": usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
-        }
+    return {
+        "completion": data["content"][0]["text"],
+        "prompt_tokens": usage.get("input_tokens", 0),
+        "completion_tokens": usage.get("output_tokens", 0),
+        "total_tokens": usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+    }
 
 
-async def _call_huggingface(model: InferenceModel, request: InferenceRequest) -> dict:
+async def _call_huggingface(model: InferenceModel, request: InferenceRequest, timeout: float) -> dict:
     """Call HuggingFace API"""
     api_key = os.getenv("HUGGINGFACE_API_KEY")
     if not api_key:
         raise Exception("HuggingFace API key not configured")
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"https://api-inference.huggingface.co/models/{model.model_id}",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "inputs": request.prompt,
-                "parameters": {
-                    "max_new_tokens": request.max_tokens or model.max_tokens,
-                    "temperature": request.temperature
-                }
-            },
-            timeout=60.0
-        )
+    client = http_clients.get("huggingface")
+    response = await client.post(
+        f"https://api-inference.huggingface.co/models/{model.model_id}",
+        timeout=timeout,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        },
+        json={
+            "inputs": request.prompt,
+            "parameters": {
+                "max_new_tokens": request.max_tokens or model.max_tokens,
+                "temperature": request.temperature
+            }
+        }
+    )
 
-        if response.status_code != 200:
-            raise Exception(f"HuggingFace API error: {response.text}")
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        response.raise_for_status()
+    if response.status_code != 200:
+        raise Exception(f"HuggingFace API error: {response.text}")
 
-        data = response.json()
+    data = response.json()
 
-        # HuggingFace doesn't return token counts, so estimate
-        prompt_tokens = len(request.prompt.split()) * 1.3  # Rough estimate
-        completion = data[0].get("generated_text", "") if isinstance(data, list) else data.get("generated_text", "")
-        completion_tokens = len(completion.split()) * 1.3
+    # HuggingFace doesn't return token counts, so estimate
+    prompt_tokens = len(request.prompt.split()) * 1.3  # Rough estimate
+    completion = data[0].get("generated_text", "") if isinstance(data, list) else data.get("generated_text", "")
+    completion_tokens = len(completion.split()) * 1.3
 
-        return {
-            "completion": completion,
-            "prompt_tokens": int(prompt_tokens),
-            "completion_tokens": int(completion_tokens),
-            "total_tokens": int(prompt_tokens + completion_tokens)
-        }
+    return {
+        "completion": completion,
+        "prompt_tokens": int(prompt_tokens),
+        "completion_tokens": int(completion_tokens),
+        "total_tokens": int(prompt_tokens + completion_tokens)
+    }
+
+
+PROVIDER_CALLS = {
+    "openai": _call_openai,
+    "anthropic": _call_anthropic,
+    "huggingface": _call_huggingface,
+}
 
 
 @router.get("/usage/summary")
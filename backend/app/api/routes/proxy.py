@@ -1,30 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Request
-from typing import Annotated, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Annotated, Any, AsyncIterator, Callable, Dict, List, Optional
 from pydantic import BaseModel, HttpUrl
 import httpx
 import logging
 import asyncio
 import time
 import random
+import math
+import hashlib
 import uuid
 import os
+from collections import deque
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
-from app.api.deps import SessionDep, CurrentUser
+from app.api.deps import SessionDep, CurrentUser, get_current_active_superuser
+from app.core.compression import AVAILABLE_ENCODINGS, StreamCompressor, compress, decompress, negotiate
+from app.core.config import settings
+from app.core.db import engine
+from app.core.http import http_clients
 from app.models import User
 from app.core.security import generate_api_key, verify_api_key
-from sqlalchemy.orm import Session
-from sqlmodel import SQLModel, Field
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import event
+from sqlmodel import SQLModel, Field, update
 from uuid import UUID, uuid4
 from app.utils import generate_test_email, send_email
-from bs4 import BeautifulSoup
-from urllib.parse import quote_plus, unquote, parse_qs
+from app.services.adaptive_timeout import AdaptiveTimeouts
+from app.services.admission import Admission, AdmissionController, TierLimits
+from app.services.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry
+from app.services.crawl_frontier import SCOPES as CRAWL_SCOPES, CrawlFrontier
+from app.services import html_extract, serp_parser
+from app.services.endpoint_registry import EndpointRegistry
+from app.services.host_concurrency import SUCCESS, THROTTLED, HostConcurrencyLimiter, HostSlot
+from app.services import webhook_guard
+from app.services.job_store import SUCCEEDED, Job, JobStore
+from app.services.json_stream import JsonFieldStreamer
+from app.services.parser_pool import parser_pool
+from app.services.principal_cache import ApiPrincipal, PrincipalCache
+from app.services.proxy_health import ProxyHealthMonitor
+from app.services.request_budget import RequestBudget
+from app.services.retry_policy import RetryPolicy
+from app.services.response_cache import ResponseCache, normalize_url
+from app.services.singleflight import SingleFlight
+from app.services.work_queue import BoundedWorkQueue
+from app.services.write_behind import WriteBehindCounter
+from urllib.parse import quote_plus, urlsplit
 
 # Configure logging based on environment
 log_level = logging.INFO if os.getenv("ENV") == "production" else logging.DEBUG
 logging.basicConfig(level=log_level)
 logger = logging.getLogger(__name__)
 
-# REGION_ENDPOINTS dictionary
+# Built-in endpoints, used unless PROXY_ENDPOINTS_FILE is set
 REGION_ENDPOINTS = {
     "us-east": [
         "https://us-east4-proxy1-454912.cloudfunctions.net/main",
@@ -79,27 +108,182 @@ REGION_ENDPOINTS = {
     ]
 }
 
+# Per-endpoint fetch statistics used for latency-aware selection
+@dataclass
+class EndpointStats:
+    latency: float = 0.0  # EWMA of fetch latency in seconds
+    error_rate: float = 0.0  # EWMA of failures (0 = always succeeds, 1 = always fails)
+    samples: int = 0
+    updated_at: float = 0.0
+
 # ProxyEndpointManager class
 class ProxyEndpointManager:
-    def __init__(self):
-        self.endpoints = REGION_ENDPOINTS
-        self.endpoint_ids = {
-            region: {f"{region}_{i}": url for i, url in enumerate(urls)}
-            for region, urls in REGION_ENDPOINTS.items()
-        }
+    # Weight of the newest sample in the latency/error EWMAs
+    EWMA_ALPHA = 0.3
+    # A failing endpoint scores up to (1 + ERROR_PENALTY) times its latency
+    ERROR_PENALTY = 4.0
+    # Error scores halve every ERROR_HALF_LIFE seconds without new samples,
+    # so an endpoint that failed a while ago gets traffic again
+    ERROR_HALF_LIFE = 60.0
+    # Successful fetch latencies kept per region for percentile estimates
+    LATENCY_WINDOW = 200
+
+    def __init__(self, registry: EndpointRegistry):
+        self.registry = registry
+        self.stats: Dict[str, EndpointStats] = {}
+        self.region_latencies: Dict[str, deque] = {}
+
+    @property
+    def endpoints(self) -> Dict[str, List[str]]:
+        """Region -> enabled endpoint URLs, from the registry's current snapshot."""
+        return self.registry.snapshot.regions
 
     def get_endpoints(self, region: str) -> List[str]:
         return self.endpoints.get(region, [])
 
     def get_endpoint_id(self, region: str, url: str) -> Optional[str]:
-        for endpoint_id, endpoint_url in self.endpoint_ids.get(region, {}).items():
-            if endpoint_url == url:
-                return endpoint_id
-        return None
+        endpoint = self.registry.snapshot.by_url.get(url)
+        return endpoint.endpoint_id if endpoint and endpoint.region == region else None
+
+    def record_result(self, url: str, latency: float, success: bool) -> None:
+        """Feed one real fetch outcome into the endpoint's decayed scores."""
+        stats = self.stats.setdefault(url, EndpointStats())
+        now = time.monotonic()
+        if stats.samples == 0:
+            stats.latency = latency
+            stats.error_rate = 0.0 if success else 1.0
+        else:
+            stats.latency += self.EWMA_ALPHA * (latency - stats.latency)
+            error_rate = self._decayed_error_rate(stats, now)
+            stats.error_rate = error_rate + self.EWMA_ALPHA * ((0.0 if success else 1.0) - error_rate)
+        stats.samples += 1
+        stats.updated_at = now
+        region = self.registry.region_of(url)
+        if success and region is not None:
+            window = self.region_latencies.get(region)
+            if window is None:
+                window = self.region_latencies[region] = deque(maxlen=self.LATENCY_WINDOW)
+            window.append(latency)
+
+    def latency_percentile(self, region: str, q: float, min_samples: int = 20) -> Optional[float]:
+        """q-th percentile (0-1) of recent successful fetches in `region`, if enough data."""
+        window = self.region_latencies.get(region)
+        if not window or len(window) < min_samples:
+            return None
+        ordered = sorted(window)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def _decayed_error_rate(self, stats: EndpointStats, now: float) -> float:
+        elapsed = now - stats.updated_at
+        return stats.error_rate * 0.5 ** (elapsed / self.ERROR_HALF_LIFE)
+
+    def score(self, url: str) -> float:
+        """
+        Expected cost of sending a fetch to `url`; lower is better. The
+        endpoint's registry weight divides the cost, so weight 2 competes
+        as if it were twice as fast.
+        """
+        stats = self.stats.get(url)
+        if not stats or stats.samples == 0:
+            return self._prior_latency() / self.registry.weight(url)
+        error_rate = self._decayed_error_rate(stats, time.monotonic())
+        return stats.latency * (1.0 + self.ERROR_PENALTY * error_rate) / self.registry.weight(url)
+
+    def _prior_latency(self) -> float:
+        # Unmeasured endpoints are assumed average, so they get explored
+        # without jumping ahead of endpoints known to be fast
+        measured = [s.latency for s in self.stats.values() if s.samples]
+        return sum(measured) / len(measured) if measured else 0.0
+
+    def order_endpoints(self, urls: List[str]) -> List[str]:
+        """
+        Order candidates by repeated power-of-two-choices: pick two at random,
+        take the lower-scoring one, repeat. Fast endpoints are tried first
+        most of the time while slower ones still see some traffic.
+        """
+        remaining = list(urls)
+        ordered = []
+        while len(remaining) > 1:
+            a, b = random.sample(range(len(remaining)), 2)
+            pick = a if self.score(remaining[a]) <= self.score(remaining[b]) else b
+            ordered.append(remaining.pop(pick))
+        ordered.extend(remaining)
+        return ordered
+
+    def order_regions(self, primary: str, healthy: Callable[[str], List[str]]) -> List[str]:
+        """Requested region first, then fallbacks by their best healthy endpoint score."""
+        fallbacks = []
+        for region in self.endpoints:
+            if region == primary:
+                continue
+            urls = healthy(region) or self.get_endpoints(region)
+            fallbacks.append((min((self.score(u) for u in urls), default=float("inf")), region))
+        fallbacks.sort(key=lambda item: item[0])
+        return [primary] + [region for _, region in fallbacks]
 
-endpoint_manager = ProxyEndpointManager()
+endpoint_registry = EndpointRegistry(
+    defaults=REGION_ENDPOINTS,
+    path=settings.PROXY_ENDPOINTS_FILE,
+    reload_interval=settings.PROXY_ENDPOINTS_RELOAD_INTERVAL,
+)
+endpoint_manager = ProxyEndpointManager(endpoint_registry)
+hedge_budget = RequestBudget(ratio=settings.PROXY_HEDGE_BUDGET_RATIO)
+response_cache = ResponseCache(
+    max_bytes=settings.PROXY_CACHE_MAX_BYTES,
+    default_ttl=settings.PROXY_CACHE_TTL_SECONDS,
+    stale_ttl=settings.PROXY_CACHE_STALE_SECONDS,
+)
+upstream_fetches = SingleFlight()
+principal_cache = PrincipalCache(
+    max_entries=settings.API_KEY_CACHE_MAX_ENTRIES,
+    ttl=settings.API_KEY_CACHE_TTL_SECONDS,
+)
+serp_cache = ResponseCache(
+    max_bytes=settings.SERP_CACHE_MAX_BYTES,
+    default_ttl=settings.SERP_CACHE_RETENTION_SECONDS,
+)
+breakers = CircuitBreakerRegistry(
+    error_rate_threshold=settings.PROXY_BREAKER_ERROR_RATE,
+    min_requests=settings.PROXY_BREAKER_MIN_REQUESTS,
+    window_seconds=settings.PROXY_BREAKER_WINDOW_SECONDS,
+    consecutive_timeouts=settings.PROXY_BREAKER_CONSECUTIVE_TIMEOUTS,
+    open_seconds=settings.PROXY_BREAKER_OPEN_SECONDS,
+)
+# Fetch timeouts keyed by target host: how long a page takes depends on
+# the site far more than on which endpoint relays it. Hosts without enough
+# samples get the proxy client's fixed timeout
+fetch_timeouts = AdaptiveTimeouts(
+    fallback=http_clients.config("proxy").timeout,
+    minimum=settings.PROXY_FETCH_TIMEOUT_MIN,
+    maximum=settings.PROXY_FETCH_TIMEOUT_MAX,
+    multiplier=settings.ADAPTIVE_TIMEOUT_MULTIPLIER,
+    min_samples=settings.ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+    max_keys=settings.PROXY_FETCH_TIMEOUT_MAX_HOSTS,
+)
+health_timeouts = AdaptiveTimeouts(
+    fallback=5.0,
+    minimum=1.0,
+    maximum=10.0,
+    multiplier=settings.ADAPTIVE_TIMEOUT_MULTIPLIER,
+    min_samples=settings.ADAPTIVE_TIMEOUT_MIN_SAMPLES,
+)
+proxy_retry_policy = RetryPolicy(
+    max_attempts=settings.PROXY_RETRY_MAX_ATTEMPTS,
+    base_delay=settings.PROXY_RETRY_BASE_DELAY,
+    max_delay=settings.PROXY_RETRY_MAX_DELAY,
+    budget=RequestBudget(ratio=settings.RETRY_BUDGET_RATIO),
+)
+admission_control = AdmissionController(
+    tiers={
+        tier: TierLimits(rate=limits["rate"], burst=int(limits["burst"]), max_in_flight=int(limits["max_in_flight"]))
+        for tier, limits in settings.ADMISSION_LIMITS.items()
+    },
+    storage_uri=settings.ADMISSION_STORAGE_URI,
+)
 router = APIRouter(tags=["proxy"], prefix="/proxy")
 
+DEFAULT_USER_AGENT = "DataProxy-Internal-Fetcher/1.0"
+
 # Model definitions
 class APIToken(SQLModel, table=True):
     __tablename__ = "apitoken"
@@ -111,6 +295,51 @@ class APIToken(SQLModel, table=True):
     is_active: bool = Field(default=True)
     request_count: int = Field(default=0)
 
+# Drop cached principals when a user (subscription, trial, active flag) or
+# an API token changes or is deleted. The ids are collected when the change
+# is flushed and invalidated once the transaction commits: invalidating at
+# flush would let a concurrent request re-cache the old row before the
+# commit, and a rolled-back change must not invalidate anything. Flushes
+# from ORM sessions only; the bulk request-count UPDATEs deliberately don't
+# trigger this.
+_PENDING_INVALIDATIONS = "principal_cache_invalidations"
+
+def _pending_invalidations(target: SQLModel) -> Optional[set]:
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_PENDING_INVALIDATIONS, set())
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_principals(_mapper, _connection, target: User) -> None:
+    pending = _pending_invalidations(target)
+    if pending is None:
+        principal_cache.invalidate_user(target.id)
+    else:
+        pending.add(("user", target.id))
+
+@event.listens_for(APIToken, "after_update")
+@event.listens_for(APIToken, "after_delete")
+def _invalidate_token_principals(_mapper, _connection, target: APIToken) -> None:
+    pending = _pending_invalidations(target)
+    if pending is None:
+        principal_cache.invalidate_token(target.id)
+    else:
+        pending.add(("token", target.id))
+
+@event.listens_for(Session, "after_commit")
+def _apply_principal_invalidations(session: Session) -> None:
+    for kind, target_id in session.info.pop(_PENDING_INVALIDATIONS, ()):
+        if kind == "user":
+            principal_cache.invalidate_user(target_id)
+        else:
+            principal_cache.invalidate_token(target_id)
+
+@event.listens_for(Session, "after_rollback")
+def _drop_principal_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING_INVALIDATIONS, None)
+
 class RegionsResponse(BaseModel):
     regions: List[str]
 
@@ -121,6 +350,16 @@ class APIKeyResponse(BaseModel):
     is_active: bool
     request_count: int
 
+class EndpointStatus(BaseModel):
+    endpoint_id: str
+    is_healthy: bool
+    last_latency: Optional[float] = None
+    last_error: Optional[str] = None
+    consecutive_failures: int
+    last_checked: Optional[datetime] = None
+    circuit_state: str = "closed"
+    error_rate: float = 0.0
+
 class ProxyStatus(BaseModel):
     region: str
     is_healthy: bool
@@ -128,6 +367,7 @@ class ProxyStatus(BaseModel):
     healthy_endpoints: int
     total_endpoints: int
     last_checked: datetime
+    endpoints: List[EndpointStatus] = []
 
 class ProxyStatusResponse(BaseModel):
     statuses: List[ProxyStatus]
@@ -135,11 +375,95 @@ class ProxyStatusResponse(BaseModel):
 class ProxyRequest(BaseModel):
     url: HttpUrl
 
+class OffloadedResult(BaseModel):
+    url: str  # presigned download URL
+    expires_at: datetime
+    size_bytes: int  # uncompressed page size
+    stored_bytes: int  # size of the stored object
+    content_type: str
+    content_encoding: str  # the object is stored compressed; HTTP clients decode it transparently
+    sha256: str  # of the uncompressed page
+
+class ExtractedLink(BaseModel):
+    url: str  # absolute, without fragment
+    text: str
+
+class ExtractedContent(BaseModel):
+    title: Optional[str] = None
+    text: Optional[str] = None  # readable text of the main content, one block per line
+    links: Optional[List[ExtractedLink]] = None  # outgoing http(s) links, deduplicated
+    metadata: Optional[Dict[str, str]] = None  # <meta> name/property -> content, plus canonical and lang
+    opengraph: Optional[Dict[str, str]] = None  # og:* properties
+    json_ld: Optional[List[Any]] = None  # parsed application/ld+json blocks
+
 class ProxyResponse(BaseModel):
-    result: str
+    result: str  # empty when the page was offloaded (see result_ref) or extracted (see extracted)
     public_ip: str
     device_id: str
     region_used: str
+    cache_status: Optional[str] = None  # "hit", "miss" or "revalidated" when caching was requested
+    result_ref: Optional[OffloadedResult] = None  # set when offload=true and the page was large
+    extracted: Optional[ExtractedContent] = None  # set when extract= was requested
+
+class ProxyJobRequest(BaseModel):
+    url: HttpUrl
+    callback_url: Optional[HttpUrl] = None  # https only; receives the finished ProxyJobStatus as a JSON POST
+    hedge: bool = False
+    offload: bool = False  # store a large result in object storage; see OffloadedResult
+
+class ProxyJobStatus(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "succeeded" or "failed"
+    url: str
+    region: str
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    result: Optional[ProxyResponse] = None  # set once succeeded, until the job expires
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchProxyRequest(BaseModel):
+    urls: List[HttpUrl]
+
+class BatchFetchResult(BaseModel):
+    index: int
+    url: str
+    status: str  # "ok" or "error"
+    result: Optional[str] = None
+    public_ip: Optional[str] = None
+    device_id: Optional[str] = None
+    region_used: Optional[str] = None
+    result_ref: Optional[OffloadedResult] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+class CrawlRequest(BaseModel):
+    seeds: List[HttpUrl]
+    max_depth: int = 1  # link hops from the seeds; 0 fetches the seeds only
+    max_pages: int = 100
+    scope: str = "host"  # "host": the seeds' hosts; "domain": also their subdomains; "any"
+    extract: Optional[str] = None  # comma-separated extract fields, as on /fetch; the page itself is then omitted
+
+class CrawlPageResult(BaseModel):
+    url: str
+    depth: int
+    status: str  # "ok" or "error"
+    result: Optional[str] = None
+    extracted: Optional[ExtractedContent] = None
+    links_queued: Optional[int] = None  # new in-scope links this page added to the crawl
+    public_ip: Optional[str] = None
+    device_id: Optional[str] = None
+    region_used: Optional[str] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+class CrawlSummary(BaseModel):
+    status: str = "complete"
+    pages: int
+    succeeded: int
+    duplicates: int  # links skipped as already crawled or queued
+    out_of_scope: int  # links outside the scope or max_depth
+    over_budget: int  # links skipped because max_pages URLs were already admitted
 
 class SerpResult(BaseModel):
     position: int
@@ -152,95 +476,178 @@ class SerpResponse(BaseModel):
     search_query: str
     region_used: str
     organic_results: List[SerpResult]
+    cache_status: Optional[str] = None  # "hit" or "miss"
+    page: int = 1
+
+class SerpEngineRequest(BaseModel):
+    engine: str
+    pages: int = 1  # result pages to fetch, starting from the first
+
+class SerpFanoutRequest(BaseModel):
+    q: str
+    engines: List[SerpEngineRequest]
+
+class SerpEngineResults(BaseModel):
+    search_engine: str
+    region_used: Optional[str] = None
+    pages_fetched: int
+    organic_results: List[SerpResult]  # all pages, positions numbered across pages
+    errors: List[str] = []
+
+class SerpFanoutResponse(BaseModel):
+    search_query: str
+    engines: Dict[str, SerpEngineResults]
+
+def upstream_timeout(seconds: float) -> httpx.Timeout:
+    """Timeout for one proxy call; connecting never waits longer than the client's connect timeout."""
+    return httpx.Timeout(seconds, connect=min(seconds, http_clients.config("proxy").connect_timeout))
 
 # Health check, SERP parsers, SUPPORTED_ENGINES
 async def check_proxy_health(endpoint: str, region: str) -> Dict:
     start_time = time.time()
     endpoint_id = endpoint_manager.get_endpoint_id(region, endpoint) or "unknown"
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{endpoint}/health")
-            response.raise_for_status()
-            response_time = time.time() - start_time
-            logger.debug(f"Health check succeeded for proxy {endpoint_id} in {region}")
-            return {"region": region, "is_healthy": True, "response_time": response_time, "last_checked": datetime.utcnow(), "endpoint": endpoint}
+        client = http_clients.get("proxy")
+        response = await health_timeouts.run(
+            endpoint, lambda timeout: client.get(f"{endpoint}/health", timeout=upstream_timeout(timeout))
+        )
+        response.raise_for_status()
+        response_time = time.time() - start_time
+        logger.debug(f"Health check succeeded for proxy {endpoint_id} in {region}")
+        return {"region": region, "is_healthy": True, "response_time": response_time, "last_checked": datetime.utcnow(), "endpoint": endpoint}
     except (httpx.ConnectError, httpx.TimeoutException) as e:
         logger.error(f"Network error during health check for proxy {endpoint_id} in {region}: {str(e)}")
-        return {"region": region, "is_healthy": False, "response_time": time.time() - start_time, "last_checked": datetime.utcnow(), "endpoint": endpoint}
+        return {"region": region, "is_healthy": False, "response_time": time.time() - start_time, "last_checked": datetime.utcnow(), "endpoint": endpoint, "error": f"network error: {str(e)}"}
     except httpx.HTTPStatusError as e:
         logger.error(f"HTTP error during health check for proxy {endpoint_id} in {region}: {e.response.status_code} {str(e)}")
-        return {"region": region, "is_healthy": False, "response_time": time.time() - start_time, "last_checked": datetime.utcnow(), "endpoint": endpoint}
+        return {"region": region, "is_healthy": False, "response_time": time.time() - start_time, "last_checked": datetime.utcnow(), "endpoint": endpoint, "error": f"HTTP {e.response.status_code}"}
     except Exception as e:
         logger.error(f"Unexpected error during health check for proxy {endpoint_id} in {region}: {str(e)}")
-        return {"region": region, "is_healthy": False, "response_time": time.time() - start_time, "last_checked": datetime.utcnow(), "endpoint": endpoint}
-
-def parse_google_serp(html: str) -> List[SerpResult]:
-    soup = BeautifulSoup(html, "lxml")
-    results = []
-    for i, el in enumerate(soup.select("div.g"), start=1):
-        title_tag = el.select_one("h3")
-        link_tag = el.select_one("a")
-        snippet_tag = el.select_one("div[data-sncf='1']") or el.select_one(".VwiC3b")
-        if title_tag and link_tag and link_tag.get("href"):
-            results.append(SerpResult(position=i, title=title_tag.text, link=link_tag.get("href"), snippet=snippet_tag.text if snippet_tag else ""))
-    return results
-
-def parse_bing_serp(html: str) -> List[SerpResult]:
-    soup = BeautifulSoup(html, "lxml")
-    results = []
-    for i, el in enumerate(soup.select("li.b_algo"), start=1):
-        title_tag = el.select_one("h2 a")
-        snippet_tag = el.select_one(".b_caption p")
-        if title_tag and title_tag.get("href"):
-            results.append(SerpResult(position=i, title=title_tag.text, link=title_tag.get("href"), snippet=snippet_tag.text if snippet_tag else ""))
-    return results
-
-def parse_duckduckgo_serp(html: str) -> List[SerpResult]:
-    soup = BeautifulSoup(html, "lxml")
-    results = []
-    for i, el in enumerate(soup.select(".result"), start=1):
-        title_tag = el.select_one(".result__a")
-        snippet_tag = el.select_one(".result__snippet")
-        link = ""
-        if title_tag and title_tag.get("href"):
-            raw_href = title_tag.get("href")
-            if raw_href and "uddg=" in raw_href:
-                try:
-                    parsed_url = parse_qs(raw_href.split("?", 1)[1])
-                    link = unquote(parsed_url.get("uddg", [""])[0])
-                except (IndexError, KeyError):
-                    link = raw_href
-            else:
-                link = raw_href
-            results.append(SerpResult(position=i, title=title_tag.text, link=link, snippet=snippet_tag.text.strip() if snippet_tag else ""))
-    return results
+        return {"region": region, "is_healthy": False, "response_time": time.time() - start_time, "last_checked": datetime.utcnow(), "endpoint": endpoint, "error": str(e)}
 
+health_monitor = ProxyHealthMonitor(
+    endpoint_manager,
+    probe=check_proxy_health,
+    interval=settings.PROXY_HEALTH_CHECK_INTERVAL,
+    failure_threshold=settings.PROXY_HEALTH_FAILURE_THRESHOLD,
+)
+# Added endpoints start taking traffic, drained ones stop, without waiting for the next sweep
+endpoint_registry.on_change(health_monitor.sync_endpoints)
+
+# "freshness": seconds a cached parsed result is served without refetching
+# "page_url": appended for result pages after the first; {offset} is the
+# index of the page's first result
 SUPPORTED_ENGINES = {
-    "google": {"base_url": "https://www.google.com/search?q={query}&hl=en&gl=us", "parser": parse_google_serp},
-    "bing": {"base_url": "https://www.bing.com/search?q={query}&cc=US", "parser": parse_bing_serp},
-    "duckduckgo": {"base_url": "https://html.duckduckgo.com/html/?q={query}", "parser": parse_duckduckgo_serp},
+    "google": {"base_url": "https://www.google.com/search?q={query}&hl=en&gl=us", "parser": serp_parser.parse_google, "freshness": 600,
+               "page_url": "&start={offset}", "page_size": 10, "first_offset": 0},
+    "bing": {"base_url": "https://www.bing.com/search?q={query}&cc=US", "parser": serp_parser.parse_bing, "freshness": 900,
+             "page_url": "&first={offset}", "page_size": 10, "first_offset": 1},
+    "duckduckgo": {"base_url": "https://html.duckduckgo.com/html/?q={query}", "parser": serp_parser.parse_duckduckgo, "freshness": 1800,
+                   "page_url": "&s={offset}&dc={offset}", "page_size": 30, "first_offset": 0},
 }
 
-async def verify_api_token(
-    session: SessionDep,
-    x_api_key: Annotated[str, Header()],
-) -> User:
-    logger.debug(f"Verifying API key: {x_api_key[:8]}...")
+def serp_url(engine: str, q: str, page: int = 1) -> str:
+    engine_config = SUPPORTED_ENGINES[engine]
+    url = engine_config["base_url"].format(query=quote_plus(q))
+    if page > 1:
+        offset = engine_config["first_offset"] + (page - 1) * engine_config["page_size"]
+        url += engine_config["page_url"].format(offset=offset)
+    return url
+
+def resolve_principal(session: Session, x_api_key: str) -> ApiPrincipal:
+    """Load everything authentication needs for an API key (two queries)."""
     token_data = verify_api_key(x_api_key)
     if not token_data or "user_id" not in token_data:
         logger.warning(f"Invalid API key provided: {x_api_key[:8]}...")
         raise HTTPException(status_code=401, detail="Invalid API key")
     user_id_from_token = token_data["user_id"]
     user = session.get(User, user_id_from_token)
-    if not user or not user.is_active:
+    if not user:
         logger.warning(f"API key valid, but user is invalid or inactive. User ID: {user_id_from_token}")
         raise HTTPException(status_code=401, detail="Invalid or inactive user")
-    is_in_trial = user.is_trial and user.expiry_date and user.expiry_date > datetime.utcnow()
-    if not user.has_subscription and not is_in_trial:
-        logger.warning(f"User {user.email} lacks active subscription or trial.")
+    token = session.query(APIToken).filter(APIToken.token == x_api_key).first()
+    if not token:
+        logger.error(f"API key passed verification but not found in DB for user {user.id}. Possible data inconsistency.")
+        raise HTTPException(status_code=401, detail="API key is invalid or has been deactivated.")
+    return ApiPrincipal(
+        id=user.id,
+        email=user.email,
+        token_id=token.id,
+        token_active=token.is_active,
+        user_active=user.is_active,
+        has_subscription=bool(user.has_subscription),
+        trial_expires_at=user.expiry_date if user.is_trial else None,
+        key_expires_at=token_data.get("exp"),
+    )
+
+async def verify_api_token(
+    session: SessionDep,
+    x_api_key: Annotated[str, Header()],
+) -> ApiPrincipal:
+    logger.debug(f"Verifying API key: {x_api_key[:8]}...")
+    principal = principal_cache.get(x_api_key)
+    if principal is None:
+        principal = resolve_principal(session, x_api_key)
+        principal_cache.set(x_api_key, principal)
+    if principal.key_expired(time.time()):
+        principal_cache.invalidate_key(x_api_key)
+        logger.warning(f"Expired API key provided: {x_api_key[:8]}...")
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    if not principal.user_active:
+        logger.warning(f"API key valid, but user is invalid or inactive. User ID: {principal.id}")
+        raise HTTPException(status_code=401, detail="Invalid or inactive user")
+    if not principal.token_active:
+        raise HTTPException(status_code=401, detail="API key is invalid or has been deactivated.")
+    if not principal.subscription_valid(datetime.utcnow()):
+        logger.warning(f"User {principal.email} lacks active subscription or trial.")
         raise HTTPException(status_code=403, detail="Active subscription or trial required")
-    logger.debug(f"API key verified for user: {user.email}")
-    return user
+    logger.debug(f"API key verified for user: {principal.email}")
+    return principal
+
+def admission_tier(user: ApiPrincipal) -> str:
+    return "subscription" if user.has_subscription else "trial"
+
+async def admit(user: ApiPrincipal) -> Admission:
+    """
+    Take one request's worth of the user's rate and concurrency quota, or
+    reject with 429 and Retry-After. The caller must release the slot.
+    """
+    admission = await admission_control.acquire(str(user.id), admission_tier(user))
+    if not admission.allowed:
+        logger.info(f"Rejected request from user {user.email}: {admission.reason}")
+        raise HTTPException(
+            status_code=429,
+            detail=admission.reason,
+            headers={"Retry-After": str(max(1, math.ceil(admission.retry_after)))},
+        )
+    return admission
+
+async def pace(user: ApiPrincipal) -> None:
+    """Charge one unit of work inside an admitted call, waiting for the rate if needed."""
+    await admission_control.pace(str(user.id), admission_tier(user))
+
+def hold_until_streamed(response: StreamingResponse, admission: Admission) -> StreamingResponse:
+    """Keep the in-flight slot until the body has been sent (or the client left)."""
+    body = response.body_iterator
+
+    async def body_then_release():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            await admission.release()
+
+    response.body_iterator = body_then_release()
+    # Runs after the response even if the body was never iterated
+    previous = response.background
+
+    async def release_after_response() -> None:
+        await admission.release()
+        if previous is not None:
+            await previous()
+
+    response.background = BackgroundTask(release_after_response)
+    return response
 
 @router.post("/generate-api-key", response_model=dict)
 async def generate_user_api_key(session: SessionDep, current_user: CurrentUser):
@@ -262,171 +669,1269 @@ async def generate_user_api_key(session: SessionDep, current_user: CurrentUser):
         raise HTTPException(status_code=500, detail="Failed to generate API key")
 
 @router.get("/regions", response_model=RegionsResponse)
-async def list_regions(user: Annotated[User, Depends(verify_api_token)]):
+async def list_regions(user: Annotated[ApiPrincipal, Depends(verify_api_token)]):
     logger.debug(f"Listing regions for user: {user.email}")
     return RegionsResponse(regions=list(endpoint_manager.endpoints.keys()))
 
 @router.get("/status", response_model=ProxyStatusResponse)
-async def get_proxy_status(region: str, user: Annotated[User, Depends(verify_api_token)]):
+async def get_proxy_status(region: str, user: Annotated[ApiPrincipal, Depends(verify_api_token)]):
     logger.debug(f"Checking proxy status for region: {region}, user: {user.email}")
     if region not in endpoint_manager.endpoints:
         logger.info(f"Invalid region: {region}")
         raise HTTPException(status_code=400, detail="Invalid region. Use /regions to list available regions")
-    endpoints = endpoint_manager.get_endpoints(region)
-    status_tasks = [check_proxy_health(endpoint, region) for endpoint in endpoints]
-    results = await asyncio.gather(*status_tasks)
-    healthy_count = sum(1 for r in results if r["is_healthy"])
-    total_count = len(endpoints)
-    avg_response_time = sum(r["response_time"] for r in results) / total_count if total_count > 0 else 0.0
+    health = health_monitor.region_health(region)
     status = ProxyStatus(
         region=region,
-        is_healthy=healthy_count > 0,
-        avg_response_time=avg_response_time,
-        healthy_endpoints=healthy_count,
-        total_endpoints=total_count,
-        last_checked=results[0]["last_checked"] if results else datetime.utcnow()
+        is_healthy=health.healthy_endpoints > 0,
+        avg_response_time=health.avg_response_time,
+        healthy_endpoints=health.healthy_endpoints,
+        total_endpoints=health.total_endpoints,
+        last_checked=health.last_checked,
+        endpoints=[
+            EndpointStatus(
+                endpoint_id=endpoint_manager.get_endpoint_id(region, state.endpoint) or "unknown",
+                is_healthy=state.is_healthy,
+                last_latency=state.last_latency,
+                last_error=state.last_error,
+                consecutive_failures=state.consecutive_failures,
+                last_checked=state.last_checked,
+                circuit_state=breakers.state(state.endpoint),
+                error_rate=breakers.get(state.endpoint).error_rate(),
+            )
+            for state in (health_monitor.endpoint_health(url) for url in endpoint_manager.get_endpoints(region))
+            if state
+        ],
     )
     return ProxyStatusResponse(statuses=[status])
 
-async def proxy_fetch_logic(
-    request: Request,
-    session: SessionDep,
-    region: str,
-    proxy_request: ProxyRequest,
-    user: User,
-    x_api_key: str,
-    background_tasks: BackgroundTasks,
-) -> ProxyResponse:
-    logger.debug(f"Proxy fetch request for URL '{proxy_request.url}' in region: {region}, user: {user.email}")
-    if region not in endpoint_manager.endpoints:
-        raise HTTPException(status_code=400, detail="Invalid region. Use /regions to list available regions")
+@router.get("/metrics", dependencies=[Depends(get_current_active_superuser)])
+async def get_proxy_metrics() -> dict:
+    """In-process queue and cache metrics for this worker (superusers only)."""
+    return {
+        "screenshot_queue": screenshot_queue.stats(),
+        "response_cache": response_cache.stats(),
+        "serp_cache": serp_cache.stats(),
+        "api_key_cache": principal_cache.stats(),
+        "admission": admission_control.stats(),
+        "proxy_retries": proxy_retry_policy.stats(),
+        "fetch_timeouts": fetch_timeouts.stats(),
+        "proxy_jobs": await proxy_jobs.stats(),
+        "job_queue": fetch_jobs.stats(),
+        "job_callback_queue": job_callbacks.stats(),
+        "crawls": dict(crawl_activity),
+        "target_concurrency": target_concurrency.stats(),
+        "health_timeouts": health_timeouts.stats(),
+        "coalesced_fetches": upstream_fetches.coalesced,
+    }
 
-    token = session.query(APIToken).filter(APIToken.token == x_api_key).first()
-    if not token:
-        logger.error(f"API key passed verification but not found in DB for user {user.id}. Possible data inconsistency.")
-        raise HTTPException(status_code=401, detail="API key is invalid or has been deactivated.")
+def available_endpoints(region: str) -> List[str]:
+    """
+    Endpoints in `region` that passed their last health checks and whose
+    circuit is not open. Reads in-memory state only; no network calls.
+    """
+    return [
+        endpoint for endpoint in health_monitor.healthy_endpoints(region)
+        if breakers.get(endpoint).is_available()
+    ]
+
+def flush_token_requests(deltas: Dict[UUID, int]) -> None:
+    """Apply accumulated request counts: one additive UPDATE per token, one commit."""
+    with Session(engine) as db:
+        for token_id, count in deltas.items():
+            db.execute(
+                update(APIToken)
+                .where(APIToken.id == token_id)
+                .values(request_count=APIToken.request_count + count)
+            )
+        db.commit()
+
+# Request counting stays out of the hot path; see WriteBehindCounter
+token_requests = WriteBehindCounter(
+    "API token request", flush_token_requests, interval=settings.TOKEN_REQUEST_FLUSH_INTERVAL
+)
+
+async def perform_screenshot_request(url: str, user_agent: str) -> None:
+    screenshot_url = f"https://autoparse-41617314059.us-east4.run.app/screenshot?url={quote_plus(url)}"
+    try:
+        client = http_clients.get("screenshot")
+        response = await client.get(
+            screenshot_url,
+            headers={"accept": "application/json", "User-Agent": user_agent}
+        )
+        response.raise_for_status()
+        data = response.json()
+        logger.info(f"Background screenshot request successful for URL: {url}")
+        if data.get("result"):
+            html_preview = data.get("result")[:200]
+            logger.debug(f"Background HTML Preview for {url}: {html_preview}")
+    except httpx.ConnectError as e:
+        logger.error(f"Network error during background screenshot for URL {url}: {str(e)}")
+    except httpx.TimeoutException as e:
+        logger.error(f"Timeout during background screenshot for URL {url}: {str(e)}")
+    except httpx.HTTPStatusError as e:
+        logger.error(f"HTTP error during background screenshot for URL {url}: {e.response.status_code} {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error during background screenshot for URL {url}: {str(e)}")
+
+# Screenshots run on a fixed set of workers, never inline with requests
+screenshot_queue = BoundedWorkQueue(
+    "Screenshot",
+    perform_screenshot_request,
+    workers=settings.SCREENSHOT_WORKERS,
+    max_size=settings.SCREENSHOT_QUEUE_SIZE,
+    dedupe_window=settings.SCREENSHOT_DEDUPE_SECONDS,
+)
+
+def schedule_screenshot(url: str, user_agent: str) -> None:
+    status = screenshot_queue.submit(normalize_url(url), url, user_agent)
+    if status != "queued":
+        logger.debug(f"Screenshot for {url} not queued: {status}")
+
+# Concurrent fetches per target host adapt to how the target responds (AIMD)
+target_concurrency = HostConcurrencyLimiter(
+    initial=settings.PROXY_TARGET_CONCURRENCY_INITIAL,
+    minimum=settings.PROXY_TARGET_CONCURRENCY_MIN,
+    maximum=settings.PROXY_TARGET_CONCURRENCY_MAX,
+    backoff=settings.PROXY_TARGET_BACKOFF,
+    queue_timeout=settings.PROXY_TARGET_QUEUE_TIMEOUT_SECONDS,
+)
+# Target responses (relayed by the endpoints) that mean "slow down"
+TARGET_THROTTLE_STATUS_CODES = {403, 429}
+
+async def acquire_target_slot(url: str, breaker: CircuitBreaker) -> Optional[HostSlot]:
+    """
+    Wait for a fetch slot on the URL's host, for an endpoint whose breaker
+    has already let the request through. Returns None (and gives back a
+    half-open probe) if no slot frees up in time, which the caller treats
+    like any other failed attempt so the fetch can fail over.
+    """
+    host = urlsplit(url).hostname or ""
+    try:
+        slot = await target_concurrency.acquire(host)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    if slot is None:
+        breaker.release()
+        logger.warning(f"Gave up waiting for a fetch slot on {host}")
+    return slot
 
-    # Define screenshot request as a background task
-    async def perform_screenshot_request():
-        screenshot_url = f"https://autoparse-41617314059.us-east4.run.app/screenshot?url={quote_plus(str(proxy_request.url))}"
+# Proxy fetch logic with retry mechanism
+async def try_endpoint(
+    endpoint: str,
+    attempt_region: str,
+    url: str,
+    user_agent: str,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> Optional[Dict]:
+    endpoint_id = endpoint_manager.get_endpoint_id(attempt_region, endpoint) or "unknown"
+    breaker = breakers.get(endpoint)
+    proxy_retry_policy.on_call()
+    delay = proxy_retry_policy.base_delay
+    for attempt in range(1, proxy_retry_policy.max_attempts + 1):
+        if not breaker.allow_request():
+            logger.info(f"Circuit open for {endpoint_id} in {attempt_region}, skipping")
+            return None
+        slot = await acquire_target_slot(url, breaker)
+        if slot is None:
+            return None
+        timeout = fetch_timeouts.timeout(slot.host)
+        started = time.monotonic()
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    screenshot_url,
-                    headers={"accept": "application/json", "User-Agent": request.headers.get("user-agent", "DataProxy-Internal-Fetcher/1.0")}
-                )
-                response.raise_for_status()
-                data = response.json()
-                logger.info(f"Background screenshot request successful for URL: {proxy_request.url}")
-                if data.get("result"):
-                    html_preview = data.get("result")[:200]
-                    logger.debug(f"Background HTML Preview for {proxy_request.url}: {html_preview}")
-        except httpx.ConnectError as e:
-            logger.error(f"Network error during background screenshot for URL {proxy_request.url}: {str(e)}")
+            client = http_clients.get("proxy")
+            payload = {"url": url}
+            if extra_headers:
+                # Forwarded by the endpoint to the target (conditional requests)
+                payload["headers"] = extra_headers
+            response = await client.post(
+                f"{endpoint}/fetch",
+                json=payload,
+                headers={"User-Agent": user_agent},
+                timeout=upstream_timeout(timeout),
+            )
+            response.raise_for_status()
+            data = response.json()
+            latency = time.monotonic() - started
+            endpoint_manager.record_result(endpoint, latency, success=True)
+            fetch_timeouts.observe(slot.host, latency)
+            breaker.record_success()
+            slot.outcome = THROTTLED if data.get("status_code") in TARGET_THROTTLE_STATUS_CODES else SUCCESS
+            logger.info(f"Proxy fetch successful in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt})")
+            if data.get("result"):
+                html_preview = data.get("result")[:200]
+                logger.debug(f"HTML Preview for {url}: {html_preview}")
+            return data
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
         except httpx.TimeoutException as e:
-            logger.error(f"Timeout during background screenshot for URL {proxy_request.url}: {str(e)}")
+            endpoint_manager.record_result(endpoint, time.monotonic() - started, success=False)
+            breaker.record_failure(timeout=True)
+            fetch_timeouts.observe_timeout(slot.host, timeout)
+            slot.outcome = THROTTLED
+            logger.error(f"Timeout ({timeout:.1f}s) during proxy fetch in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt}): {str(e)}")
+            failure = e
+        except (httpx.NetworkError, httpx.RemoteProtocolError) as e:
+            endpoint_manager.record_result(endpoint, time.monotonic() - started, success=False)
+            breaker.record_failure()
+            logger.error(f"Network error during proxy fetch in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt}): {str(e)}")
+            failure = e
         except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error during background screenshot for URL {proxy_request.url}: {e.response.status_code} {str(e)}")
+            endpoint_manager.record_result(endpoint, time.monotonic() - started, success=False)
+            breaker.record_failure()
+            if e.response.status_code in TARGET_THROTTLE_STATUS_CODES:
+                slot.outcome = THROTTLED
+            logger.error(f"HTTP error during proxy fetch in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt}): {e.response.status_code} {str(e)}")
+            failure = e
         except Exception as e:
-            logger.error(f"Unexpected error during background screenshot for URL {proxy_request.url}: {str(e)}")
+            endpoint_manager.record_result(endpoint, time.monotonic() - started, success=False)
+            breaker.record_failure()
+            logger.error(f"Unexpected error during proxy fetch in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt}): {str(e)}")
+            return None
+        finally:
+            target_concurrency.release(slot)
+        # Not retrying hands the URL to the next endpoint or region
+        if not proxy_retry_policy.should_retry(failure, attempt):
+            logger.warning(f"Not retrying {endpoint_id} in {attempt_region} after attempt {attempt}")
+            return None
+        delay = await proxy_retry_policy.sleep(delay)
+    return None
 
-    # Schedule screenshot request as a background task
-    background_tasks.add_task(perform_screenshot_request)
+async def try_hedged(
+    primary: str,
+    backup: str,
+    attempt_region: str,
+    url: str,
+    user_agent: str,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> tuple[Optional[Dict], List[str]]:
+    """
+    Send to `primary`; if it has not answered within the region's p90
+    latency and the hedge budget allows, also send to `backup`. The first
+    successful response wins and the other request is cancelled.
+    """
+    delay = endpoint_manager.latency_percentile(attempt_region, 0.9) or settings.PROXY_HEDGE_DEFAULT_DELAY
+    pending = {asyncio.create_task(try_endpoint(primary, attempt_region, url, user_agent, extra_headers=extra_headers))}
+    attempted = [primary]
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if not done and hedge_budget.try_spend():
+            logger.info(f"Hedging proxy fetch in {attempt_region} after {delay:.2f}s")
+            pending.add(asyncio.create_task(try_endpoint(backup, attempt_region, url, user_agent, extra_headers=extra_headers)))
+            attempted.append(backup)
+        while pending or done:
+            for task in done:
+                data = task.result()
+                if data:
+                    return data, attempted
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        return None, attempted
+    finally:
+        for task in pending:
+            task.cancel()
 
-    # Proxy fetch logic with retry mechanism
-    async def try_endpoint(endpoint: str, attempt_region: str, max_retries: int = 3) -> Optional[Dict]:
-        endpoint_id = endpoint_manager.get_endpoint_id(attempt_region, endpoint) or "unknown"
-        for attempt in range(1, max_retries + 1):
-            try:
-                async with httpx.AsyncClient(timeout=15.0) as client:
-                    response = await client.post(
-                        f"{endpoint}/fetch",
-                        json={"url": str(proxy_request.url)},
-                        headers={"User-Agent": request.headers.get("user-agent", "DataProxy-Internal-Fetcher/1.0")}
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    logger.info(f"Proxy fetch successful in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt})")
-                    if data.get("result"):
-                        html_preview = data.get("result")[:200]
-                        logger.debug(f"HTML Preview for {proxy_request.url}: {html_preview}")
-                    return data
-            except httpx.ConnectError as e:
-                logger.error(f"Network error during proxy fetch in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt}): {str(e)}")
-                if attempt == max_retries:
-                    logger.warning(f"Max retries reached for {endpoint_id} in {attempt_region}")
-                    return None
-                await asyncio.sleep(1.0 * attempt)  # Exponential backoff
-            except httpx.TimeoutException as e:
-                logger.error(f"Timeout during proxy fetch in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt}): {str(e)}")
-                if attempt == max_retries:
-                    logger.warning(f"Max retries reached for {endpoint_id} in {attempt_region}")
-                    return None
-                await asyncio.sleep(1.0 * attempt)
-            except httpx.HTTPStatusError as e:
-                logger.error(f"HTTP error during proxy fetch in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt}): {e.response.status_code} {str(e)}")
-                return None
-            except Exception as e:
-                logger.error(f"Unexpected error during proxy fetch in {attempt_region} (endpoint: {endpoint_id}, attempt: {attempt}): {str(e)}")
-                return None
-        return None
+def response_cache_key(url: str, region: str, user_agent: str) -> str:
+    # The User-Agent is the only client header forwarded upstream
+    return f"{region}|{user_agent}|{normalize_url(url)}"
 
-    regions_to_try = [region] + [r for r in random.sample(list(endpoint_manager.endpoints.keys()), len(endpoint_manager.endpoints)) if r != region]
-    for current_region in regions_to_try:
-        endpoints = endpoint_manager.get_endpoints(current_region)
-        health_tasks = [check_proxy_health(endpoint, current_region) for endpoint in endpoints]
-        try:
-            health_results = await asyncio.gather(*health_tasks, return_exceptions=True)
-            healthy_endpoints = [r["endpoint"] for r in health_results if isinstance(r, dict) and r.get("is_healthy")]
-        except Exception as e:
-            logger.error(f"Health check failed for region {current_region}: {str(e)}")
-            continue
+async def fetch_through_proxies(
+    url: str,
+    region: str,
+    user_agent: str,
+    hedge: bool = False,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> tuple[Dict, str]:
+    """
+    Fetch `url` through the best available endpoint, starting in `region`
+    and falling back to other regions. Returns the upstream payload and
+    the region that served it; raises 503 when every endpoint failed.
 
+    Identical concurrent fetches (same URL, region, User-Agent and
+    conditional headers) share a single upstream request.
+    """
+    key = response_cache_key(url, region, user_agent)
+    if extra_headers:
+        key += "|" + "|".join(f"{k}={v}" for k, v in sorted(extra_headers.items()))
+    result, _ = await upstream_fetches.do(
+        key, lambda: _fetch_through_proxies(url, region, user_agent, hedge=hedge, extra_headers=extra_headers)
+    )
+    return result
+
+async def _fetch_through_proxies(
+    url: str,
+    region: str,
+    user_agent: str,
+    hedge: bool = False,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> tuple[Dict, str]:
+    if hedge:
+        hedge_budget.on_request()
+
+    regions_to_try = endpoint_manager.order_regions(region, available_endpoints)
+    for current_region in regions_to_try:
+        healthy_endpoints = available_endpoints(current_region)
         if not healthy_endpoints:
             logger.warning(f"No healthy endpoints in region: {current_region}. Trying next region.")
             continue
 
-        random.shuffle(healthy_endpoints)
-        for endpoint in healthy_endpoints:
-            data = await try_endpoint(endpoint, current_region)
+        ordered_endpoints = endpoint_manager.order_endpoints(healthy_endpoints)
+        if hedge and len(ordered_endpoints) > 1:
+            data, attempted = await try_hedged(ordered_endpoints[0], ordered_endpoints[1], current_region, url, user_agent, extra_headers=extra_headers)
             if data:
-                token.request_count += 1
-                session.commit()
-                return ProxyResponse(
-                    result=data.get("result", ""),
-                    public_ip=data.get("public_ip", "unknown"),
-                    device_id=data.get("device_id", "unknown"),
-                    region_used=current_region,
-                )
+                return data, current_region
+            ordered_endpoints = [e for e in ordered_endpoints if e not in attempted]
+        for endpoint in ordered_endpoints:
+            data = await try_endpoint(endpoint, current_region, url, user_agent, extra_headers=extra_headers)
+            if data:
+                return data, current_region
+
+    logger.error(f"All proxy fetch attempts failed for {url} across all available regions.")
+    raise HTTPException(status_code=503, detail="No healthy proxy endpoints available across all regions.")
+
+def _header(headers: Optional[Dict], name: str) -> Optional[str]:
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+# Cached pages are kept compressed; streamed cache hits are sent as-is
+CACHE_ENCODING = settings.PROXY_CACHE_ENCODING if settings.PROXY_CACHE_ENCODING in AVAILABLE_ENCODINGS else "gzip"
+
+# Payload fields kept next to the cached page
+CACHED_META_FIELDS = ("public_ip", "device_id", "status_code", "headers")
+
+def cacheable(data: Dict) -> bool:
+    """Only 2xx target responses are cached; block pages, 429s and errors must not be replayed as hits."""
+    status_code = data.get("status_code")
+    return isinstance(status_code, int) and 200 <= status_code < 300
+
+def pack_cached_page(data: Dict, region_used: str, compressed_result: Optional[bytes] = None) -> Dict:
+    if compressed_result is None:
+        compressed_result = compress(data.get("result", "").encode("utf-8"), CACHE_ENCODING)
+    return {
+        "meta": {k: data[k] for k in CACHED_META_FIELDS if k in data},
+        "result": compressed_result,
+        "encoding": CACHE_ENCODING,
+        "region_used": region_used,
+    }
+
+def unpack_cached_page(value: Dict) -> Dict:
+    data = dict(value["meta"])
+    data["result"] = decompress(value["result"], value["encoding"]).decode("utf-8")
+    return data
+
+OFFLOAD_CONTENT_TYPE = "text/html; charset=utf-8"
+
+def require_offload_configured() -> None:
+    if not settings.PROXY_OFFLOAD_BUCKET:
+        raise HTTPException(status_code=400, detail="Result offloading is not configured on this server")
+
+async def offload_result(html: str, user_id: UUID) -> Optional[OffloadedResult]:
+    """
+    Upload a page of at least PROXY_OFFLOAD_MIN_BYTES to the offload bucket
+    (gzipped) and return a presigned reference to it. Returns None for
+    small pages, and when the upload fails so the caller can answer inline.
+    """
+    body = html.encode("utf-8")
+    if len(body) < settings.PROXY_OFFLOAD_MIN_BYTES:
+        return None
+    from app.models import StorageBucket
+    from app.services.storage_provisioner import storage_provisioner
+
+    bucket = StorageBucket(
+        bucket_name=settings.PROXY_OFFLOAD_BUCKET,
+        storage_backend=settings.PROXY_OFFLOAD_STORAGE_BACKEND,
+        region=settings.AWS_DEFAULT_REGION,
+    )
+    now = datetime.utcnow()
+    object_key = f"proxy-results/{user_id}/{now:%Y/%m/%d}/{uuid4().hex}.html"
+    stored = await asyncio.to_thread(compress, body, "gzip")
+    try:
+        await storage_provisioner.put_object(bucket, object_key, stored, content_type=OFFLOAD_CONTENT_TYPE, content_encoding="gzip")
+        url = await storage_provisioner.generate_presigned_download_url(
+            bucket, object_key, expires_in=settings.PROXY_OFFLOAD_URL_EXPIRY_SECONDS
+        )
+    except Exception as e:
+        logger.error(f"Offloading a {len(body)} byte result failed, returning it inline: {e}")
+        return None
+    return OffloadedResult(
+        url=url,
+        expires_at=now + timedelta(seconds=settings.PROXY_OFFLOAD_URL_EXPIRY_SECONDS),
+        size_bytes=len(body),
+        stored_bytes=len(stored),
+        content_type=OFFLOAD_CONTENT_TYPE,
+        content_encoding="gzip",
+        sha256=hashlib.sha256(body).hexdigest(),
+    )
+
+def parse_extract_fields(value: str) -> tuple[str, ...]:
+    """Validate a comma-separated `extract` parameter against html_extract.FIELDS."""
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(",") if f.strip()))
+    unknown = [f for f in fields if f not in html_extract.FIELDS]
+    if not fields or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid extract fields {unknown or [value]}; choose from {', '.join(html_extract.FIELDS)}",
+        )
+    return fields
+
+async def extract_content(html: str, url: str, fields: tuple[str, ...]) -> ExtractedContent:
+    try:
+        return ExtractedContent(**await parser_pool.run(html_extract.extract, html, url, fields))
+    except Exception as e:
+        logger.error(f"Failed to extract content from {url}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to extract content from the page.")
+
+async def cached_fetch(url: str, region: str, user_agent: str, hedge: bool = False) -> tuple[Dict, str, str]:
+    """
+    fetch_through_proxies behind the response cache. Returns the payload,
+    the region that served it and the cache status. Stale entries that
+    carry an ETag or Last-Modified are revalidated with a conditional fetch.
+    """
+    key = response_cache_key(url, region, user_agent)
+    entry, fresh = response_cache.get(key)
+    if entry and fresh:
+        return unpack_cached_page(entry.value), entry.value["region_used"], "hit"
+
+    validators = entry.validators() if entry else None
+    data, region_used = await fetch_through_proxies(url, region, user_agent, hedge=hedge, extra_headers=validators)
+    if entry and data.get("status_code") == 304:
+        response_cache.refresh(key)
+        return unpack_cached_page(entry.value), entry.value["region_used"], "revalidated"
+
+    if cacheable(data):
+        response_cache.set(
+            key,
+            pack_cached_page(data, region_used),
+            etag=_header(data.get("headers"), "etag"),
+            last_modified=_header(data.get("headers"), "last-modified"),
+        )
+    return data, region_used, "miss"
+
+async def proxy_fetch_logic(
+    request: Request,
+    region: str,
+    proxy_request: ProxyRequest,
+    user: ApiPrincipal,
+    hedge: bool = False,
+    use_cache: bool = False,
+    offload: bool = False,
+    extract: tuple[str, ...] = (),
+) -> ProxyResponse:
+    logger.debug(f"Proxy fetch request for URL '{proxy_request.url}' in region: {region}, user: {user.email}")
+    if region not in endpoint_manager.endpoints:
+        raise HTTPException(status_code=400, detail="Invalid region. Use /regions to list available regions")
+
+    url = str(proxy_request.url)
+    user_agent = request.headers.get("user-agent", DEFAULT_USER_AGENT)
+
+    if use_cache:
+        data, region_used, cache_status = await cached_fetch(url, region, user_agent, hedge=hedge)
+    else:
+        data, region_used = await fetch_through_proxies(url, region, user_agent, hedge=hedge)
+        cache_status = None
+
+    # Queue a screenshot (only when we went upstream)
+    if cache_status != "hit":
+        schedule_screenshot(url, user_agent)
+
+    result = data.get("result", "")
+    extracted = await extract_content(result, url, extract) if extract else None
+    token_requests.add(user.token_id)
+    result_ref = await offload_result(result, user.id) if offload and not extracted else None
+    return ProxyResponse(
+        result="" if result_ref or extracted else result,
+        public_ip=data.get("public_ip", "unknown"),
+        device_id=data.get("device_id", "unknown"),
+        region_used=region_used,
+        cache_status=cache_status,
+        result_ref=result_ref,
+        extracted=extracted,
+    )
+
+# Streamed fetches: relay the upstream "result" field without buffering it
+@dataclass
+class UpstreamStream:
+    endpoint: str
+    region: str
+    response: httpx.Response
+    chunks: AsyncIterator[bytes]
+    parser: JsonFieldStreamer
+    head: str
+    started: float
+    slot: HostSlot
+    received: int = 0
 
-    logger.error(f"All proxy fetch attempts failed for user {user.email} across all available regions.")
+    async def close(self) -> None:
+        """Close the upstream response and free the target host slot. Safe to call more than once."""
+        target_concurrency.release(self.slot)
+        await self.response.aclose()
+
+async def open_endpoint_stream(endpoint: str, attempt_region: str, url: str, user_agent: str) -> Optional[UpstreamStream]:
+    """
+    Send the fetch to one endpoint and read its JSON reply up to the start
+    of the "result" field. Returns None if the endpoint failed before that
+    point, so the caller can still fail over to another endpoint.
+    """
+    endpoint_id = endpoint_manager.get_endpoint_id(attempt_region, endpoint) or "unknown"
+    breaker = breakers.get(endpoint)
+    if not breaker.allow_request():
+        logger.info(f"Circuit open for {endpoint_id} in {attempt_region}, skipping")
+        return None
+    # Streamed fetches count against the target host's limit like buffered
+    # ones; the slot is held until the relay closes the stream
+    slot = await acquire_target_slot(url, breaker)
+    if slot is None:
+        return None
+    client = http_clients.get("proxy")
+    started = time.monotonic()
+    response = None
+    try:
+        request = client.build_request(
+            "POST",
+            f"{endpoint}/fetch",
+            json={"url": url},
+            headers={"User-Agent": user_agent},
+            timeout=upstream_timeout(fetch_timeouts.timeout(slot.host)),
+        )
+        response = await client.send(request, stream=True)
+        response.raise_for_status()
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.PROXY_STREAM_MAX_BYTES:
+            endpoint_manager.record_result(endpoint, time.monotonic() - started, success=True)
+            breaker.record_success()
+            await response.aclose()
+            raise HTTPException(status_code=413, detail=f"Upstream response exceeds {settings.PROXY_STREAM_MAX_BYTES} bytes")
+
+        upstream = UpstreamStream(
+            endpoint=endpoint,
+            region=attempt_region,
+            response=response,
+            chunks=response.aiter_bytes(),
+            parser=JsonFieldStreamer("result"),
+            head="",
+            started=started,
+            slot=slot,
+        )
+        head = []
+        async for chunk in upstream.chunks:
+            upstream.received += len(chunk)
+            head.append(upstream.parser.feed(chunk))
+            if upstream.parser.field_started or upstream.parser.done:
+                break
+        upstream.head = "".join(head)
+        if upstream.parser.fields.get("status_code") in TARGET_THROTTLE_STATUS_CODES:
+            slot.outcome = THROTTLED
+        logger.info(f"Proxy stream opened in {attempt_region} (endpoint: {endpoint_id})")
+        return upstream
+    except HTTPException:
+        target_concurrency.release(slot)
+        raise
+    except asyncio.CancelledError:
+        breaker.release()
+        target_concurrency.release(slot)
+        if response is not None:
+            await response.aclose()
+        raise
+    except Exception as e:
+        endpoint_manager.record_result(endpoint, time.monotonic() - started, success=False)
+        breaker.record_failure(timeout=isinstance(e, httpx.TimeoutException))
+        if isinstance(e, httpx.TimeoutException) or (
+            isinstance(e, httpx.HTTPStatusError) and e.response.status_code in TARGET_THROTTLE_STATUS_CODES
+        ):
+            slot.outcome = THROTTLED
+        target_concurrency.release(slot)
+        logger.error(f"Error opening proxy stream in {attempt_region} (endpoint: {endpoint_id}): {str(e)}")
+        if response is not None:
+            await response.aclose()
+        return None
+
+async def open_upstream_stream(url: str, region: str, user_agent: str) -> UpstreamStream:
+    """Open a streamed fetch, trying endpoints in the same order as fetch_through_proxies."""
+    for current_region in endpoint_manager.order_regions(region, available_endpoints):
+        for endpoint in endpoint_manager.order_endpoints(available_endpoints(current_region)):
+            upstream = await open_endpoint_stream(endpoint, current_region, url, user_agent)
+            if upstream:
+                return upstream
+
+    logger.error(f"All proxy stream attempts failed for {url} across all available regions.")
     raise HTTPException(status_code=503, detail="No healthy proxy endpoints available across all regions.")
 
+async def relay_upstream_stream(upstream: UpstreamStream, cache_key: Optional[str] = None) -> AsyncIterator[bytes]:
+    """
+    Yield the rest of the "result" field as UTF-8 bytes. Errors after the
+    first byte cannot change the status code any more, so they abort the
+    response instead of ending it cleanly with a truncated page.
+
+    With a `cache_key`, a compressed copy is built alongside the relay and
+    stored once the page is complete (unless it outgrew the cache).
+    """
+    breaker = breakers.get(upstream.endpoint)
+    recorded = False
+    compressor = StreamCompressor(CACHE_ENCODING) if cache_key else None
+    compressed: List[bytes] = []
+    compressed_size = 0
+
+    def keep(data: bytes) -> None:
+        nonlocal compressor, compressed_size
+        if compressor is None:
+            return
+        compressed.append(compressor.compress(data))
+        compressed_size += len(compressed[-1])
+        if compressed_size > response_cache.max_bytes:
+            compressor = None
+            compressed.clear()
+
+    try:
+        if upstream.head:
+            head = upstream.head.encode("utf-8")
+            keep(head)
+            yield head
+        async for chunk in upstream.chunks:
+            upstream.received += len(chunk)
+            if upstream.received > settings.PROXY_STREAM_MAX_BYTES:
+                # The endpoint itself is fine; only this page is too large
+                endpoint_manager.record_result(upstream.endpoint, time.monotonic() - upstream.started, success=True)
+                breaker.record_success()
+                recorded = True
+                raise RuntimeError(f"Upstream response exceeded {settings.PROXY_STREAM_MAX_BYTES} bytes")
+            text = upstream.parser.feed(chunk)
+            if text:
+                data = text.encode("utf-8")
+                keep(data)
+                yield data
+            if upstream.parser.done:
+                break
+        endpoint_manager.record_result(upstream.endpoint, time.monotonic() - upstream.started, success=True)
+        breaker.record_success()
+        recorded = True
+        if upstream.slot.outcome != THROTTLED:
+            upstream.slot.outcome = SUCCESS
+        if compressor is not None and upstream.parser.done and cacheable(upstream.parser.fields):
+            compressed.append(compressor.finish())
+            response_cache.set(
+                cache_key,
+                pack_cached_page(upstream.parser.fields, upstream.region, b"".join(compressed)),
+            )
+        logger.info(f"Proxy stream finished in {upstream.region}: {upstream.received} bytes")
+    except Exception as e:
+        if not recorded:
+            endpoint_manager.record_result(upstream.endpoint, time.monotonic() - upstream.started, success=False)
+            breaker.record_failure(timeout=isinstance(e, httpx.TimeoutException))
+            recorded = True
+        if isinstance(e, httpx.TimeoutException):
+            upstream.slot.outcome = THROTTLED
+        logger.error(f"Proxy stream in {upstream.region} aborted: {str(e)}")
+        raise
+    finally:
+        if not recorded:
+            # Client went away mid-stream: give back a half-open probe
+            breaker.release()
+        await upstream.close()
+
+async def proxy_stream_logic(
+    request: Request,
+    region: str,
+    proxy_request: ProxyRequest,
+    user: ApiPrincipal,
+    use_cache: bool = False,
+) -> Response:
+    logger.debug(f"Streamed proxy fetch for URL '{proxy_request.url}' in region: {region}, user: {user.email}")
+    if region not in endpoint_manager.endpoints:
+        raise HTTPException(status_code=400, detail="Invalid region. Use /regions to list available regions")
+
+    url = str(proxy_request.url)
+    user_agent = request.headers.get("user-agent", DEFAULT_USER_AGENT)
+    cache_key = response_cache_key(url, region, user_agent) if use_cache else None
+
+    if cache_key:
+        entry, fresh = response_cache.get(cache_key)
+        if entry and fresh:
+            token_requests.add(user.token_id)
+            return cached_page_response(request, entry.value)
+
+    upstream = await open_upstream_stream(url, region, user_agent)
+    schedule_screenshot(url, user_agent)
+    token_requests.add(user.token_id)
+
+    # Metadata the endpoint sent ahead of "result"; HTTP trailers are not
+    # available through the ASGI server, so later fields cannot be relayed
+    headers = {
+        "X-Proxy-Region": upstream.region,
+        "X-Proxy-Public-IP": str(upstream.parser.fields.get("public_ip", "unknown")),
+        "X-Proxy-Device-ID": str(upstream.parser.fields.get("device_id", "unknown")),
+    }
+    if cache_key:
+        headers["X-Cache-Status"] = "miss"
+    return StreamingResponse(
+        relay_upstream_stream(upstream, cache_key),
+        media_type="text/html; charset=utf-8",
+        headers=headers,
+        # Frees the host slot even if the client left before the body started
+        background=BackgroundTask(upstream.close),
+    )
+
+def cached_page_response(request: Request, value: Dict) -> Response:
+    """
+    Serve a cached page for a streamed fetch. If the client accepts the
+    encoding the page is stored in, the compressed bytes go out unchanged.
+    """
+    headers = {
+        "X-Proxy-Region": value["region_used"],
+        "X-Proxy-Public-IP": str(value["meta"].get("public_ip", "unknown")),
+        "X-Proxy-Device-ID": str(value["meta"].get("device_id", "unknown")),
+        "X-Cache-Status": "hit",
+        "Vary": "Accept-Encoding",
+    }
+    if negotiate(request.headers.get("accept-encoding"), [value["encoding"]]):
+        headers["Content-Encoding"] = value["encoding"]
+        body = value["result"]
+    else:
+        body = decompress(value["result"], value["encoding"])
+    return Response(content=body, media_type="text/html; charset=utf-8", headers=headers)
+
 @router.post("/fetch", response_model=ProxyResponse)
 async def proxy_fetch(
     request: Request,
-    session: SessionDep,
     region: str,
     proxy_request: ProxyRequest,
-    user: Annotated[User, Depends(verify_api_token)],
-    x_api_key: Annotated[str, Header()],
-    background_tasks: BackgroundTasks,  # Added to match original
+    user: Annotated[ApiPrincipal, Depends(verify_api_token)],
+    hedge: bool = False,
+    cache: bool = False,
+    stream: bool = False,
+    offload: bool = False,
+    extract: Optional[str] = None,
+):
+    """
+    Fetches a URL through a regional proxy endpoint.
+
+    With `hedge=true`, a slow first endpoint is backed up by a second one
+    after the region's recent p90 latency; the first success is returned.
+    With `cache=true`, a recent successful (2xx) response for the same
+    URL, region and User-Agent is served from memory; see `cache_status`
+    in the response.
+    With `stream=true`, the page body is relayed as it arrives instead of
+    a JSON `ProxyResponse`; `public_ip`, `device_id` and `region_used` are
+    sent as `X-Proxy-Public-IP`, `X-Proxy-Device-ID` and `X-Proxy-Region`
+    headers. Streamed fetches do not hedge; with `cache=true` they report
+    `X-Cache-Status` and do not revalidate stale entries.
+
+    Responses are compressed (zstd, br or gzip) per `Accept-Encoding`.
+
+    With `offload=true`, a large page is not returned inline: it is stored
+    in object storage and `result_ref` carries a presigned download URL
+    and its size, type and checksum (`result` is then empty). Smaller
+    pages are returned inline as usual. Not applicable with `stream=true`.
+
+    With `extract=` (comma-separated: text, links, metadata, json_ld), the
+    page is parsed server-side and only `extracted` is returned: readable
+    text, outgoing links, title/meta/OpenGraph tags and JSON-LD blocks
+    (`title` is always included; `result` is empty and `offload` is moot).
+    Not applicable with `stream=true`.
+
+    Requests are subject to the caller's rate and concurrency limits; over
+    either, the response is 429 with `Retry-After`.
+    """
+    extract_fields = parse_extract_fields(extract) if extract is not None else ()
+    if extract_fields and stream:
+        raise HTTPException(status_code=400, detail="extract cannot be combined with stream=true")
+    if offload and not extract_fields:
+        require_offload_configured()
+    admission = await admit(user)
+    streaming = False
+    try:
+        if stream:
+            response = await proxy_stream_logic(request, region, proxy_request, user, use_cache=cache)
+            if isinstance(response, StreamingResponse):
+                streaming = True
+                return hold_until_streamed(response, admission)
+            return response
+        return await proxy_fetch_logic(request, region, proxy_request, user, hedge=hedge, use_cache=cache, offload=offload, extract=extract_fields)
+    finally:
+        if not streaming:
+            await admission.release()
+
+# Per-user limit on concurrent upstream fetches across all of a user's batches
+_batch_semaphores: Dict[UUID, asyncio.Semaphore] = {}
+
+def _batch_semaphore(user_id: UUID) -> asyncio.Semaphore:
+    semaphore = _batch_semaphores.get(user_id)
+    if semaphore is None:
+        semaphore = _batch_semaphores.setdefault(user_id, asyncio.Semaphore(settings.PROXY_BATCH_CONCURRENCY_PER_USER))
+    return semaphore
+
+@router.post("/fetch/batch")
+async def proxy_fetch_batch(
+    request: Request,
+    region: str,
+    batch: BatchProxyRequest,
+    user: Annotated[ApiPrincipal, Depends(verify_api_token)],
+    hedge: bool = False,
+    offload: bool = False,
+):
+    """
+    Fetches many URLs in one call and streams results back as NDJSON.
+
+    Authentication and the API token lookup happen once for the whole batch.
+    Each line is a `BatchFetchResult`, written as soon as its fetch completes
+    (so lines arrive out of order; use `index`). A failed URL produces an
+    `"error"` line and does not stop the rest of the batch. With
+    `offload=true`, large pages are returned as `result_ref` like /fetch.
+
+    The batch is admitted like a single request (429 with `Retry-After`
+    when over the caller's limits); each URL then draws on the same rate,
+    so a large batch proceeds at the caller's sustained rate.
+    """
+    logger.debug(f"Batch proxy fetch of {len(batch.urls)} URLs in region: {region}, user: {user.email}")
+    if region not in endpoint_manager.endpoints:
+        raise HTTPException(status_code=400, detail="Invalid region. Use /regions to list available regions")
+    if not batch.urls:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one URL")
+    if len(batch.urls) > settings.PROXY_BATCH_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds the maximum of {settings.PROXY_BATCH_MAX_URLS} URLs")
+    if offload:
+        require_offload_configured()
+
+    admission = await admit(user)
+    token_id = user.token_id
+    user_agent = request.headers.get("user-agent", DEFAULT_USER_AGENT)
+    semaphore = _batch_semaphore(user.id)
+
+    async def fetch_one(index: int, url: str) -> BatchFetchResult:
+        async with semaphore:
+            # Pace inside the slot so a large batch holds a bounded token debt
+            await pace(user)
+            try:
+                data, region_used = await fetch_through_proxies(url, region, user_agent, hedge=hedge)
+            except HTTPException as e:
+                return BatchFetchResult(index=index, url=url, status="error", status_code=e.status_code, error=e.detail)
+            except Exception as e:
+                logger.error(f"Unexpected error in batch fetch for URL {url}: {str(e)}")
+                return BatchFetchResult(index=index, url=url, status="error", status_code=500, error="Internal error")
+        schedule_screenshot(url, user_agent)
+        result = data.get("result", "")
+        result_ref = await offload_result(result, user.id) if offload else None
+        return BatchFetchResult(
+            index=index,
+            url=url,
+            status="ok",
+            result=None if result_ref else result,
+            public_ip=data.get("public_ip", "unknown"),
+            device_id=data.get("device_id", "unknown"),
+            region_used=region_used,
+            result_ref=result_ref,
+        )
+
+    async def stream_results():
+        tasks = [asyncio.create_task(fetch_one(i, str(url))) for i, url in enumerate(batch.urls)]
+        succeeded = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                if line.status == "ok":
+                    succeeded += 1
+                yield line.model_dump_json(exclude_none=True) + "\n"
+        finally:
+            # Client disconnects cancel the remaining fetches; completed ones still count
+            for task in tasks:
+                task.cancel()
+            if succeeded:
+                token_requests.add(token_id, succeeded)
+            logger.info(f"Batch proxy fetch for user {user.email}: {succeeded}/{len(tasks)} succeeded")
+
+    return hold_until_streamed(StreamingResponse(stream_results(), media_type="application/x-ndjson"), admission)
+
+# Async fetch jobs: POST /proxy/jobs queues a fetch, GET /proxy/jobs/{id} polls it
+@dataclass(frozen=True, slots=True)
+class FetchJobSpec:
+    url: str
+    region: str
+    user_agent: str
+    token_id: UUID
+    hedge: bool = False
+    callback_url: Optional[str] = None
+    offload: bool = False
+
+proxy_jobs = JobStore(engine, ttl=settings.PROXY_JOB_TTL_SECONDS, poll_interval=settings.PROXY_JOB_POLL_INTERVAL_SECONDS)
+callback_retry_policy = RetryPolicy(budget=RequestBudget(ratio=settings.RETRY_BUDGET_RATIO))
+
+def job_spec(job: Job) -> FetchJobSpec:
+    return FetchJobSpec(**{**job.spec, "token_id": UUID(job.spec["token_id"])})
+
+def job_status(job: Job) -> ProxyJobStatus:
+    status = ProxyJobStatus(
+        job_id=job.id,
+        status=job.status,
+        url=job.spec["url"],
+        region=job.spec["region"],
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        status_code=job.status_code,
+        error=job.error,
+    )
+    if job.status == SUCCEEDED:
+        meta = job.result_meta or {}
+        response = ProxyResponse(
+            result="",
+            public_ip=meta.get("public_ip", "unknown"),
+            device_id=meta.get("device_id", "unknown"),
+            region_used=meta.get("region_used", job.spec["region"]),
+        )
+        if "ref" in meta:
+            response.result_ref = OffloadedResult(**meta["ref"])
+        elif job.result is not None:
+            response.result = decompress(job.result, meta["encoding"]).decode("utf-8")
+        status.result = response
+    return status
+
+async def run_fetch_job(job: Job) -> None:
+    spec = job_spec(job)
+    await proxy_jobs.start(job)
+    try:
+        data, region_used = await fetch_through_proxies(spec.url, spec.region, spec.user_agent, hedge=spec.hedge)
+    except HTTPException as e:
+        await proxy_jobs.fail(job, e.status_code, e.detail)
+    except Exception as e:
+        logger.error(f"Unexpected error in fetch job {job.id} for URL {spec.url}: {str(e)}")
+        await proxy_jobs.fail(job, 500, "Internal error")
+    else:
+        meta = {k: data[k] for k in ("public_ip", "device_id") if k in data}
+        meta["region_used"] = region_used
+        result_ref = await offload_result(data.get("result", ""), job.owner) if spec.offload else None
+        if result_ref:
+            await proxy_jobs.succeed(job, None, {**meta, "ref": result_ref.model_dump(mode="json")})
+        else:
+            # Kept compressed, like cached pages
+            value = pack_cached_page(data, region_used)
+            if len(value["result"]) > settings.PROXY_JOB_RESULT_MAX_BYTES:
+                await proxy_jobs.fail(job, 413, f"Result exceeds {settings.PROXY_JOB_RESULT_MAX_BYTES} bytes; use offload")
+            else:
+                await proxy_jobs.succeed(job, value["result"], {**meta, "encoding": value["encoding"]})
+        token_requests.add(spec.token_id)
+        schedule_screenshot(spec.url, spec.user_agent)
+    if spec.callback_url:
+        job_callbacks.submit(job.id, job.id)
+
+async def deliver_job_callback(job_id: str) -> None:
+    job = await proxy_jobs.get(job_id)
+    if job is None:
+        return
+    body = job_status(job).model_dump_json()
+    client = http_clients.get("webhook")
+
+    async def post() -> None:
+        response = await webhook_guard.post(
+            client,
+            job.spec["callback_url"],
+            content=body,
+            headers={"Content-Type": "application/json", "X-Proxy-Job-Id": job.id},
+        )
+        response.raise_for_status()
+
+    try:
+        await callback_retry_policy.call(post, f"Callback for job {job.id}")
+    except webhook_guard.UnsafeURL as e:
+        logger.warning(f"Refused callback for job {job.id}: {e}")
+
+async def check_callback_url(url: str) -> None:
+    """400 unless `url` is https and its host resolves only to public addresses."""
+    try:
+        parsed = webhook_guard.check_url(url)
+        await webhook_guard.resolve_public(parsed.host, parsed.port or 443)
+    except webhook_guard.UnsafeURL as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+fetch_jobs = BoundedWorkQueue(
+    "Proxy job",
+    run_fetch_job,
+    workers=settings.PROXY_JOB_WORKERS,
+    max_size=settings.PROXY_JOB_QUEUE_SIZE,
+)
+job_callbacks = BoundedWorkQueue(
+    "Job callback",
+    deliver_job_callback,
+    workers=settings.PROXY_JOB_CALLBACK_WORKERS,
+    max_size=settings.PROXY_JOB_QUEUE_SIZE,
+)
+
+@router.post("/jobs", response_model=ProxyJobStatus, status_code=202)
+async def create_proxy_job(
+    request: Request,
+    region: str,
+    job_request: ProxyJobRequest,
+    user: Annotated[ApiPrincipal, Depends(verify_api_token)],
+):
+    """
+    Queues a fetch and returns its job id without waiting for the page.
+
+    Poll `GET /proxy/jobs/{job_id}` (with `wait` to long-poll) for the
+    result, or pass `callback_url` to have the finished job POSTed to you
+    (https, and only to hosts that resolve to public addresses; redirects
+    are not followed).
+    Results are kept for a limited time after the job finishes; with
+    `offload: true`, a large page is stored in object storage instead and
+    returned as `result.result_ref` (a presigned URL); without it, a page
+    whose compressed size exceeds PROXY_JOB_RESULT_MAX_BYTES fails the job
+    with 413. Jobs are stored in the database, so any API worker can
+    answer the poll. Creating
+    a job counts against the caller's rate limit; each caller can have a
+    limited number of unfinished jobs, and a full queue answers 503.
+    """
+    logger.debug(f"Proxy job for URL '{job_request.url}' in region: {region}, user: {user.email}")
+    if region not in endpoint_manager.endpoints:
+        raise HTTPException(status_code=400, detail="Invalid region. Use /regions to list available regions")
+    if job_request.offload:
+        require_offload_configured()
+    if job_request.callback_url:
+        await check_callback_url(str(job_request.callback_url))
+    if await proxy_jobs.pending(user.id) >= settings.PROXY_JOB_MAX_PENDING_PER_USER:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many unfinished jobs (limit {settings.PROXY_JOB_MAX_PENDING_PER_USER})",
+            headers={"Retry-After": "5"},
+        )
+    # Rate only: the job does not hold one of the caller's in-flight slots
+    admission = await admit(user)
+    await admission.release()
+
+    spec = FetchJobSpec(
+        url=str(job_request.url),
+        region=region,
+        user_agent=request.headers.get("user-agent", DEFAULT_USER_AGENT),
+        token_id=user.token_id,
+        hedge=job_request.hedge,
+        callback_url=str(job_request.callback_url) if job_request.callback_url else None,
+        offload=job_request.offload,
+    )
+    job = await proxy_jobs.create(user.id, {**asdict(spec), "token_id": str(spec.token_id)})
+    if fetch_jobs.submit(job.id, job) != "queued":
+        await proxy_jobs.discard(job)
+        raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "5"})
+    return job_status(job)
+
+@router.get("/jobs/{job_id}", response_model=ProxyJobStatus)
+async def get_proxy_job(
+    job_id: str,
+    user: Annotated[ApiPrincipal, Depends(verify_api_token)],
+    wait: Annotated[float, Query(ge=0)] = 0,
+):
+    """
+    Returns a job's status, and its result once it has succeeded. With
+    `wait` (seconds, capped server-side), an unfinished job is held open
+    until it finishes or the wait runs out.
+    """
+    job = await proxy_jobs.get(job_id)
+    if job is None or job.owner != user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = await proxy_jobs.wait(job, min(wait, settings.PROXY_JOB_MAX_WAIT_SECONDS))
+    return job_status(job)
+
+# Crawls: POST /proxy/crawl runs a frontier server-side and streams pages as NDJSON
+crawl_slots = asyncio.Semaphore(settings.PROXY_CRAWL_GLOBAL_CONCURRENCY)
+crawl_activity = {"active_crawls": 0, "fetches_in_flight": 0}
+
+@router.post("/crawl")
+async def proxy_crawl(
+    request: Request,
+    region: str,
+    crawl: CrawlRequest,
+    user: Annotated[ApiPrincipal, Depends(verify_api_token)],
 ):
-    return await proxy_fetch_logic(request, session, region, proxy_request, user, x_api_key, background_tasks)
+    """
+    Crawls from the seed URLs through the region's proxy endpoints and
+    streams each page back as an NDJSON `CrawlPageResult` line as soon as
+    it is fetched, followed by one `CrawlSummary` line.
+
+    Links found on each page are followed up to `max_depth` hops, within
+    `scope`, each URL at most once, and at most `max_pages` pages in all.
+    Fetches run concurrently (PROXY_CRAWL_CONCURRENCY per crawl, capped
+    across all crawls), while each target host sees at most
+    PROXY_CRAWL_HOST_CONCURRENCY fetches at a time and
+    PROXY_CRAWL_HOST_DELAY_SECONDS between them. With `extract`, lines
+    carry `extracted` instead of the page (see /fetch).
+
+    The crawl is admitted like a single request; each page then draws on
+    the caller's rate like a /fetch/batch URL. Disconnecting stops it.
+    """
+    logger.debug(f"Crawl of {len(crawl.seeds)} seeds in region: {region}, user: {user.email}")
+    if region not in endpoint_manager.endpoints:
+        raise HTTPException(status_code=400, detail="Invalid region. Use /regions to list available regions")
+    if not crawl.seeds or len(crawl.seeds) > settings.PROXY_CRAWL_MAX_SEEDS:
+        raise HTTPException(status_code=400, detail=f"A crawl takes 1 to {settings.PROXY_CRAWL_MAX_SEEDS} seed URLs")
+    if not 0 <= crawl.max_depth <= settings.PROXY_CRAWL_MAX_DEPTH:
+        raise HTTPException(status_code=400, detail=f"max_depth must be between 0 and {settings.PROXY_CRAWL_MAX_DEPTH}")
+    if not 1 <= crawl.max_pages <= settings.PROXY_CRAWL_MAX_PAGES:
+        raise HTTPException(status_code=400, detail=f"max_pages must be between 1 and {settings.PROXY_CRAWL_MAX_PAGES}")
+    if crawl.scope not in CRAWL_SCOPES:
+        raise HTTPException(status_code=400, detail=f"Invalid scope; choose from {', '.join(CRAWL_SCOPES)}")
+    extract_fields = parse_extract_fields(crawl.extract) if crawl.extract is not None else ()
+
+    admission = await admit(user)
+    token_id = user.token_id
+    user_agent = request.headers.get("user-agent", DEFAULT_USER_AGENT)
+    semaphore = _batch_semaphore(user.id)
+    frontier = CrawlFrontier(
+        (str(url) for url in crawl.seeds),
+        max_pages=crawl.max_pages,
+        max_depth=crawl.max_depth,
+        scope=crawl.scope,
+        host_delay=settings.PROXY_CRAWL_HOST_DELAY_SECONDS,
+        host_concurrency=settings.PROXY_CRAWL_HOST_CONCURRENCY,
+    )
+    # Links are always extracted to feed the frontier; they are returned only if asked for
+    parse_fields = tuple(dict.fromkeys(extract_fields + ("links",)))
+
+    async def crawl_page(url: str, depth: int) -> CrawlPageResult:
+        async with semaphore:
+            # Pace inside the per-user slot, like batch URLs; the global
+            # crawl slot is only taken once the token is in hand
+            await pace(user)
+            async with crawl_slots:
+                crawl_activity["fetches_in_flight"] += 1
+                try:
+                    data, region_used = await fetch_through_proxies(url, region, user_agent)
+                except HTTPException as e:
+                    return CrawlPageResult(url=url, depth=depth, status="error", status_code=e.status_code, error=e.detail)
+                finally:
+                    crawl_activity["fetches_in_flight"] -= 1
+        html = data.get("result", "")
+        try:
+            extracted = await parser_pool.run(html_extract.extract, html, url, parse_fields)
+        except Exception as e:
+            logger.warning(f"Crawl could not parse {url}: {e}")
+            extracted = {"links": []}
+        links = extracted.get("links", []) if "links" in extract_fields else extracted.pop("links", [])
+        queued = sum(frontier.add(link["url"], depth + 1) for link in links) if depth < crawl.max_depth else 0
+        return CrawlPageResult(
+            url=url,
+            depth=depth,
+            status="ok",
+            result=None if extract_fields else html,
+            extracted=ExtractedContent(**extracted) if extract_fields else None,
+            links_queued=queued,
+            public_ip=data.get("public_ip", "unknown"),
+            device_id=data.get("device_id", "unknown"),
+            region_used=region_used,
+        )
+
+    async def worker(lines: asyncio.Queue) -> None:
+        while (item := await frontier.next()) is not None:
+            url, depth = item
+            try:
+                line = await crawl_page(url, depth)
+            except Exception as e:
+                logger.error(f"Unexpected error crawling URL {url}: {str(e)}")
+                line = CrawlPageResult(url=url, depth=depth, status="error", status_code=500, error="Internal error")
+            finally:
+                frontier.done(url)
+            await lines.put(line)
+
+    async def stream_pages():
+        lines: asyncio.Queue = asyncio.Queue()
+        workers = [asyncio.create_task(worker(lines)) for _ in range(min(settings.PROXY_CRAWL_CONCURRENCY, crawl.max_pages))]
+        finished = asyncio.gather(*workers)
+        finished.add_done_callback(lambda _: lines.put_nowait(None))  # end of crawl
+        crawl_activity["active_crawls"] += 1
+        pages = succeeded = 0
+        try:
+            while (line := await lines.get()) is not None:
+                pages += 1
+                if line.status == "ok":
+                    succeeded += 1
+                yield line.model_dump_json(exclude_none=True) + "\n"
+            finished.result()
+            summary = CrawlSummary(
+                pages=pages,
+                succeeded=succeeded,
+                duplicates=frontier.duplicates,
+                out_of_scope=frontier.out_of_scope,
+                over_budget=frontier.over_budget,
+            )
+            yield summary.model_dump_json() + "\n"
+        finally:
+            # Client disconnects stop the crawl; completed pages still count
+            finished.cancel()
+            crawl_activity["active_crawls"] -= 1
+            if succeeded:
+                token_requests.add(token_id, succeeded)
+            logger.info(f"Crawl for user {user.email}: {succeeded}/{pages} pages succeeded, {frontier.stats()}")
+
+    return hold_until_streamed(StreamingResponse(stream_pages(), media_type="application/x-ndjson"), admission)
+
+def serp_cache_key(engine: str, q: str, region: str, page: int = 1) -> str:
+    return f"{engine}|{region}|{page}|{' '.join(q.lower().split())}"
+
+async def fetch_serp_page(
+    engine: str,
+    q: str,
+    region: str,
+    user_agent: str,
+    page: int = 1,
+    use_cache: bool = False,
+    max_age: Optional[float] = None,
+) -> SerpResponse:
+    """
+    One parsed result page: from the SERP cache while fresh enough,
+    otherwise fetched through the proxies and parsed in the worker pool.
+    `cache_status` on the result tells the caller whether it went upstream.
+    """
+    engine_config = SUPPORTED_ENGINES[engine]
+    key = serp_cache_key(engine, q, region, page)
+    entry, _ = serp_cache.get(key)
+    if entry and entry.age <= (engine_config["freshness"] if max_age is None else max_age):
+        logger.info(f"SERP cache hit for query '{q}' via {engine} page {page} ({entry.age:.0f}s old)")
+        return entry.value.model_copy(update={"search_query": q, "cache_status": "hit"})
+
+    url = serp_url(engine, q, page)
+    if use_cache:
+        data, region_used, _ = await cached_fetch(url, region, user_agent)
+    else:
+        data, region_used = await fetch_through_proxies(url, region, user_agent)
+    try:
+        # Parsed in the worker pool; parsers return plain dicts
+        organic_results = [SerpResult(**r) for r in await parser_pool.run(engine_config["parser"], data.get("result", ""))]
+        if not organic_results:
+            logger.warning(f"Parser for '{engine}' found 0 results for query '{q}' page {page}. HTML may have changed.")
+        else:
+            logger.info(f"Successfully parsed {len(organic_results)} results for query '{q}' page {page}")
+    except Exception as e:
+        logger.error(f"Failed to parse SERP HTML for query '{q}': {e}")
+        raise HTTPException(status_code=500, detail="Failed to parse search engine response.")
+    response = SerpResponse(
+        search_engine=engine,
+        search_query=q,
+        region_used=region_used,
+        organic_results=organic_results,
+        cache_status="miss",
+        page=page,
+    )
+    # Empty result lists are usually a block page or changed markup; don't keep them
+    if organic_results:
+        serp_cache.set(key, response, size=len(response.model_dump_json()))
+    return response
 
 @router.get("/serp", response_model=SerpResponse)
 async def serp_fetch(
     request: Request,
-    session: SessionDep,
     q: str,
     region: str,
-    user: Annotated[User, Depends(verify_api_token)],
-    x_api_key: Annotated[str, Header()],
-    background_tasks: BackgroundTasks,
+    user: Annotated[ApiPrincipal, Depends(verify_api_token)],
     engine: str = "google",
+    cache: bool = False,
+    max_age: Annotated[Optional[float], Query(ge=0)] = None,
 ):
     """
     Fetches a search engine results page (SERP), parses it, and returns structured data.
+
+    Parsed results are cached per engine, region and query (case and
+    whitespace insensitive) and reused while they are younger than the
+    engine's freshness window. `max_age` (seconds) overrides the window:
+    raise it to accept older results, or pass 0 to force a fresh fetch.
+
+    Requests are subject to the caller's rate and concurrency limits; over
+    either, the response is 429 with `Retry-After`.
     """
     logger.debug(f"SERP request for query '{q}' via {engine} in {region} for user {user.email}")
     if engine not in SUPPORTED_ENGINES:
@@ -434,34 +1939,101 @@ async def serp_fetch(
             status_code=400,
             detail=f"Unsupported engine '{engine}'. Supported: {list(SUPPORTED_ENGINES.keys())}",
         )
-    engine_config = SUPPORTED_ENGINES[engine]
-    search_url = engine_config["base_url"].format(query=quote_plus(q))
-    proxy_request = ProxyRequest(url=search_url)
+    if region not in endpoint_manager.endpoints:
+        raise HTTPException(status_code=400, detail="Invalid region. Use /regions to list available regions")
+
+    user_agent = request.headers.get("user-agent", DEFAULT_USER_AGENT)
+    admission = await admit(user)
     try:
-        proxy_response = await proxy_fetch_logic(
-            request=request, session=session, region=region,
-            proxy_request=proxy_request, user=user, x_api_key=x_api_key, background_tasks=background_tasks
-        )
+        response = await fetch_serp_page(engine, q, region, user_agent, use_cache=cache, max_age=max_age)
     except HTTPException as e:
-        logger.error(f"Proxy fetch logic failed during SERP request: {e.detail}")
+        logger.error(f"SERP request failed for query '{q}' via {engine}: {e.detail}")
         raise e
-    html_content = proxy_response.result
-    parser_func = engine_config["parser"]
+    finally:
+        await admission.release()
+    if response.cache_status == "miss":
+        schedule_screenshot(serp_url(engine, q), user_agent)
+    token_requests.add(user.token_id)
+    return response
+
+@router.post("/serp/fanout", response_model=SerpFanoutResponse)
+async def serp_fanout(
+    request: Request,
+    region: str,
+    fanout: SerpFanoutRequest,
+    user: Annotated[ApiPrincipal, Depends(verify_api_token)],
+    max_age: Annotated[Optional[float], Query(ge=0)] = None,
+):
+    """
+    Runs one query against several engines and result pages at once.
+
+    Every (engine, page) is fetched concurrently, sharing the per-user
+    concurrency limit of /fetch/batch, and parsed in the worker pool, so
+    the call takes about as long as the slowest page. Results are merged
+    per engine in page order, numbered across pages, with repeated links
+    dropped. A failed page is reported in that engine's `errors` without
+    failing the rest. Each page counts as one request, cache hits included,
+    and draws on the caller's rate limit like /fetch/batch URLs do.
+    """
+    logger.debug(f"SERP fan-out for query '{fanout.q}' in {region} for user {user.email}")
+    if region not in endpoint_manager.endpoints:
+        raise HTTPException(status_code=400, detail="Invalid region. Use /regions to list available regions")
+    if not fanout.engines:
+        raise HTTPException(status_code=400, detail="At least one engine is required")
+    for item in fanout.engines:
+        if item.engine not in SUPPORTED_ENGINES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported engine '{item.engine}'. Supported: {list(SUPPORTED_ENGINES.keys())}",
+            )
+        if not 1 <= item.pages <= settings.SERP_FANOUT_MAX_PAGES:
+            raise HTTPException(status_code=400, detail=f"pages must be between 1 and {settings.SERP_FANOUT_MAX_PAGES}")
+
+    user_agent = request.headers.get("user-agent", DEFAULT_USER_AGENT)
+    semaphore = _batch_semaphore(user.id)
+    jobs = [(item.engine, page) for item in fanout.engines for page in range(1, item.pages + 1)]
+
+    async def fetch_one(engine: str, page: int):
+        async with semaphore:
+            await pace(user)
+            try:
+                return await fetch_serp_page(engine, fanout.q, region, user_agent, page=page, max_age=max_age)
+            except HTTPException as e:
+                return f"page {page}: {e.detail}"
+            except Exception as e:
+                logger.error(f"Unexpected error in SERP fan-out for {engine} page {page}: {str(e)}")
+                return f"page {page}: Internal error"
+
+    admission = await admit(user)
     try:
-        organic_results = parser_func(html_content)
-        if not organic_results:
-            logger.warning(f"Parser for '{engine}' found 0 results for query '{q}'. HTML may have changed.")
-        else:
-            logger.info(f"Successfully parsed {len(organic_results)} results for query '{q}'")
-    except Exception as e:
-        logger.error(f"Failed to parse SERP HTML for query '{q}': {e}")
-        raise HTTPException(status_code=500, detail="Failed to parse search engine response.")
-    return SerpResponse(
-        search_engine=engine,
-        search_query=q,
-        region_used=proxy_response.region_used,
-        organic_results=organic_results,
-    )
+        pages = await asyncio.gather(*(fetch_one(engine, page) for engine, page in jobs))
+    finally:
+        await admission.release()
+
+    merged: Dict[str, SerpEngineResults] = {}
+    for (search_engine, _page), result in zip(jobs, pages, strict=True):
+        engine_results = merged.setdefault(
+            search_engine, SerpEngineResults(search_engine=search_engine, pages_fetched=0, organic_results=[])
+        )
+        if isinstance(result, str):
+            engine_results.errors.append(result)
+            continue
+        engine_results.pages_fetched += 1
+        engine_results.region_used = engine_results.region_used or result.region_used
+        seen = {r.link for r in engine_results.organic_results}
+        for r in result.organic_results:
+            if r.link not in seen:
+                seen.add(r.link)
+                engine_results.organic_results.append(
+                    r.model_copy(update={"position": len(engine_results.organic_results) + 1})
+                )
+
+    succeeded = sum(1 for result in pages if not isinstance(result, str))
+    if not succeeded:
+        raise HTTPException(status_code=503, detail="All SERP fetches failed")
+    token_requests.add(user.token_id, succeeded)
+    logger.info(f"SERP fan-out for user {user.email}: {succeeded}/{len(jobs)} pages succeeded")
+    return SerpFanoutResponse(search_query=fanout.q, engines=merged)
 
 FRONT_PREVIEW_LENGTH = 8
 END_PREVIEW_LENGTH = 8
@@ -479,7 +2051,7 @@ async def list_user_api_keys(session: SessionDep, current_user: CurrentUser):
             created_at=token.created_at.isoformat(),
             expires_at=token.expires_at.isoformat(),
             is_active=token.is_active,
-            request_count=token.request_count
+            request_count=token.request_count + token_requests.pending(token.id)
         )
         for token in api_tokens
     ]
@@ -503,10 +2075,11 @@ async def delete_api_key(
     if not token:
         logger.info(f"API key deletion attempted but not found. User: {current_user.id}, Preview: {key_preview}")
         raise HTTPException(status_code=404, detail="API key not found")
-    if token.request_count > 0:
+    request_count = token.request_count + token_requests.pending(token.id)
+    if request_count > 0:
         raise HTTPException(
             status_code=409,
-            detail=f"Cannot delete API key with {token.request_count} logged requests. Disable it instead.",
+            detail=f"Cannot delete API key with {request_count} logged requests. Disable it instead.",
         )
     token_data = {
         "token_preview": f"{token.token[:FRONT_PREVIEW_LENGTH]}...{token.token[-END_PREVIEW_LENGTH:]}",
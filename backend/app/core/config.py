@@ -123,6 +123,145 @@ class Settings(BaseSettings):
     # Cloudflare D1 dispute-worker
     DISPUTE_WORKER_URL: str = ""
 
+    # Proxy endpoints: a JSON file (see app/services/endpoint_registry.py)
+    # re-read when it changes; the built-in list is used when unset
+    PROXY_ENDPOINTS_FILE: str | None = None
+    PROXY_ENDPOINTS_RELOAD_INTERVAL: float = 10.0
+
+    # Proxy endpoint health monitor
+    PROXY_HEALTH_CHECK_INTERVAL: float = 15.0
+    PROXY_HEALTH_FAILURE_THRESHOLD: int = 2
+
+    # Hedged /proxy/fetch requests: hedges are capped at this fraction of
+    # requests, and fire after the region's p90 latency (or the default
+    # delay until enough samples exist)
+    PROXY_HEDGE_BUDGET_RATIO: float = 0.1
+    PROXY_HEDGE_DEFAULT_DELAY: float = 2.0
+
+    # Per-endpoint circuit breakers
+    PROXY_BREAKER_ERROR_RATE: float = 0.5
+    PROXY_BREAKER_MIN_REQUESTS: int = 10
+    PROXY_BREAKER_WINDOW_SECONDS: float = 60.0
+    PROXY_BREAKER_CONSECUTIVE_TIMEOUTS: int = 3
+    PROXY_BREAKER_OPEN_SECONDS: float = 30.0
+
+    # Retries of failed upstream calls (proxy endpoints, inference
+    # providers) are capped at this fraction of calls
+    RETRY_BUDGET_RATIO: float = 0.1
+    # Attempts per proxy endpoint, with jittered backoff between these bounds
+    PROXY_RETRY_MAX_ATTEMPTS: int = 3
+    PROXY_RETRY_BASE_DELAY: float = 0.25
+    PROXY_RETRY_MAX_DELAY: float = 4.0
+
+    # Adaptive upstream timeouts: p99 of an upstream's recent latencies
+    # times the multiplier, clamped; the clients' fixed timeouts apply
+    # until enough samples exist
+    ADAPTIVE_TIMEOUT_MULTIPLIER: float = 1.5
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES: int = 50
+    PROXY_FETCH_TIMEOUT_MIN: float = 3.0
+    PROXY_FETCH_TIMEOUT_MAX: float = 30.0
+    # Target hosts whose fetch latencies are tracked (least recent dropped)
+    PROXY_FETCH_TIMEOUT_MAX_HOSTS: int = 10000
+
+    # Screenshot queue: fixed workers, bounded backlog (extra jobs are
+    # shed), and a URL is screenshotted at most once per dedupe window
+    SCREENSHOT_WORKERS: int = 4
+    SCREENSHOT_QUEUE_SIZE: int = 200
+    SCREENSHOT_DEDUPE_SECONDS: float = 300.0
+
+    # Per-user admission control for /proxy/fetch, /proxy/serp and the batch
+    # endpoints, by tier: sustained requests per second, burst size and
+    # concurrent requests. State is per process unless ADMISSION_STORAGE_URI
+    # names a shared `limits` store (e.g. "async+redis://redis:6379/0")
+    ADMISSION_LIMITS: dict[str, dict[str, float]] = {
+        "trial": {"rate": 2.0, "burst": 10, "max_in_flight": 4},
+        "subscription": {"rate": 20.0, "burst": 60, "max_in_flight": 32},
+    }
+    ADMISSION_STORAGE_URI: str | None = None
+
+    # Resolved X-API-Key principals (user, token, subscription state)
+    API_KEY_CACHE_TTL_SECONDS: float = 60.0
+    API_KEY_CACHE_MAX_ENTRIES: int = 10000
+
+    # API token request counts are written to the database this often
+    TOKEN_REQUEST_FLUSH_INTERVAL: float = 5.0
+
+    # Concurrent fetches per target host (AIMD): the limit grows by about
+    # one per round of successful fetches and is multiplied by the backoff
+    # on a 403, 429 or timeout. Fetches (buffered and streamed) over the
+    # limit wait this long for a slot; a wait that runs out counts as a
+    # failed attempt on that endpoint
+    PROXY_TARGET_CONCURRENCY_INITIAL: int = 8
+    PROXY_TARGET_CONCURRENCY_MIN: int = 1
+    PROXY_TARGET_CONCURRENCY_MAX: int = 64
+    PROXY_TARGET_BACKOFF: float = 0.5
+    PROXY_TARGET_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # POST /proxy/fetch/batch
+    PROXY_BATCH_MAX_URLS: int = 1000
+    PROXY_BATCH_CONCURRENCY_PER_USER: int = 10
+
+    # POST /proxy/jobs: fetches run on a fixed pool of workers behind a
+    # bounded queue. Jobs and their results are stored in the database (so
+    # any API worker can answer a poll) and kept for the TTL; a compressed
+    # result larger than PROXY_JOB_RESULT_MAX_BYTES fails the job (use
+    # offload). Long polls re-read a job at the poll interval
+    PROXY_JOB_WORKERS: int = 50
+    PROXY_JOB_CALLBACK_WORKERS: int = 8
+    PROXY_JOB_QUEUE_SIZE: int = 10000
+    PROXY_JOB_MAX_PENDING_PER_USER: int = 1000
+    PROXY_JOB_TTL_SECONDS: float = 3600.0
+    PROXY_JOB_RESULT_MAX_BYTES: int = 16 * 1024 * 1024
+    PROXY_JOB_MAX_WAIT_SECONDS: float = 30.0
+    PROXY_JOB_POLL_INTERVAL_SECONDS: float = 0.5
+
+    # POST /proxy/crawl: per-crawl limits, fetch concurrency per crawl and
+    # across all crawls on the worker, and politeness towards each target
+    # host (concurrent fetches, seconds between fetch starts)
+    PROXY_CRAWL_MAX_PAGES: int = 1000
+    PROXY_CRAWL_MAX_DEPTH: int = 5
+    PROXY_CRAWL_MAX_SEEDS: int = 100
+    PROXY_CRAWL_CONCURRENCY: int = 16
+    PROXY_CRAWL_GLOBAL_CONCURRENCY: int = 200
+    PROXY_CRAWL_HOST_CONCURRENCY: int = 2
+    PROXY_CRAWL_HOST_DELAY_SECONDS: float = 0.5
+
+    # offload=true on /proxy/fetch, /proxy/fetch/batch and /proxy/jobs: pages
+    # of at least PROXY_OFFLOAD_MIN_BYTES are uploaded (gzipped) to this
+    # bucket and returned as a presigned URL. Expire the objects with a
+    # bucket lifecycle rule
+    PROXY_OFFLOAD_BUCKET: str | None = None
+    PROXY_OFFLOAD_STORAGE_BACKEND: str = "minio"  # "minio" or "aws-s3"
+    PROXY_OFFLOAD_MIN_BYTES: int = 256 * 1024
+    PROXY_OFFLOAD_URL_EXPIRY_SECONDS: int = 3600
+
+    # Opt-in response cache for /proxy/fetch and /proxy/serp
+    PROXY_CACHE_TTL_SECONDS: float = 300.0
+    PROXY_CACHE_STALE_SECONDS: float = 3600.0
+    PROXY_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    # Cached pages are stored compressed with this encoding (gzip, br or
+    # zstd; gzip if the codec is not installed)
+    PROXY_CACHE_ENCODING: str = "gzip"
+
+    # Parsed /proxy/serp results. Freshness is set per engine in
+    # SUPPORTED_ENGINES; entries are kept this long so callers can opt into
+    # older results with max_age
+    SERP_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    SERP_CACHE_RETENTION_SECONDS: float = 6 * 3600.0
+
+    # POST /proxy/serp/fanout: result pages per engine
+    SERP_FANOUT_MAX_PAGES: int = 5
+
+    # Worker processes for HTML parsing (SERP pages); 0 parses inline
+    PARSER_POOL_WORKERS: int = 2
+
+    # Responses smaller than this are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    # Streamed /proxy/fetch (stream=true): upstream bodies larger than this
+    # are rejected up front (Content-Length) or cut off mid-stream
+    PROXY_STREAM_MAX_BYTES: int = 50 * 1024 * 1024
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
@@ -0,0 +1,152 @@
+"""
+Shared, pooled HTTP clients for outbound calls.
+
+Each upstream family gets one named client with its own pool limits and
+timeouts, so connections (and TLS sessions) are reused across requests
+instead of being re-established per call. Clients are opened on app
+startup and closed on shutdown; `get()` also creates them lazily so code
+running outside the app lifecycle (scripts, workers) keeps working.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # httpx[http2] extra not installed
+    HTTP2_AVAILABLE = False
+
+
+@dataclass
+class ClientConfig:
+    timeout: float
+    connect_timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class HTTPClientRegistry:
+    """Named httpx clients, one pool per upstream family."""
+
+    def __init__(self) -> None:
+        self._configs: Dict[str, ClientConfig] = {}
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._sync_clients: Dict[str, httpx.Client] = {}
+
+    def register(self, name: str, config: ClientConfig) -> None:
+        self._configs[name] = config
+
+    def _client_kwargs(self, name: str) -> Dict[str, Any]:
+        config = self._configs.get(name)
+        if config is None:
+            raise KeyError(f"No HTTP client registered under '{name}'")
+        return {
+            "timeout": httpx.Timeout(config.timeout, connect=config.connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            "headers": config.headers,
+            "http2": config.http2 and HTTP2_AVAILABLE,
+        }
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._async_clients.get(name)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**self._client_kwargs(name))
+            self._async_clients[name] = client
+        return client
+
+    def get_sync(self, name: str) -> httpx.Client:
+        client = self._sync_clients.get(name)
+        if client is None or client.is_closed:
+            client = httpx.Client(**self._client_kwargs(name))
+            self._sync_clients[name] = client
+        return client
+
+    def config(self, name: str) -> Optional[ClientConfig]:
+        return self._configs.get(name)
+
+    async def start(self) -> None:
+        for name in self._configs:
+            self.get(name)
+        logger.info(
+            f"Opened {len(self._async_clients)} pooled HTTP clients (http2: {HTTP2_AVAILABLE})"
+        )
+
+    async def aclose(self) -> None:
+        for name, async_client in list(self._async_clients.items()):
+            try:
+                await async_client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client '{name}': {e}")
+        for name, sync_client in list(self._sync_clients.items()):
+            try:
+                sync_client.close()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client '{name}': {e}")
+        self._async_clients.clear()
+        self._sync_clients.clear()
+        logger.info("Closed pooled HTTP clients")
+
+
+http_clients = HTTPClientRegistry()
+
+# Regional Cloud Functions: /fetch and /health. Many concurrent requests to
+# a small set of hosts, so keep a large keep-alive pool.
+http_clients.register(
+    "proxy",
+    ClientConfig(
+        timeout=15.0,
+        max_connections=200,
+        max_keepalive_connections=100,
+        http2=True,
+    ),
+)
+# Autoparse screenshot service (Cloud Run)
+http_clients.register(
+    "screenshot",
+    ClientConfig(
+        timeout=30.0,
+        max_connections=20,
+        max_keepalive_connections=10,
+        http2=True,
+    ),
+)
+# LLM providers used by /inference
+http_clients.register(
+    "openai", ClientConfig(timeout=60.0, max_connections=50, http2=True)
+)
+http_clients.register(
+    "anthropic", ClientConfig(timeout=60.0, max_connections=50, http2=True)
+)
+http_clients.register(
+    "huggingface", ClientConfig(timeout=60.0, max_connections=20, http2=True)
+)
+# Customer callback URLs for finished /proxy/jobs. No keep-alive: requests
+# are pinned to checked addresses (see webhook_guard), and a pooled
+# connection must not be reused for a different callback host
+http_clients.register(
+    "webhook",
+    ClientConfig(timeout=10.0, max_connections=50, max_keepalive_connections=0),
+)
+# Cloudflare dispute-worker (sync client, called from threadpool routes)
+http_clients.register(
+    "dispute_worker",
+    ClientConfig(
+        timeout=15.0,
+        max_connections=10,
+        max_keepalive_connections=5,
+    ),
+)
@@ -12,8 +12,19 @@ from starlette.middleware.cors import CORSMiddleware
 from sqlmodel import Session, select
 
 from app.api.main import api_router
+from app.api.routes.proxy import (
+    endpoint_registry,
+    fetch_jobs,
+    health_monitor,
+    job_callbacks,
+    screenshot_queue,
+    token_requests,
+)
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
 from app.core.db import engine
+from app.core.http import http_clients
+from app.services.parser_pool import parser_pool
 from app.models import InferenceModel, LLMModel, LLMProvider, RemoteServer, DatabaseInstance, User
 
 logger = logging.getLogger(__name__)
@@ -77,9 +88,37 @@ elif settings.all_cors_origins:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+
+# Outermost, so error responses and CORS-decorated responses are compressed too
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 
+@app.on_event("startup")
+async def start_background_services():
+    """Open shared HTTP clients and start long-lived in-process services."""
+    await http_clients.start()
+    await endpoint_registry.start()
+    await health_monitor.start()
+    await token_requests.start()
+    await screenshot_queue.start()
+    await fetch_jobs.start()
+    await job_callbacks.start()
+    parser_pool.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await health_monitor.stop()
+    await endpoint_registry.stop()
+    await screenshot_queue.stop()
+    await fetch_jobs.stop()
+    await job_callbacks.stop()
+    await token_requests.stop()
+    await http_clients.aclose()
+    parser_pool.shutdown()
+
+
 @app.on_event("startup")
 def ensure_tables_and_seed():
     """Create missing tables and seed default data on startup."""
@@ -1,7 +1,7 @@
 import uuid
 from typing import Optional
 from pydantic import EmailStr, ConfigDict
-from sqlmodel import Field, Relationship, SQLModel, Column, JSON
+from sqlmodel import Field, Relationship, SQLModel, Column, JSON, LargeBinary
 from datetime import datetime
 
 # Shared properties
@@ -782,4 +782,25 @@ class ApiRequestLog(SQLModel, table=True):
     user_agent: Optional[str] = Field(default=None, max_length=255)
     endpoint: Optional[str] = Field(default=None, max_length=255)
     status_code: Optional[int] = Field(default=None)
-    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
\ No newline at end of file
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+# ============================================================================
+# PROXY FETCH JOBS
+# ============================================================================
+
+class ProxyJob(SQLModel, table=True):
+    """Async /proxy/jobs fetches. Shared by all API workers, so any worker
+    can answer a poll for a job that another worker runs."""
+    __tablename__ = "proxy_job"
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", nullable=False, index=True, ondelete="CASCADE")
+    status: str = Field(default="queued", max_length=20, index=True)  # queued, running, succeeded, failed
+    spec: dict = Field(default_factory=dict, sa_column=Column(JSON))  # what to fetch, as submitted
+    result_meta: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    result: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))  # compressed page
+    status_code: Optional[int] = Field(default=None)
+    error: Optional[str] = Field(default=None, max_length=1024)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    started_at: Optional[datetime] = Field(default=None)
+    finished_at: Optional[datetime] = Field(default=None)
@@ -0,0 +1,148 @@
+"""
+Per-upstream timeouts derived from observed latency.
+
+Each key (a target host, a health-checked endpoint, a model) keeps a
+`LatencySketch` of its recent successful call latencies. Its timeout is
+the sketch's p99 times a multiplier, clamped to [minimum, maximum]; until
+`min_samples` calls have been seen the fixed `fallback` applies. A call
+that hangs on a normally fast key is therefore given up on after a few
+seconds, while a key that is legitimately slow keeps a long timeout.
+With `max_keys` set, the least recently observed key is forgotten once
+that many are tracked.
+
+A call that times out is recorded at the timeout it was given, so if an
+upstream gets slower across the board its p99 (and timeout) climbs to
+follow instead of every call being cut off at the old value.
+"""
+
+import math
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+
+class LatencySketch:
+    """
+    Log-bucketed latency histogram (as in DDSketch). Quantiles are within
+    `relative_accuracy` of the true value, and memory grows with the log
+    of the latency range, not the number of samples. When the total count
+    passes `max_count` every bucket is halved, so older samples fade out.
+    """
+
+    MIN_VALUE = 1e-4
+
+    def __init__(self, relative_accuracy: float = 0.02, max_count: float = 1000.0):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_count = max_count
+        self.buckets: Dict[int, float] = {}
+        self.count = 0.0
+
+    def add(self, value: float) -> None:
+        index = math.ceil(math.log(max(value, self.MIN_VALUE)) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0.0) + 1.0
+        self.count += 1.0
+        if self.count > self.max_count:
+            self._decay()
+
+    def _decay(self) -> None:
+        self.buckets = {i: c / 2 for i, c in self.buckets.items() if c >= 0.02}
+        self.count = sum(self.buckets.values())
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i]
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class AdaptiveTimeouts:
+    def __init__(
+        self,
+        fallback: float,
+        minimum: float,
+        maximum: float,
+        multiplier: float = 1.5,
+        quantile: float = 0.99,
+        min_samples: int = 50,
+        max_keys: Optional[int] = None,
+    ):
+        self.fallback = fallback
+        self.minimum = minimum
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.max_keys = max_keys
+        self._sketches: Dict[Hashable, LatencySketch] = {}
+        self._samples: Dict[Hashable, int] = {}
+        self._timeouts: Dict[Hashable, float] = {}
+        self.timeouts_hit = 0
+
+    def timeout(self, key: Hashable) -> float:
+        if key not in self._samples:
+            return self.fallback  # not cached, so unseen keys take no memory
+        timeout = self._timeouts.get(key)
+        if timeout is None:
+            timeout = self._timeouts[key] = self._compute(key)
+        return timeout
+
+    def _compute(self, key: Hashable) -> float:
+        sketch = self._sketches.get(key)
+        if sketch is None or self._samples.get(key, 0) < self.min_samples:
+            return self.fallback
+        latency = sketch.quantile(self.quantile)
+        if latency is None:
+            return self.fallback
+        return min(self.maximum, max(self.minimum, latency * self.multiplier))
+
+    def observe(self, key: Hashable, latency: float) -> None:
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = self._sketches[key] = LatencySketch()
+        sketch.add(latency)
+        # Re-inserting keeps _samples ordered from least to most recently observed
+        self._samples[key] = self._samples.pop(key, 0) + 1
+        self._timeouts.pop(key, None)
+        if self.max_keys is not None and len(self._samples) > self.max_keys:
+            oldest = next(iter(self._samples))
+            del self._samples[oldest]
+            self._sketches.pop(oldest, None)
+            self._timeouts.pop(oldest, None)
+
+    def observe_timeout(self, key: Hashable, timeout: float) -> None:
+        self.timeouts_hit += 1
+        self.observe(key, timeout)
+
+    async def run(self, key: Hashable, fn: Callable[[float], Awaitable[T]]) -> T:
+        """Call `fn(timeout)` with the key's current timeout and record how long it took."""
+        timeout = self.timeout(key)
+        started = time.monotonic()
+        try:
+            result = await fn(timeout)
+        except httpx.TimeoutException:
+            self.observe_timeout(key, timeout)
+            raise
+        self.observe(key, time.monotonic() - started)
+        return result
+
+    def stats(self, top: int = 50) -> dict:
+        """Totals, plus the timeouts of the `top` keys with the most samples."""
+        busiest = sorted(self._samples.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "timeouts_hit": self.timeouts_hit,
+            "keys": len(self._samples),
+            "timeouts": {
+                str(key): {"timeout": round(self.timeout(key), 3), "samples": samples}
+                for key, samples in busiest[:top]
+            },
+        }
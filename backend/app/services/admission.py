@@ -0,0 +1,215 @@
+"""
+Per-key admission control: a token bucket plus a max-in-flight limit.
+
+`acquire()` admits a request if the key has a token left and fewer than
+`max_in_flight` requests running; otherwise it says why not and how long
+to wait. Admitted requests must `release()` their slot when done. Work
+inside an admitted call (URLs of a batch, pages of a fan-out) draws from
+the same bucket with `pace()`, which waits for tokens instead of failing;
+callers should pace from inside their own concurrency limit so the debt a
+single request can reserve stays bounded.
+
+Limits are set per tier. State lives in this process by default. With a
+`storage_uri` (any async `limits` storage, e.g. "async+redis://host:6379"),
+the rate is shared between workers as a moving window of `burst` requests
+per `burst / rate` seconds, and in-flight counts are shared counters that
+expire after `in_flight_expiry` seconds in case a worker dies holding
+slots.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+from limits import RateLimitItemPerSecond
+from limits.aio.strategies import MovingWindowRateLimiter
+from limits.storage import storage_from_string
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = "Rate limit exceeded"
+TOO_MANY_IN_FLIGHT = "Too many concurrent requests"
+
+
+@dataclass(frozen=True)
+class TierLimits:
+    rate: float  # sustained requests per second
+    burst: int  # bucket size: requests allowed back to back
+    max_in_flight: int  # concurrent requests
+
+
+@dataclass
+class Admission:
+    allowed: bool
+    retry_after: float = 0.0  # seconds; set when rejected
+    reason: str = ""
+    _release: Optional[Callable[[], Awaitable[None]]] = field(default=None, repr=False)
+
+    async def release(self) -> None:
+        """Give back the in-flight slot. Safe to call more than once."""
+        release, self._release = self._release, None
+        if release is not None:
+            await release()
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst: int, now: float):
+        self.tokens = float(burst)
+        self.updated = now
+
+    def refill(self, limits: TierLimits, now: float) -> None:
+        self.tokens = min(
+            float(limits.burst), self.tokens + (now - self.updated) * limits.rate
+        )
+        self.updated = now
+
+
+class AdmissionController:
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        tiers: Dict[str, TierLimits],
+        storage_uri: Optional[str] = None,
+        in_flight_expiry: float = 600.0,
+    ):
+        self.tiers = tiers
+        self.in_flight_expiry = in_flight_expiry
+        self._buckets: Dict[str, _Bucket] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._next_prune = time.monotonic() + self.PRUNE_INTERVAL
+        self._storage = storage_from_string(storage_uri) if storage_uri else None
+        self._limiter = (
+            MovingWindowRateLimiter(self._storage)
+            if self._storage is not None
+            else None
+        )
+        self.admitted = 0
+        self.rejected_rate = 0
+        self.rejected_concurrency = 0
+
+    async def acquire(self, key: str, tier: str) -> Admission:
+        limits = self.tiers[tier]
+        if self._storage is not None:
+            admission = await self._acquire_shared(key, limits)
+        else:
+            admission = self._acquire_local(key, limits)
+        if admission.allowed:
+            self.admitted += 1
+        elif admission.reason == RATE_LIMITED:
+            self.rejected_rate += 1
+        else:
+            self.rejected_concurrency += 1
+        return admission
+
+    async def pace(self, key: str, tier: str, cost: int = 1) -> None:
+        """
+        Take `cost` tokens, sleeping until the bucket can cover them. A caller
+        cancelled while waiting gets its reserved tokens back.
+        """
+        limits = self.tiers[tier]
+        if self._storage is not None:
+            item = self._window(limits)
+            while not await self._limiter.hit(item, "admission", key, cost=cost):
+                stats = await self._limiter.get_window_stats(item, "admission", key)
+                await asyncio.sleep(max(stats.reset_time - time.time(), 0.05))
+            return
+        now = time.monotonic()
+        bucket = self._bucket(key, limits, now)
+        # Reserve now and wait off the debt, so concurrent callers queue in order
+        bucket.tokens -= cost
+        if bucket.tokens < 0:
+            try:
+                await asyncio.sleep(-bucket.tokens / limits.rate)
+            except asyncio.CancelledError:
+                bucket = self._bucket(key, limits, time.monotonic())
+                bucket.tokens = min(float(limits.burst), bucket.tokens + cost)
+                raise
+
+    def _acquire_local(self, key: str, limits: TierLimits) -> Admission:
+        now = time.monotonic()
+        if now >= self._next_prune:
+            self._prune(now)
+        in_flight = self._in_flight.get(key, 0)
+        if in_flight >= limits.max_in_flight:
+            return Admission(False, retry_after=1.0, reason=TOO_MANY_IN_FLIGHT)
+        bucket = self._bucket(key, limits, now)
+        if bucket.tokens < 1:
+            return Admission(
+                False,
+                retry_after=(1 - bucket.tokens) / limits.rate,
+                reason=RATE_LIMITED,
+            )
+        bucket.tokens -= 1
+        self._in_flight[key] = in_flight + 1
+        return Admission(True, _release=lambda: self._release_local(key))
+
+    async def _release_local(self, key: str) -> None:
+        remaining = self._in_flight.get(key, 0) - 1
+        if remaining > 0:
+            self._in_flight[key] = remaining
+        else:
+            self._in_flight.pop(key, None)
+
+    async def _acquire_shared(self, key: str, limits: TierLimits) -> Admission:
+        counter = f"admission:in_flight:{key}"
+        if (
+            await self._storage.incr(counter, self.in_flight_expiry)
+            > limits.max_in_flight
+        ):
+            await self._storage.decr(counter)
+            return Admission(False, retry_after=1.0, reason=TOO_MANY_IN_FLIGHT)
+        item = self._window(limits)
+        if not await self._limiter.hit(item, "admission", key):
+            await self._storage.decr(counter)
+            stats = await self._limiter.get_window_stats(item, "admission", key)
+            return Admission(
+                False,
+                retry_after=max(stats.reset_time - time.time(), 0.0),
+                reason=RATE_LIMITED,
+            )
+
+        async def release() -> None:
+            await self._storage.decr(counter)
+
+        return Admission(True, _release=release)
+
+    def _bucket(self, key: str, limits: TierLimits, now: float) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(limits.burst, now)
+        else:
+            bucket.refill(limits, now)
+        return bucket
+
+    @staticmethod
+    def _window(limits: TierLimits) -> RateLimitItemPerSecond:
+        return RateLimitItemPerSecond(
+            limits.burst, max(1, round(limits.burst / limits.rate))
+        )
+
+    def _prune(self, now: float) -> None:
+        """Forget idle keys whose bucket has refilled (a new bucket starts full)."""
+        self._next_prune = now + self.PRUNE_INTERVAL
+        burst = max((t.burst for t in self.tiers.values()), default=0)
+        rate = min((t.rate for t in self.tiers.values()), default=1.0)
+        self._buckets = {
+            key: bucket
+            for key, bucket in self._buckets.items()
+            if key in self._in_flight
+            or bucket.tokens + (now - bucket.updated) * rate < burst
+        }
+
+    def stats(self) -> dict:
+        return {
+            "backend": "shared" if self._storage is not None else "memory",
+            "tracked_keys": len(self._buckets),
+            "in_flight": sum(self._in_flight.values()),
+            "admitted": self.admitted,
+            "rejected_rate": self.rejected_rate,
+            "rejected_concurrency": self.rejected_concurrency,
+        }
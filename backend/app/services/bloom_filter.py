@@ -0,0 +1,52 @@
+"""
+Bloom filter for "have we seen this key" checks over many keys.
+
+Sized up front from the expected number of keys and the acceptable
+false-positive rate (about 1.8 KB per 1,000 keys at 0.1%), it never
+stores the keys themselves. A false positive makes a new key look seen;
+there are no false negatives. Positions come from one blake2b digest per
+key, split into two 64-bit hashes and combined (Kirsch-Mitzenmacher).
+"""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """Add `key`; returns False if it was (probably) already present."""
+        new = False
+        for p in self._positions(key):
+            mask = 1 << (p & 7)
+            if not self._bits[p >> 3] & mask:
+                self._bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def stats(self) -> dict:
+        return {
+            "keys": self.count,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "bytes": len(self._bits),
+        }
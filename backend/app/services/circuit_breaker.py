@@ -0,0 +1,157 @@
+"""
+Circuit breakers for upstream endpoints.
+
+A breaker starts closed. It opens when the failure rate over a rolling
+window crosses a threshold (once enough requests were seen) or after a run
+of consecutive timeouts. While open, callers skip the endpoint without
+waiting. After a cooldown it turns half-open and lets exactly one probe
+through: success closes it again, failure re-opens it.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        error_rate_threshold: float = 0.5,
+        min_requests: int = 10,
+        window_seconds: float = 60.0,
+        consecutive_timeouts: int = 3,
+        open_seconds: float = 30.0,
+    ):
+        self.name = name
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.window_seconds = window_seconds
+        self.consecutive_timeouts_threshold = consecutive_timeouts
+        self.open_seconds = open_seconds
+
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.consecutive_timeouts = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    # ── queries ──────────────────────────────────────────────────────────
+
+    def _refresh(self, now: float) -> None:
+        if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info(f"Circuit {self.name} half-open, allowing a probe")
+
+    def is_available(self) -> bool:
+        """True if a request could be sent now (does not reserve the probe)."""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self.state == CLOSED:
+                return True
+            return self.state == HALF_OPEN and not self._probe_in_flight
+
+    def allow_request(self) -> bool:
+        """Reserve permission to send one request; claims the probe when half-open."""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def error_rate(self) -> float:
+        with self._lock:
+            self._trim(time.monotonic())
+            if not self._outcomes:
+                return 0.0
+            return sum(1 for _, ok in self._outcomes if not ok) / len(self._outcomes)
+
+    # ── outcomes ─────────────────────────────────────────────────────────
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now: float, reason: str) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self._probe_in_flight = False
+        logger.warning(f"Circuit {self.name} opened: {reason}")
+
+    def record_success(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.consecutive_timeouts = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self._outcomes.clear()
+                self._probe_in_flight = False
+                logger.info(f"Circuit {self.name} closed after successful probe")
+                return
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self, timeout: bool = False) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.consecutive_timeouts = self.consecutive_timeouts + 1 if timeout else 0
+            if self.state == HALF_OPEN:
+                self._open(now, "probe failed")
+                return
+            if self.state == OPEN:
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+            if self.consecutive_timeouts >= self.consecutive_timeouts_threshold:
+                self._open(now, f"{self.consecutive_timeouts} consecutive timeouts")
+                return
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if (
+                total >= self.min_requests
+                and failures / total >= self.error_rate_threshold
+            ):
+                self._open(
+                    now, f"error rate {failures}/{total} in {self.window_seconds:.0f}s"
+                )
+
+    def release(self) -> None:
+        """Give back a half-open probe that was abandoned (e.g. cancelled)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class CircuitBreakerRegistry:
+    """Lazily creates one breaker per key with shared settings."""
+
+    def __init__(self, **breaker_kwargs):
+        self._breaker_kwargs = breaker_kwargs
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, key: str) -> CircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers.setdefault(
+                key, CircuitBreaker(key, **self._breaker_kwargs)
+            )
+        return breaker
+
+    def state(self, key: str) -> str:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            return CLOSED
+        breaker.is_available()  # advance open -> half-open if the cooldown elapsed
+        return breaker.state
@@ -0,0 +1,167 @@
+"""
+URL frontier for server-side crawls.
+
+The frontier decides what a crawl fetches next. URLs are normalized,
+checked against the crawl's scope and depth, and deduplicated with a
+Bloom filter before they are queued. At most `max_pages` URLs are ever
+admitted, so the filter is sized for exactly that and memory per crawl
+stays small however many links the pages contain.
+
+Queued URLs wait in per-host FIFO queues. `next()` hands out a URL from
+the host whose politeness window opens first: a host is fetched at most
+`host_concurrency` at a time, with `host_delay` seconds between starts.
+Many workers can await `next()` at once; it returns None to all of them
+once nothing is queued or in flight.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from app.services.bloom_filter import BloomFilter
+from app.services.response_cache import normalize_url
+
+SCOPES = ("host", "domain", "any")
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+class CrawlFrontier:
+    def __init__(
+        self,
+        seeds: Iterable[str],
+        max_pages: int,
+        max_depth: int,
+        scope: str = "host",
+        host_delay: float = 1.0,
+        host_concurrency: int = 1,
+        error_rate: float = 0.001,
+    ):
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown crawl scope {scope!r}")
+        seeds = [normalize_url(url) for url in seeds]
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.scope = scope
+        self.host_delay = host_delay
+        self.host_concurrency = host_concurrency
+        self._scope_hosts = {self._scope_key(_host(url)) for url in seeds}
+        self._seen = BloomFilter(max_pages, error_rate)
+        self._queues: Dict[str, Deque[Tuple[str, int]]] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._next_start: Dict[str, float] = {}  # at most one entry per admitted URL
+        self._ready: List[Tuple[float, int, str]] = []  # (earliest start, seq, host)
+        self._scheduled: Set[str] = set()
+        self._seq = itertools.count()
+        self._changed = asyncio.Event()
+        self.admitted = 0
+        self.completed = 0
+        self.duplicates = 0
+        self.out_of_scope = 0
+        self.over_budget = 0
+        for url in seeds:
+            self.add(url, 0)
+
+    def _scope_key(self, host: str) -> str:
+        return host[4:] if self.scope == "domain" and host.startswith("www.") else host
+
+    def in_scope(self, url: str) -> bool:
+        if self.scope == "any":
+            return True
+        host = self._scope_key(_host(url))
+        if self.scope == "host":
+            return host in self._scope_hosts
+        return any(host == h or host.endswith("." + h) for h in self._scope_hosts)
+
+    def add(self, url: str, depth: int) -> bool:
+        """Queue `url` found at `depth`; False if out of scope, too deep, seen or over budget."""
+        if urlsplit(url).scheme not in ("http", "https"):
+            return False
+        url = normalize_url(url)
+        if depth > self.max_depth or not self.in_scope(url):
+            self.out_of_scope += 1
+            return False
+        if url in self._seen:
+            self.duplicates += 1
+            return False
+        if self.admitted >= self.max_pages:
+            self.over_budget += 1
+            return False
+        self._seen.add(url)
+        self.admitted += 1
+        host = _host(url)
+        self._queues.setdefault(host, deque()).append((url, depth))
+        self._schedule(host)
+        self._changed.set()
+        return True
+
+    def _schedule(self, host: str) -> None:
+        if host in self._scheduled or not self._queues.get(host):
+            return
+        if self._in_flight.get(host, 0) >= self.host_concurrency:
+            return
+        self._scheduled.add(host)
+        heapq.heappush(
+            self._ready, (self._next_start.get(host, 0.0), next(self._seq), host)
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._in_flight.values())
+
+    async def next(self) -> Optional[Tuple[str, int]]:
+        """The next (url, depth) to fetch, waiting out host politeness; None when the crawl is finished."""
+        while True:
+            timeout = None
+            if self._ready:
+                start_at, _, host = self._ready[0]
+                now = time.monotonic()
+                if start_at <= now:
+                    heapq.heappop(self._ready)
+                    self._scheduled.discard(host)
+                    queue = self._queues[host]
+                    url, depth = queue.popleft()
+                    if not queue:
+                        del self._queues[host]
+                    self._in_flight[host] = self._in_flight.get(host, 0) + 1
+                    self._next_start[host] = now + self.host_delay
+                    self._schedule(host)
+                    return url, depth
+                timeout = start_at - now
+            elif not self._in_flight:
+                return None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def done(self, url: str) -> None:
+        """Mark a URL handed out by next() as finished (successfully or not)."""
+        host = _host(url)
+        remaining = self._in_flight.get(host, 0) - 1
+        if remaining > 0:
+            self._in_flight[host] = remaining
+        else:
+            self._in_flight.pop(host, None)
+        self.completed += 1
+        self._schedule(host)
+        self._changed.set()
+
+    def stats(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "in_flight": self.in_flight,
+            "hosts": len(self._queues),
+            "duplicates": self.duplicates,
+            "out_of_scope": self.out_of_scope,
+            "over_budget": self.over_budget,
+        }
@@ -5,8 +5,8 @@ X-Worker-Secret matching settings.SECRET_KEY.
 """
 from typing import Any, Optional
 import os
-import httpx
 from app.core.config import settings
+from app.core.http import http_clients
 
 
 def _worker_url() -> str:
@@ -18,98 +18,68 @@ def _headers() -> dict[str, str]:
     return {"X-Worker-Secret": settings.SECRET_KEY, "Content-Type": "application/json"}
 
 
-def _client() -> httpx.Client:
+def _request(method: str, path: str, **kwargs: Any) -> Any:
+    """Send a request to the Worker over the shared pooled client."""
     url = _worker_url()
     if not url:
         raise ValueError("DISPUTE_WORKER_URL is not configured in environment")
-    return httpx.Client(base_url=url, headers=_headers(), timeout=15)
+    r = http_clients.get_sync("dispute_worker").request(method, f"{url}{path}", headers=_headers(), **kwargs)
+    r.raise_for_status()
+    return r.json()
 
 
 # ── Cases ─────────────────────────────────────────────────────────────────────
 
 def create_case(payload: dict[str, Any]) -> dict:
-    with _client() as c:
-        r = c.post("/cases", json=payload)
-        r.raise_for_status()
-        return r.json()
+    return _request("POST", "/cases", json=payload)
 
 
 def list_cases() -> list[dict]:
-    with _client() as c:
-        r = c.get("/cases")
-        r.raise_for_status()
-        return r.json()
+    return _request("GET", "/cases")
 
 
 def get_case(case_id: str) -> dict:
-    with _client() as c:
-        r = c.get(f"/cases/{case_id}")
-        r.raise_for_status()
-        return r.json()
+    return _request("GET", f"/cases/{case_id}")
 
 
 def update_case(case_id: str, payload: dict[str, Any]) -> dict:
-    with _client() as c:
-        r = c.patch(f"/cases/{case_id}", json=payload)
-        r.raise_for_status()
-        return r.json()
+    return _request("PATCH", f"/cases/{case_id}", json=payload)
 
 
 # ── Events & snapshots ────────────────────────────────────────────────────────
 
 def add_event(case_id: str, event_type: str, content: str, created_by: Optional[str] = None) -> dict:
-    with _client() as c:
-        r = c.post(f"/cases/{case_id}/events", json={
-            "event_type": event_type,
-            "content": content,
-            "created_by": created_by,
-        })
-        r.raise_for_status()
-        return r.json()
+    return _request("POST", f"/cases/{case_id}/events", json={
+        "event_type": event_type,
+        "content": content,
+        "created_by": created_by,
+    })
 
 
 def store_snapshot(case_id: str, snapshot_json: str, generated_by: Optional[str] = None) -> dict:
-    with _client() as c:
-        r = c.post(f"/cases/{case_id}/snapshots", json={
-            "snapshot_json": snapshot_json,
-            "generated_by": generated_by,
-        })
-        r.raise_for_status()
-        return r.json()
+    return _request("POST", f"/cases/{case_id}/snapshots", json={
+        "snapshot_json": snapshot_json,
+        "generated_by": generated_by,
+    })
 
 
 def get_snapshot(case_id: str, snap_id: str) -> dict:
-    with _client() as c:
-        r = c.get(f"/cases/{case_id}/snapshots/{snap_id}")
-        r.raise_for_status()
-        return r.json()
+    return _request("GET", f"/cases/{case_id}/snapshots/{snap_id}")
 
 
 # ── Seed ──────────────────────────────────────────────────────────────────────
 
 def seed_login_events(case_id: str, rows: list[dict], seeded_by: Optional[str] = None) -> dict:
-    with _client() as c:
-        r = c.post(f"/cases/{case_id}/seed/login-events", json={"rows": rows, "seeded_by": seeded_by})
-        r.raise_for_status()
-        return r.json()
+    return _request("POST", f"/cases/{case_id}/seed/login-events", json={"rows": rows, "seeded_by": seeded_by})
 
 
 def seed_api_requests(case_id: str, rows: list[dict], seeded_by: Optional[str] = None) -> dict:
-    with _client() as c:
-        r = c.post(f"/cases/{case_id}/seed/api-requests", json={"rows": rows, "seeded_by": seeded_by})
-        r.raise_for_status()
-        return r.json()
+    return _request("POST", f"/cases/{case_id}/seed/api-requests", json={"rows": rows, "seeded_by": seeded_by})
 
 
 def seed_llm_usage(case_id: str, rows: list[dict], seeded_by: Optional[str] = None) -> dict:
-    with _client() as c:
-        r = c.post(f"/cases/{case_id}/seed/llm-usage", json={"rows": rows, "seeded_by": seeded_by})
-        r.raise_for_status()
-        return r.json()
+    return _request("POST", f"/cases/{case_id}/seed/llm-usage", json={"rows": rows, "seeded_by": seeded_by})
 
 
 def seed_summary(case_id: str) -> dict:
-    with _client() as c:
-        r = c.get(f"/cases/{case_id}/seed/summary")
-        r.raise_for_status()
-        return r.json()
+    return _request("GET", f"/cases/{case_id}/seed/summary")
@@ -0,0 +1,180 @@
+"""
+Registry of regional proxy endpoints, reloadable at runtime.
+
+Endpoints come from a JSON file when one is configured, otherwise from
+the built-in defaults. The file looks like:
+
+    {"endpoints": [
+        {"url": "https://.../main", "region": "us-east", "id": "us-east_0",
+         "weight": 1.0, "enabled": true}
+    ]}
+
+`id` defaults to "<region>_<n>", `weight` to 1.0 and `enabled` to true.
+Each load builds an immutable `RegistrySnapshot` holding the lookups
+callers need (region -> enabled URLs, URL -> endpoint, id -> URL) and
+swaps it in whole, so a reader never sees a half-applied change.
+
+A background task re-reads the file when its modification time changes.
+Disabling an endpoint (drain) only stops new requests from picking it;
+requests already sent to it finish normally. A file that fails to parse
+or validate is logged and ignored, and the previous snapshot stays.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ProxyEndpoint:
+    url: str
+    region: str
+    endpoint_id: str
+    weight: float = 1.0
+    enabled: bool = True
+
+
+@dataclass(frozen=True)
+class RegistrySnapshot:
+    regions: Dict[str, List[str]]  # region -> enabled endpoint URLs, in file order
+    by_url: Dict[str, ProxyEndpoint]  # every configured endpoint, enabled or not
+    by_id: Dict[str, str]  # endpoint id -> URL
+
+    @classmethod
+    def build(cls, endpoints: List[ProxyEndpoint]) -> "RegistrySnapshot":
+        regions: Dict[str, List[str]] = {}
+        by_url: Dict[str, ProxyEndpoint] = {}
+        by_id: Dict[str, str] = {}
+        for endpoint in endpoints:
+            if endpoint.url in by_url:
+                raise ValueError(f"Duplicate endpoint URL {endpoint.url}")
+            if endpoint.endpoint_id in by_id:
+                raise ValueError(f"Duplicate endpoint id {endpoint.endpoint_id}")
+            if endpoint.weight <= 0:
+                raise ValueError(
+                    f"Endpoint {endpoint.endpoint_id} needs a positive weight"
+                )
+            by_url[endpoint.url] = endpoint
+            by_id[endpoint.endpoint_id] = endpoint.url
+            urls = regions.setdefault(endpoint.region, [])
+            if endpoint.enabled:
+                urls.append(endpoint.url)
+        return cls(regions=regions, by_url=by_url, by_id=by_id)
+
+
+def endpoints_from_regions(
+    region_endpoints: Dict[str, List[str]],
+) -> List[ProxyEndpoint]:
+    return [
+        ProxyEndpoint(url=url, region=region, endpoint_id=f"{region}_{i}")
+        for region, urls in region_endpoints.items()
+        for i, url in enumerate(urls)
+    ]
+
+
+def parse_endpoints(data: Dict) -> List[ProxyEndpoint]:
+    endpoints = []
+    counts: Dict[str, int] = {}
+    for item in data["endpoints"]:
+        region = item["region"]
+        index = counts.get(region, 0)
+        counts[region] = index + 1
+        endpoints.append(
+            ProxyEndpoint(
+                url=item["url"],
+                region=region,
+                endpoint_id=item.get("id") or f"{region}_{index}",
+                weight=float(item.get("weight", 1.0)),
+                enabled=bool(item.get("enabled", True)),
+            )
+        )
+    return endpoints
+
+
+class EndpointRegistry:
+    def __init__(
+        self,
+        defaults: Dict[str, List[str]],
+        path: Optional[str] = None,
+        reload_interval: float = 10.0,
+    ):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.snapshot = RegistrySnapshot.build(endpoints_from_regions(defaults))
+        self._mtime: Optional[float] = None
+        self._listeners: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        if path:
+            self.reload()
+
+    def on_change(self, listener: Callable[[], None]) -> None:
+        self._listeners.append(listener)
+
+    def reload(self) -> bool:
+        """Load the file if it changed since the last load. Returns True if a new snapshot was applied."""
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return False
+            with open(self.path) as f:
+                snapshot = RegistrySnapshot.build(parse_endpoints(json.load(f)))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(
+                f"Keeping current proxy endpoints; could not load {self.path}: {e}"
+            )
+            return False
+        self._mtime = mtime
+        self.snapshot = snapshot
+        enabled = sum(len(urls) for urls in snapshot.regions.values())
+        logger.info(
+            f"Loaded {len(snapshot.by_url)} proxy endpoints ({enabled} enabled) from {self.path}"
+        )
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Proxy endpoint reload listener failed: {e}")
+        return True
+
+    async def start(self) -> None:
+        if not self.path or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Watching {self.path} for proxy endpoint changes (every {self.reload_interval}s)"
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            self.reload()
+
+    # ── lookups (no I/O) ─────────────────────────────────────────────────
+
+    def region_of(self, url: str) -> Optional[str]:
+        endpoint = self.snapshot.by_url.get(url)
+        return endpoint.region if endpoint else None
+
+    def endpoint_id(self, url: str) -> Optional[str]:
+        endpoint = self.snapshot.by_url.get(url)
+        return endpoint.endpoint_id if endpoint else None
+
+    def weight(self, url: str) -> float:
+        endpoint = self.snapshot.by_url.get(url)
+        return endpoint.weight if endpoint else 1.0
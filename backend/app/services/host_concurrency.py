@@ -0,0 +1,177 @@
+"""
+Adaptive per-target-host concurrency (AIMD).
+
+Each target host gets a concurrency limit that is probed upwards and cut
+back when the host pushes back, like TCP congestion control: every
+successful fetch adds 1/limit (about +1 per round of fetches), while a
+throttled one (429, 403, timeout) multiplies the limit by `backoff`. A
+burst of throttled replies from requests that were all in flight at the
+same time counts as one signal: only a request started after the last
+cut can cut again.
+
+Fetches over a host's limit wait in a FIFO queue for up to
+`queue_timeout` seconds instead of failing; `acquire()` returns None when
+the wait runs out. Hosts that have been idle for `idle_ttl` are forgotten.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+NEUTRAL = "neutral"  # failed for reasons that say nothing about the target
+SUCCESS = "success"
+THROTTLED = "throttled"
+
+
+class HostState:
+    __slots__ = (
+        "limit",
+        "in_flight",
+        "waiters",
+        "last_cut",
+        "last_used",
+        "successes",
+        "throttled",
+        "queue_timeouts",
+    )
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.last_cut = 0.0
+        self.last_used = time.monotonic()
+        self.successes = 0
+        self.throttled = 0
+        self.queue_timeouts = 0
+
+    @property
+    def allowed(self) -> int:
+        return max(1, int(self.limit))
+
+
+class HostSlot:
+    """One admitted fetch. Mark the outcome before releasing; the default is NEUTRAL."""
+
+    __slots__ = ("host", "started", "outcome", "_released")
+
+    def __init__(self, host: str):
+        self.host = host
+        self.started = time.monotonic()
+        self.outcome = NEUTRAL
+        self._released = False
+
+
+class HostConcurrencyLimiter:
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        backoff: float = 0.5,
+        queue_timeout: float = 5.0,
+        idle_ttl: float = 600.0,
+    ):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.queue_timeout = queue_timeout
+        self.idle_ttl = idle_ttl
+        self._hosts: Dict[str, HostState] = {}
+        self._next_prune = time.monotonic() + self.PRUNE_INTERVAL
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            self._maybe_prune()
+            state = self._hosts[host] = HostState(float(self.initial))
+        state.last_used = time.monotonic()
+        return state
+
+    async def acquire(self, host: str) -> Optional[HostSlot]:
+        """A slot for one fetch to `host`, or None if none freed up within queue_timeout."""
+        state = self._state(host)
+        if state.in_flight < state.allowed and not state.waiters:
+            state.in_flight += 1
+            return HostSlot(host)
+
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                self._release_slot(state)  # granted just as the caller went away
+            else:
+                state.waiters.remove(waiter)
+            raise
+        if waiter.done():
+            return HostSlot(host)  # _release_slot already counted it in flight
+        state.waiters.remove(waiter)
+        state.queue_timeouts += 1
+        return None
+
+    def release(self, slot: HostSlot) -> None:
+        if slot._released:
+            return
+        slot._released = True
+        state = self._hosts.get(slot.host)
+        if state is None:
+            return
+        if slot.outcome == SUCCESS:
+            state.successes += 1
+            state.limit = min(float(self.maximum), state.limit + 1.0 / state.limit)
+        elif slot.outcome == THROTTLED:
+            state.throttled += 1
+            if slot.started >= state.last_cut:
+                state.limit = max(float(self.minimum), state.limit * self.backoff)
+                state.last_cut = time.monotonic()
+        self._release_slot(state)
+
+    def _release_slot(self, state: HostState) -> None:
+        state.in_flight -= 1
+        state.last_used = time.monotonic()
+        while state.waiters and state.in_flight < state.allowed:
+            state.in_flight += 1
+            state.waiters.popleft().set_result(None)
+
+    def _maybe_prune(self) -> None:
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.PRUNE_INTERVAL
+        for host, state in list(self._hosts.items()):
+            if (
+                not state.in_flight
+                and not state.waiters
+                and now - state.last_used > self.idle_ttl
+            ):
+                del self._hosts[host]
+
+    def stats(self, top: int = 50) -> dict:
+        """Totals, plus the `top` hosts with the most fetches waiting or in flight."""
+        busiest = sorted(
+            self._hosts.items(),
+            key=lambda item: (len(item[1].waiters), item[1].in_flight),
+            reverse=True,
+        )
+        return {
+            "hosts": len(self._hosts),
+            "limited": sum(1 for s in self._hosts.values() if s.limit < self.initial),
+            "queued": sum(len(s.waiters) for s in self._hosts.values()),
+            "busiest": {
+                host: {
+                    "limit": round(state.limit, 2),
+                    "in_flight": state.in_flight,
+                    "queued": len(state.waiters),
+                    "successes": state.successes,
+                    "throttled": state.throttled,
+                    "queue_timeouts": state.queue_timeouts,
+                }
+                for host, state in busiest[:top]
+            },
+        }
@@ -0,0 +1,208 @@
+"""
+Content extraction from fetched pages.
+
+`extract()` parses a page once with the same lxml parser and
+precompiled-XPath approach as the SERP parsers and returns only the
+requested parts: readable text, outgoing links, title/meta/OpenGraph
+metadata, and JSON-LD blocks. It is a plain module-level function
+returning dicts, so it runs in the worker processes of `parser_pool`.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from lxml import etree
+
+from app.services.serp_parser import parse_html
+
+FIELDS = ("text", "links", "metadata", "json_ld")
+
+_TITLE = etree.XPath("string((//title)[1])")
+_LANG = etree.XPath("string((/html/@lang)[1])")
+_BASE_HREF = etree.XPath("(//base/@href)[1]")
+_CANONICAL = etree.XPath(
+    "(//link[contains(concat(' ', normalize-space(@rel), ' '), ' canonical ')]/@href)[1]"
+)
+_META = etree.XPath("//meta[@content]")
+_LINKS = etree.XPath("//a[@href]")
+_JSON_LD = etree.XPath(
+    "//script[contains(translate(@type, 'LDJSON', 'ldjson'), 'ld+json')]"
+)
+_MAIN = etree.XPath("(//main | //article | //*[@role='main'])[1]")
+_BODY = etree.XPath("(//body)[1]")
+_TEXT = etree.XPath("string()")
+
+# Dropped before taking readable text
+_NON_CONTENT = (
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "svg",
+    "canvas",
+    "iframe",
+    "head",
+    "nav",
+    "header",
+    "footer",
+    "aside",
+    "form",
+    "button",
+    "select",
+)
+# Elements that start a new line of text
+_BLOCKS = frozenset(
+    {
+        "address",
+        "article",
+        "blockquote",
+        "br",
+        "dd",
+        "div",
+        "dl",
+        "dt",
+        "figcaption",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "hr",
+        "li",
+        "main",
+        "ol",
+        "p",
+        "pre",
+        "section",
+        "table",
+        "td",
+        "th",
+        "tr",
+        "ul",
+    }
+)
+
+
+def _squash(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _metadata(root: etree._Element) -> Dict[str, Any]:
+    meta: Dict[str, str] = {}
+    opengraph: Dict[str, str] = {}
+    for el in _META(root):
+        key = (
+            el.get("property")
+            or el.get("name")
+            or el.get("itemprop")
+            or el.get("http-equiv")
+        )
+        if not key:
+            continue
+        key = key.strip().lower()
+        target = opengraph if key.startswith("og:") else meta
+        target.setdefault(key, el.get("content").strip())
+    canonical = _CANONICAL(root)
+    if canonical:
+        meta.setdefault("canonical", str(canonical[0]).strip())
+    lang = str(_LANG(root)).strip()
+    if lang:
+        meta.setdefault("lang", lang)
+    return {"metadata": meta, "opengraph": opengraph}
+
+
+def _json_ld(root: etree._Element) -> List[Any]:
+    blocks: List[Any] = []
+    for el in _JSON_LD(root):
+        try:
+            data = json.loads(el.text or "")
+        except ValueError:
+            continue  # malformed blocks are common; skip them
+        blocks.extend(data if isinstance(data, list) else [data])
+    return blocks
+
+
+def _links(root: etree._Element, base_url: str) -> List[Dict[str, str]]:
+    base = _BASE_HREF(root)
+    if base:
+        try:
+            base_url = urljoin(base_url, str(base[0]).strip())
+        except ValueError:
+            pass  # unparsable <base href>; resolve against the page URL
+    seen = set()
+    links = []
+    for el in _LINKS(root):
+        try:
+            url, _ = urldefrag(urljoin(base_url, el.get("href").strip()))
+            scheme = urlsplit(url).scheme
+        except ValueError:
+            continue  # malformed href, e.g. "http://[oops/"
+        if scheme not in ("http", "https") or url in seen:
+            continue
+        seen.add(url)
+        links.append({"url": url, "text": _squash(str(_TEXT(el)))})
+    return links
+
+
+def _readable_text(root: etree._Element) -> str:
+    # Mutates the tree, so it runs after the other extractors
+    etree.strip_elements(
+        root, etree.Comment, etree.ProcessingInstruction, *_NON_CONTENT, with_tail=False
+    )
+    found = _MAIN(root) or _BODY(root)
+    container = found[0] if found else root
+    # Source line breaks are whitespace; only block boundaries break lines
+    parts: List[str] = []
+    for event, el in etree.iterwalk(container, events=("start", "end")):
+        block = el.tag in _BLOCKS
+        if event == "start":
+            if block:
+                parts.append("\n")
+            if el.text:
+                parts.append(el.text.replace("\n", " "))
+        else:
+            if block:
+                parts.append("\n")
+            if el.tail and el is not container:
+                parts.append(el.tail.replace("\n", " "))
+    lines = (_squash(line) for line in "".join(parts).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _empty(fields: Iterable[str]) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"title": None}
+    if "metadata" in fields:
+        result.update(metadata={}, opengraph={})
+    if "json_ld" in fields:
+        result["json_ld"] = []
+    if "links" in fields:
+        result["links"] = []
+    if "text" in fields:
+        result["text"] = ""
+    return result
+
+
+def extract(html: str, base_url: str, fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Extract `fields` (any of FIELDS) from a page. The title is always
+    included, and every requested field is present (empty for an empty
+    document). Relative links are resolved against `base_url` (or the
+    page's <base href>); malformed ones are skipped.
+    """
+    fields = set(fields)
+    root = parse_html(html)
+    if root is None:
+        return _empty(fields)
+    title: Optional[str] = _squash(str(_TITLE(root))) or None
+    result: Dict[str, Any] = {"title": title}
+    if "metadata" in fields:
+        result.update(_metadata(root))
+    if "json_ld" in fields:
+        result["json_ld"] = _json_ld(root)
+    if "links" in fields:
+        result["links"] = _links(root, base_url)
+    if "text" in fields:
+        result["text"] = _readable_text(root)
+    return result
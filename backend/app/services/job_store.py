@@ -0,0 +1,257 @@
+"""
+Database-backed store for asynchronous jobs and their results.
+
+Jobs are rows in the `proxy_job` table, so every API worker process sees
+the same jobs. The worker that accepted a job runs it, and any worker can
+answer a poll for it. A `Job` is a plain snapshot of a row; results
+(compressed pages, or metadata pointing at an offloaded one) are stored on
+the row. A finished job and its result expire `ttl` seconds after it
+finished. A job that never finished (its worker went away) expires `ttl`
+seconds after it was created.
+
+Database calls run in a thread so they don't block the event loop.
+`wait()` long-polls: it wakes at once when this process finishes the job,
+and otherwise re-reads the row every `poll_interval` seconds.
+"""
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import delete, func, or_
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.models import ProxyJob
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    owner: UUID
+    spec: Dict[str, Any]
+    status: str = QUEUED
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    result_meta: Optional[Dict[str, Any]] = None
+    result: Optional[bytes] = None
+
+    @classmethod
+    def from_row(cls, row: ProxyJob) -> "Job":
+        return cls(
+            id=row.id.hex,
+            owner=row.user_id,
+            spec=row.spec,
+            status=row.status,
+            created_at=row.created_at,
+            started_at=row.started_at,
+            finished_at=row.finished_at,
+            status_code=row.status_code,
+            error=row.error,
+            result_meta=row.result_meta,
+            result=row.result,
+        )
+
+
+def _parse_id(job_id: str) -> Optional[UUID]:
+    try:
+        return UUID(hex=job_id)
+    except ValueError:
+        return None
+
+
+class JobStore:
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(self, engine: Engine, ttl: float, poll_interval: float = 0.5):
+        self.engine = engine
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._waiters: Dict[str, asyncio.Event] = {}
+        self._next_prune = time.monotonic() + self.PRUNE_INTERVAL
+
+    def _expired(self, row: ProxyJob, now: datetime) -> bool:
+        return (row.finished_at or row.created_at) < now - timedelta(seconds=self.ttl)
+
+    async def create(self, owner: UUID, spec: Dict[str, Any]) -> Job:
+        await self._maybe_prune()
+
+        def insert() -> Job:
+            with Session(self.engine) as session:
+                row = ProxyJob(
+                    id=uuid.uuid4(),
+                    user_id=owner,
+                    status=QUEUED,
+                    spec=spec,
+                    created_at=datetime.utcnow(),
+                )
+                session.add(row)
+                session.commit()
+                session.refresh(row)
+                return Job.from_row(row)
+
+        return await asyncio.to_thread(insert)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        row_id = _parse_id(job_id)
+        if row_id is None:
+            return None
+
+        def load() -> Optional[Job]:
+            with Session(self.engine) as session:
+                row = session.get(ProxyJob, row_id)
+                if row is None or self._expired(row, datetime.utcnow()):
+                    return None
+                return Job.from_row(row)
+
+        return await asyncio.to_thread(load)
+
+    async def pending(self, owner: UUID) -> int:
+        """Jobs of `owner` that are queued or running."""
+
+        def count() -> int:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+            with Session(self.engine) as session:
+                return session.exec(
+                    select(func.count())
+                    .select_from(ProxyJob)
+                    .where(
+                        ProxyJob.user_id == owner,
+                        ProxyJob.status.in_((QUEUED, RUNNING)),
+                        ProxyJob.created_at >= cutoff,
+                    )
+                ).one()
+
+        return await asyncio.to_thread(count)
+
+    async def _update(self, job: Job, **values: Any) -> None:
+        def write() -> None:
+            with Session(self.engine) as session:
+                row = session.get(ProxyJob, UUID(hex=job.id))
+                if row is None:
+                    return
+                for name, value in values.items():
+                    setattr(row, name, value)
+                session.add(row)
+                session.commit()
+
+        await asyncio.to_thread(write)
+        for name, value in values.items():
+            setattr(job, name, value)
+
+    async def start(self, job: Job) -> None:
+        await self._update(job, status=RUNNING, started_at=datetime.utcnow())
+
+    async def succeed(
+        self, job: Job, result: Optional[bytes], result_meta: Dict[str, Any]
+    ) -> None:
+        await self._update(
+            job,
+            status=SUCCEEDED,
+            result=result,
+            result_meta=result_meta,
+            finished_at=datetime.utcnow(),
+        )
+        self._notify(job)
+
+    async def fail(self, job: Job, status_code: int, error: str) -> None:
+        await self._update(
+            job,
+            status=FAILED,
+            status_code=status_code,
+            error=error[:1024],
+            finished_at=datetime.utcnow(),
+        )
+        self._notify(job)
+
+    async def discard(self, job: Job) -> None:
+        """Forget a job that was never run (e.g. the queue refused it)."""
+
+        def remove() -> None:
+            with Session(self.engine) as session:
+                session.execute(delete(ProxyJob).where(ProxyJob.id == UUID(hex=job.id)))
+                session.commit()
+
+        await asyncio.to_thread(remove)
+        self._notify(job)
+
+    async def wait(self, job: Job, timeout: float) -> Job:
+        deadline = time.monotonic() + timeout
+        try:
+            while job.status not in FINISHED:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                event = self._waiters.get(job.id)
+                if event is None:
+                    event = self._waiters[job.id] = asyncio.Event()
+                try:
+                    await asyncio.wait_for(
+                        event.wait(), min(remaining, self.poll_interval)
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                latest = await self.get(job.id)
+                if latest is None:
+                    break
+                job = latest
+        finally:
+            # Jobs run by other workers never notify this process; don't
+            # keep their events around (other waiters fall back to polling)
+            self._waiters.pop(job.id, None)
+        return job
+
+    def _notify(self, job: Job) -> None:
+        event = self._waiters.pop(job.id, None)
+        if event is not None:
+            event.set()
+
+    async def _maybe_prune(self) -> None:
+        now = time.monotonic()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.PRUNE_INTERVAL
+
+        def prune() -> None:
+            cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+            with Session(self.engine) as session:
+                session.execute(
+                    delete(ProxyJob).where(
+                        or_(
+                            ProxyJob.finished_at < cutoff,
+                            (ProxyJob.finished_at.is_(None))
+                            & (ProxyJob.created_at < cutoff),
+                        )
+                    )
+                )
+                session.commit()
+
+        await asyncio.to_thread(prune)
+
+    async def stats(self) -> dict:
+        def count() -> dict:
+            with Session(self.engine) as session:
+                rows = session.exec(
+                    select(ProxyJob.status, func.count()).group_by(ProxyJob.status)
+                ).all()
+            return dict(rows)
+
+        by_status = await asyncio.to_thread(count)
+        return {
+            "jobs": sum(by_status.values()),
+            "by_status": by_status,
+            "local_waiters": len(self._waiters),
+        }
@@ -0,0 +1,208 @@
+"""
+Incremental extraction of one string field from a streamed JSON object.
+
+The proxy endpoints answer /fetch with `{"result": "<page>", ...}`. To relay
+large pages without holding the whole body in memory, `JsonFieldStreamer`
+is fed raw upstream chunks and returns the decoded text of the target
+field as it arrives. Other top-level fields are collected into `fields`
+(strings decoded, other scalars parsed, nested objects/arrays skipped).
+"""
+
+import codecs
+import json
+from json.decoder import scanstring
+from typing import Any, Dict, List, Optional
+
+
+def _unescaped_at(segment: str, pos: int) -> bool:
+    """True if the backslash at `pos` starts an escape (is not itself escaped)."""
+    return (pos - len(segment[:pos].rstrip("\\"))) % 2 == 0
+
+
+def _ends_with_high_surrogate(segment: str) -> bool:
+    tail = segment[-6:]
+    if (
+        len(tail) < 6
+        or not tail.startswith("\\u")
+        or not _unescaped_at(segment, len(segment) - 6)
+    ):
+        return False
+    try:
+        return 0xD800 <= int(tail[2:], 16) < 0xDC00
+    except ValueError:
+        return False
+
+
+def _incomplete_escape_start(segment: str) -> int:
+    """Index where a trailing, not yet complete escape sequence starts (or len(segment))."""
+    cut = len(segment)
+    trailing = len(segment) - len(segment.rstrip("\\"))
+    if trailing % 2 == 1:
+        cut -= 1
+    else:
+        pos = segment.rfind("\\u", max(0, len(segment) - 5))
+        if pos != -1 and _unescaped_at(segment, pos):
+            cut = pos
+    # Hold back a high surrogate until its low half arrives
+    if _ends_with_high_surrogate(segment[:cut]):
+        cut -= 6
+    return cut
+
+
+class JsonFieldStreamer:
+    def __init__(self, field: str):
+        self.field = field
+        self.fields: Dict[str, Any] = {}
+        self.field_started = False
+        self.done = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._state = "start"
+        self._key: Optional[str] = None
+        self._buf: List[str] = []
+        self._carry = ""
+        self._depth = 0
+        self._nested_in_string = False
+        self._nested_escape = False
+
+    def feed(self, data: bytes) -> str:
+        """Consume a chunk of raw JSON; return newly decoded text of the target field."""
+        text = self._carry + self._decoder.decode(data)
+        self._carry = ""
+        out: List[str] = []
+        i, n = 0, len(text)
+        while i < n and not self.done:
+            state = self._state
+            if state == "key":
+                i = self._read_string(text, i, self._buf)
+                continue
+            if state == "string":
+                sink = out if self._key == self.field else self._buf
+                i = self._read_string(text, i, sink)
+                continue
+            if state == "nested":
+                i = self._skip_nested(text, i)
+                continue
+            c = text[i]
+            i += 1
+            if c in " \t\r\n":
+                if state == "scalar":
+                    self._end_scalar()
+                continue
+            if state == "start":
+                if c != "{":
+                    raise ValueError("Expected a JSON object")
+                self._state = "key_or_end"
+            elif state == "key_or_end":
+                if c == '"':
+                    self._buf = []
+                    self._state = "key"
+                elif c == "}":
+                    self.done = True
+                elif c != ",":
+                    raise ValueError(f"Unexpected character {c!r} in JSON object")
+            elif state == "colon":
+                if c != ":":
+                    raise ValueError("Expected ':' after JSON key")
+                self._state = "value"
+            elif state == "value":
+                if c == '"':
+                    self._buf = []
+                    self._state = "string"
+                    if self._key == self.field:
+                        self.field_started = True
+                elif c in "{[":
+                    self._depth = 1
+                    self._state = "nested"
+                else:
+                    self._buf = [c]
+                    self._state = "scalar"
+            elif state == "scalar":
+                if c in ",}":
+                    self._end_scalar()
+                    if c == "}":
+                        self.done = True
+                    else:
+                        self._state = "key_or_end"
+                else:
+                    self._buf.append(c)
+            elif state == "after_value":
+                if c == ",":
+                    self._state = "key_or_end"
+                elif c == "}":
+                    self.done = True
+                else:
+                    raise ValueError(f"Unexpected character {c!r} after JSON value")
+        return "".join(out)
+
+    def _end_scalar(self) -> None:
+        raw = "".join(self._buf).strip()
+        try:
+            self.fields[self._key] = json.loads(raw)
+        except ValueError:
+            self.fields[self._key] = raw
+        self._state = "after_value"
+
+    def _end_string(self) -> None:
+        if self._state == "key":
+            self._key = "".join(self._buf)
+            self._state = "colon"
+            return
+        if self._key != self.field:
+            self.fields[self._key] = "".join(self._buf)
+        self._state = "after_value"
+
+    def _read_string(self, text: str, i: int, sink: List[str]) -> int:
+        # Find the closing quote: one not preceded by an odd run of backslashes
+        n = len(text)
+        j = i
+        end, closed = n, False
+        while True:
+            quote = text.find('"', j)
+            if quote == -1:
+                break
+            k = quote - 1
+            while k >= i and text[k] == "\\":
+                k -= 1
+            if (quote - 1 - k) % 2 == 0:
+                end, closed = quote, True
+                break
+            j = quote + 1
+        segment = text[i:end]
+        if not closed:
+            # An escape split across chunks is finished on the next feed()
+            cut = _incomplete_escape_start(segment)
+            self._carry = segment[cut:]
+            segment = segment[:cut]
+        if segment:
+            sink.append(
+                scanstring('"' + segment + '"', 1, False)[0]
+                if "\\" in segment
+                else segment
+            )
+        if closed:
+            self._end_string()
+            return end + 1
+        return n
+
+    def _skip_nested(self, text: str, i: int) -> int:
+        n = len(text)
+        while i < n:
+            c = text[i]
+            i += 1
+            if self._nested_in_string:
+                if self._nested_escape:
+                    self._nested_escape = False
+                elif c == "\\":
+                    self._nested_escape = True
+                elif c == '"':
+                    self._nested_in_string = False
+            elif c == '"':
+                self._nested_in_string = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._state = "after_value"
+                    return i
+        return i
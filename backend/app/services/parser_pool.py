@@ -0,0 +1,60 @@
+"""
+Process pool for CPU-bound HTML parsing.
+
+Parsing a results page takes milliseconds of pure CPU; run on the event
+loop it stalls every other request on the worker. `ParserPool.run()`
+ships the call to a small pool of worker processes instead. The pool is
+started with the app (or on first use) and shut down with it. With
+`workers=0`, calls run inline (useful for tests and scripts).
+
+Functions passed to `run()` must be importable module-level functions,
+and their arguments and results must be picklable.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ParserPool:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: never fork a process that is running an event loop and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"Started parser pool with {self.workers} workers")
+        return self._executor
+
+    def start(self) -> None:
+        """Spawn the workers up front so the first requests don't pay for it."""
+        if self.workers <= 0:
+            return
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(int)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.workers <= 0:
+            return fn(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+parser_pool = ParserPool(workers=settings.PARSER_POOL_WORKERS)
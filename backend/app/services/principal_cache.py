@@ -0,0 +1,111 @@
+"""
+TTL cache of resolved API-key principals.
+
+Authenticating an X-API-Key request means decoding the key, loading the
+user and loading the API token row. `PrincipalCache` keeps the outcome
+(user id, token id, active flags, subscription/trial state) per key for a
+short TTL so repeat requests skip both queries. Checks that depend on the
+clock (trial expiry, key expiry) are still evaluated on every request.
+
+Entries are invalidated explicitly when a user or token changes, so
+revocation does not wait for the TTL. Invalidation is per process; in a
+multi-worker deployment the TTL bounds how long other workers can lag.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+
+
+@dataclass(frozen=True)
+class ApiPrincipal:
+    id: UUID  # user id; named like User.id so handlers can use either
+    email: str
+    token_id: UUID
+    token_active: bool
+    user_active: bool
+    has_subscription: bool
+    trial_expires_at: Optional[datetime] = None  # set only while the user is on a trial
+    key_expires_at: Optional[float] = None  # the key's own "exp" claim (unix time)
+
+    def subscription_valid(self, now: datetime) -> bool:
+        return self.has_subscription or (
+            self.trial_expires_at is not None and self.trial_expires_at > now
+        )
+
+    def key_expired(self, now: float) -> bool:
+        return self.key_expires_at is not None and self.key_expires_at <= now
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[ApiPrincipal, float]]" = OrderedDict()
+        self._by_user: Dict[UUID, Set[str]] = {}
+        self._by_token: Dict[UUID, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, api_key: str) -> Optional[ApiPrincipal]:
+        with self._lock:
+            cached = self._entries.get(api_key)
+            if cached is None or cached[1] <= time.monotonic():
+                if cached is not None:
+                    self._remove(api_key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(api_key)
+            self.hits += 1
+            return cached[0]
+
+    def set(self, api_key: str, principal: ApiPrincipal) -> None:
+        with self._lock:
+            if api_key in self._entries:
+                self._remove(api_key)
+            self._entries[api_key] = (principal, time.monotonic() + self.ttl)
+            self._by_user.setdefault(principal.id, set()).add(api_key)
+            self._by_token.setdefault(principal.token_id, set()).add(api_key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_key(self, api_key: str) -> None:
+        with self._lock:
+            if api_key in self._entries:
+                self._remove(api_key)
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        with self._lock:
+            for api_key in list(self._by_user.get(user_id, ())):
+                self._remove(api_key)
+
+    def invalidate_token(self, token_id: UUID) -> None:
+        with self._lock:
+            for api_key in list(self._by_token.get(token_id, ())):
+                self._remove(api_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self._by_token.clear()
+
+    def _remove(self, api_key: str) -> None:
+        principal, _ = self._entries.pop(api_key)
+        for index, key in (
+            (self._by_user, principal.id),
+            (self._by_token, principal.token_id),
+        ):
+            keys = index.get(key)
+            if keys is not None:
+                keys.discard(api_key)
+                if not keys:
+                    del index[key]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,171 @@
+"""
+Background health monitor for the regional proxy endpoints.
+
+Probes every endpoint's /health on a fixed interval and keeps the latest
+result per endpoint in memory, so request handlers can look up healthy
+endpoints without making any network calls themselves.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EndpointHealth:
+    endpoint: str
+    region: str
+    is_healthy: bool = True
+    last_latency: Optional[float] = None
+    last_error: Optional[str] = None
+    consecutive_failures: int = 0
+    last_checked: Optional[datetime] = None
+
+
+@dataclass
+class RegionHealth:
+    region: str
+    healthy_endpoints: int
+    total_endpoints: int
+    avg_response_time: float
+    last_checked: datetime
+
+
+class ProxyHealthMonitor:
+    """
+    Periodically probes all endpoints known to the endpoint manager.
+
+    Endpoints start out healthy so traffic flows before the first sweep
+    finishes. An endpoint is marked unhealthy after `failure_threshold`
+    consecutive failed probes and healthy again on its next success.
+    """
+
+    def __init__(
+        self,
+        endpoint_manager,
+        probe: Callable[[str, str], Awaitable[Dict]],
+        interval: float = 15.0,
+        failure_threshold: int = 2,
+    ):
+        self.endpoint_manager = endpoint_manager
+        self.probe = probe
+        self.interval = interval
+        self.failure_threshold = max(1, failure_threshold)
+        self._states: Dict[str, EndpointHealth] = {}
+        self._healthy: Dict[str, List[str]] = {}
+        self._regions: Dict[str, RegionHealth] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.sync_endpoints()
+
+    # ── lifecycle ────────────────────────────────────────────────────────
+
+    async def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Proxy health monitor started (interval: {self.interval}s)")
+
+    async def stop(self) -> None:
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Proxy health monitor stopped")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check_all()
+            except Exception as e:
+                logger.error(f"Proxy health sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    # ── probing ──────────────────────────────────────────────────────────
+
+    async def check_all(self) -> None:
+        """Probe every endpoint once and refresh the per-region indexes."""
+        self.sync_endpoints()
+        targets = list(self._states.values())
+        results = await asyncio.gather(
+            *(self.probe(state.endpoint, state.region) for state in targets),
+            return_exceptions=True,
+        )
+        for state, result in zip(targets, results, strict=True):
+            if isinstance(result, BaseException):
+                result = {
+                    "is_healthy": False,
+                    "response_time": None,
+                    "error": str(result),
+                }
+            self._record(state, result)
+        self._rebuild_indexes()
+
+    def _record(self, state: EndpointHealth, result: Dict) -> None:
+        state.last_latency = result.get("response_time")
+        state.last_checked = result.get("last_checked") or datetime.utcnow()
+        if result.get("is_healthy"):
+            state.consecutive_failures = 0
+            state.last_error = None
+            state.is_healthy = True
+        else:
+            state.consecutive_failures += 1
+            state.last_error = result.get("error") or "health check failed"
+            if state.consecutive_failures >= self.failure_threshold:
+                state.is_healthy = False
+
+    def sync_endpoints(self) -> None:
+        """Add newly configured endpoints and drop removed or disabled ones."""
+        current = {
+            url: region
+            for region in self.endpoint_manager.endpoints
+            for url in self.endpoint_manager.get_endpoints(region)
+        }
+        for url in list(self._states):
+            if url not in current:
+                del self._states[url]
+        for url, region in current.items():
+            state = self._states.get(url)
+            if state is None or state.region != region:
+                self._states[url] = EndpointHealth(endpoint=url, region=region)
+        self._rebuild_indexes()
+
+    def _rebuild_indexes(self) -> None:
+        healthy: Dict[str, List[str]] = {}
+        regions: Dict[str, RegionHealth] = {}
+        now = datetime.utcnow()
+        for region in self.endpoint_manager.endpoints:
+            states = [s for s in self._states.values() if s.region == region]
+            latencies = [s.last_latency for s in states if s.last_latency is not None]
+            checked = [s.last_checked for s in states if s.last_checked is not None]
+            healthy[region] = [s.endpoint for s in states if s.is_healthy]
+            regions[region] = RegionHealth(
+                region=region,
+                healthy_endpoints=len(healthy[region]),
+                total_endpoints=len(states),
+                avg_response_time=sum(latencies) / len(latencies) if latencies else 0.0,
+                last_checked=max(checked) if checked else now,
+            )
+        # Swap in whole dicts so readers never observe a half-built index
+        self._healthy = healthy
+        self._regions = regions
+
+    # ── lookups (no I/O) ─────────────────────────────────────────────────
+
+    def healthy_endpoints(self, region: str) -> List[str]:
+        return self._healthy.get(region, [])
+
+    def region_health(self, region: str) -> Optional[RegionHealth]:
+        return self._regions.get(region)
+
+    def endpoint_health(self, endpoint: str) -> Optional[EndpointHealth]:
+        return self._states.get(endpoint)
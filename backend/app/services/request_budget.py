@@ -0,0 +1,32 @@
+"""
+Token-bucket budget for extra upstream requests (hedges, retries).
+
+Every primary request deposits `ratio` tokens, up to `max_tokens`; each
+extra request spends one. Over time extras are therefore capped at about
+`ratio` of primary traffic, with `max_tokens` allowing short bursts.
+"""
+
+import threading
+
+
+class RequestBudget:
+    def __init__(self, ratio: float, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    @property
+    def available(self) -> float:
+        return self._tokens
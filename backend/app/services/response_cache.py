@@ -0,0 +1,157 @@
+"""
+In-memory TTL cache for proxied responses.
+
+Entries are bounded by total size in bytes and evicted least recently used
+first. An entry is fresh until its TTL runs out; after that it stays
+available as stale for `stale_ttl` seconds so callers can revalidate it
+with its ETag / Last-Modified validators instead of refetching.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+    stale_until: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.stored_at
+
+    def validators(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form for cache keys: lowercase scheme/host, no default port, sorted query, no fragment."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not (
+        (scheme == "http" and port == 80) or (scheme == "https" and port == 443)
+    ):
+        host = f"{host}:{port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def estimate_size(value: Any) -> int:
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: int, default_ttl: float, stale_ttl: float = 0.0):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Tuple[Optional[CacheEntry], bool]:
+        """Return (entry, is_fresh). Expired entries past their stale window are dropped."""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is None or now >= entry.stale_until:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            fresh = now < entry.expires_at
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry, fresh
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        size: Optional[int] = None,
+    ) -> None:
+        size = size if size is not None else estimate_size(value)
+        if size > self.max_bytes:
+            return
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.monotonic()
+        entry = CacheEntry(
+            value=value,
+            size=size,
+            expires_at=now + ttl,
+            stale_until=now
+            + ttl
+            + (self.stale_ttl if (etag or last_modified) else 0.0),
+            etag=etag,
+            last_modified=last_modified,
+            stored_at=now,
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def refresh(self, key: str, ttl: Optional[float] = None) -> None:
+        """Extend an entry's freshness after a successful revalidation."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            ttl = self.default_ttl if ttl is None else ttl
+            now = time.monotonic()
+            entry.expires_at = now + ttl
+            entry.stale_until = now + ttl + self.stale_ttl
+            entry.stored_at = now
+            self._entries.move_to_end(key)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
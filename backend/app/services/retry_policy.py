@@ -0,0 +1,124 @@
+"""
+Retry policy for outbound HTTP calls.
+
+Waits between attempts use decorrelated jitter (each delay is drawn from
+[base, 3 * previous delay], capped), so callers that failed together do
+not retry together. Whether an error is worth retrying is decided by a
+classifier. An optional `RequestBudget` caps retries at a fraction of
+calls across all users of the policy: when the budget is empty the error
+is returned straight away, so an outage does not multiply the load on a
+struggling upstream.
+
+Callers with their own per-attempt bookkeeping drive the loop with
+`should_retry()` and `sleep()`; everyone else can use `call()`.
+"""
+
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+from app.services.request_budget import RequestBudget
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Network errors, timeouts and overload/gateway status codes."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(
+        exc, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+    )
+
+
+def is_unprocessed(exc: BaseException) -> bool:
+    """
+    Errors where the upstream cannot have acted on the request: it was
+    never sent, or was refused with 429/503. Safe for calls that are not
+    idempotent (a read timeout may mean the work was done and billed).
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in (429, 503)
+    return isinstance(
+        exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+    )
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 4.0,
+        budget: Optional[RequestBudget] = None,
+        retryable: Callable[[BaseException], bool] = is_transient,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retryable = retryable
+        self.retries = 0
+        self.budget_exhausted = 0
+
+    def on_call(self) -> None:
+        """Record a first attempt (earns retry budget)."""
+        if self.budget is not None:
+            self.budget.on_request()
+
+    def should_retry(self, exc: BaseException, attempt: int) -> bool:
+        """Whether to make attempt `attempt + 1` after `exc`. Spends budget when it says yes."""
+        if attempt >= self.max_attempts or not self.retryable(exc):
+            return False
+        if self.budget is not None and not self.budget.try_spend():
+            self.budget_exhausted += 1
+            return False
+        self.retries += 1
+        return True
+
+    def next_delay(self, previous: float) -> float:
+        return min(
+            self.max_delay,
+            random.uniform(self.base_delay, max(self.base_delay, previous * 3)),
+        )
+
+    async def sleep(self, previous: float) -> float:
+        """Back off before the next attempt; returns the delay to pass in next time."""
+        delay = self.next_delay(previous)
+        await asyncio.sleep(delay)
+        return delay
+
+    async def call(
+        self, fn: Callable[[], Awaitable[T]], description: str = "request"
+    ) -> T:
+        """Run `fn` until it succeeds, raises a non-retryable error or retries run out."""
+        self.on_call()
+        delay = self.base_delay
+        attempt = 1
+        while True:
+            try:
+                return await fn()
+            except Exception as e:
+                if not self.should_retry(e, attempt):
+                    raise
+                logger.warning(
+                    f"{description} failed (attempt {attempt}), retrying: {e}"
+                )
+            delay = await self.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.retries,
+            "budget_exhausted": self.budget_exhausted,
+            "budget_available": self.budget.available
+            if self.budget is not None
+            else None,
+        }
@@ -0,0 +1,213 @@
+"""
+Search engine result page parsers.
+
+Pages are parsed with lxml and queried with XPath expressions compiled
+once at import time, which is several times faster than building a
+BeautifulSoup tree and running CSS selects on it. Parsers are plain
+module-level functions returning dicts, so they can be run in a worker
+process (see `parser_pool`).
+
+The BeautifulSoup implementations are kept in `SOUP_PARSERS` as the
+reference the lxml parsers are checked and benchmarked against.
+"""
+
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, unquote
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+_HTML_PARSER = etree.HTMLParser(encoding="utf-8")
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _first(xpath: str) -> etree.XPath:
+    return etree.XPath(f"({xpath})[1]")
+
+
+_GOOGLE_RESULTS = etree.XPath(f"//div[{_has_class('g')}]")
+_GOOGLE_TITLE = _first(".//h3")
+_GOOGLE_LINK = _first(".//a")
+_GOOGLE_SNIPPET = _first(".//div[@data-sncf='1']")
+_GOOGLE_SNIPPET_FALLBACK = _first(f".//*[{_has_class('VwiC3b')}]")
+
+_BING_RESULTS = etree.XPath(f"//li[{_has_class('b_algo')}]")
+_BING_TITLE = _first(".//h2//a")
+_BING_SNIPPET = _first(f".//*[{_has_class('b_caption')}]//p")
+
+_DDG_RESULTS = etree.XPath(f"//*[{_has_class('result')}]")
+_DDG_TITLE = _first(f".//*[{_has_class('result__a')}]")
+_DDG_SNIPPET = _first(f".//*[{_has_class('result__snippet')}]")
+
+_TEXT = etree.XPath("string()")
+
+
+def parse_html(html: str) -> Optional[etree._Element]:
+    """Parse an HTML page into an lxml tree (None for an empty document)."""
+    if not html:
+        return None
+    return etree.fromstring(html.encode("utf-8"), _HTML_PARSER)
+
+
+def _one(query: etree.XPath, el: etree._Element) -> Optional[etree._Element]:
+    found = query(el)
+    return found[0] if found else None
+
+
+def _text(el: etree._Element) -> str:
+    return str(_TEXT(el))
+
+
+def _result(position: int, title: str, link: str, snippet: str) -> Dict:
+    return {"position": position, "title": title, "link": link, "snippet": snippet}
+
+
+def ddg_target_url(raw_href: str) -> str:
+    """Unwrap DuckDuckGo's redirect links (`/l/?uddg=<target>`)."""
+    if raw_href and "uddg=" in raw_href:
+        try:
+            parsed_url = parse_qs(raw_href.split("?", 1)[1])
+            return unquote(parsed_url.get("uddg", [""])[0])
+        except (IndexError, KeyError):
+            return raw_href
+    return raw_href
+
+
+def parse_google(html: str) -> List[Dict]:
+    root = parse_html(html)
+    if root is None:
+        return []
+    results = []
+    for i, el in enumerate(_GOOGLE_RESULTS(root), start=1):
+        title_tag = _one(_GOOGLE_TITLE, el)
+        link_tag = _one(_GOOGLE_LINK, el)
+        snippet_tag = _one(_GOOGLE_SNIPPET, el)
+        if snippet_tag is None:
+            snippet_tag = _one(_GOOGLE_SNIPPET_FALLBACK, el)
+        if title_tag is not None and link_tag is not None and link_tag.get("href"):
+            results.append(
+                _result(
+                    i,
+                    _text(title_tag),
+                    link_tag.get("href"),
+                    _text(snippet_tag) if snippet_tag is not None else "",
+                )
+            )
+    return results
+
+
+def parse_bing(html: str) -> List[Dict]:
+    root = parse_html(html)
+    if root is None:
+        return []
+    results = []
+    for i, el in enumerate(_BING_RESULTS(root), start=1):
+        title_tag = _one(_BING_TITLE, el)
+        snippet_tag = _one(_BING_SNIPPET, el)
+        if title_tag is not None and title_tag.get("href"):
+            results.append(
+                _result(
+                    i,
+                    _text(title_tag),
+                    title_tag.get("href"),
+                    _text(snippet_tag) if snippet_tag is not None else "",
+                )
+            )
+    return results
+
+
+def parse_duckduckgo(html: str) -> List[Dict]:
+    root = parse_html(html)
+    if root is None:
+        return []
+    results = []
+    for i, el in enumerate(_DDG_RESULTS(root), start=1):
+        title_tag = _one(_DDG_TITLE, el)
+        snippet_tag = _one(_DDG_SNIPPET, el)
+        if title_tag is not None and title_tag.get("href"):
+            link = ddg_target_url(title_tag.get("href"))
+            results.append(
+                _result(
+                    i,
+                    _text(title_tag),
+                    link,
+                    _text(snippet_tag).strip() if snippet_tag is not None else "",
+                )
+            )
+    return results
+
+
+PARSERS: Dict[str, Callable[[str], List[Dict]]] = {
+    "google": parse_google,
+    "bing": parse_bing,
+    "duckduckgo": parse_duckduckgo,
+}
+
+
+# ── BeautifulSoup reference implementations ──────────────────────────────
+
+
+def parse_google_soup(html: str) -> List[Dict]:
+    soup = BeautifulSoup(html, "lxml")
+    results = []
+    for i, el in enumerate(soup.select("div.g"), start=1):
+        title_tag = el.select_one("h3")
+        link_tag = el.select_one("a")
+        snippet_tag = el.select_one("div[data-sncf='1']") or el.select_one(".VwiC3b")
+        if title_tag and link_tag and link_tag.get("href"):
+            results.append(
+                _result(
+                    i,
+                    title_tag.text,
+                    link_tag.get("href"),
+                    snippet_tag.text if snippet_tag else "",
+                )
+            )
+    return results
+
+
+def parse_bing_soup(html: str) -> List[Dict]:
+    soup = BeautifulSoup(html, "lxml")
+    results = []
+    for i, el in enumerate(soup.select("li.b_algo"), start=1):
+        title_tag = el.select_one("h2 a")
+        snippet_tag = el.select_one(".b_caption p")
+        if title_tag and title_tag.get("href"):
+            results.append(
+                _result(
+                    i,
+                    title_tag.text,
+                    title_tag.get("href"),
+                    snippet_tag.text if snippet_tag else "",
+                )
+            )
+    return results
+
+
+def parse_duckduckgo_soup(html: str) -> List[Dict]:
+    soup = BeautifulSoup(html, "lxml")
+    results = []
+    for i, el in enumerate(soup.select(".result"), start=1):
+        title_tag = el.select_one(".result__a")
+        snippet_tag = el.select_one(".result__snippet")
+        if title_tag and title_tag.get("href"):
+            link = ddg_target_url(title_tag.get("href"))
+            results.append(
+                _result(
+                    i,
+                    title_tag.text,
+                    link,
+                    snippet_tag.text.strip() if snippet_tag else "",
+                )
+            )
+    return results
+
+
+SOUP_PARSERS: Dict[str, Callable[[str], List[Dict]]] = {
+    "google": parse_google_soup,
+    "bing": parse_bing_soup,
+    "duckduckgo": parse_duckduckgo_soup,
+}
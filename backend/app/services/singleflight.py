@@ -0,0 +1,45 @@
+"""
+Coalesce identical concurrent async calls.
+
+The first caller for a key starts the call in its own task; callers that
+arrive while it is in flight wait on the same task and share its result
+(or exception). Running the call in a separate task means a cancelled
+caller (e.g. a client that disconnected) does not cancel the call for
+everyone else waiting on it.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run `fn` once per in-flight `key`. Returns (result, shared)."""
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced request onto in-flight call for {key}")
+        return await asyncio.shield(task), shared
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved when every waiter has gone away
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
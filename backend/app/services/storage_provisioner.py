@@ -8,6 +8,7 @@ Supports two backends:
 from __future__ import annotations
 
 import asyncio
+import io
 import logging
 import secrets
 import uuid
@@ -186,6 +187,36 @@ class StorageProvisioner:
 
     # ── object ops ───────────────────────────────────────────────────────
 
+    async def put_object(
+        self,
+        bucket: StorageBucket,
+        object_key: str,
+        data: bytes,
+        content_type: Optional[str] = None,
+        content_encoding: Optional[str] = None,
+    ) -> None:
+        """Upload `data` as a single object. The SDK call runs in a worker thread."""
+        if bucket.storage_backend == "aws-s3":
+            s3 = _get_s3_client(bucket.region)
+            params: dict = {"Bucket": bucket.bucket_name, "Key": object_key, "Body": data}
+            if content_type:
+                params["ContentType"] = content_type
+            if content_encoding:
+                params["ContentEncoding"] = content_encoding
+            await asyncio.to_thread(s3.put_object, **params)
+            return
+
+        client = self._get_minio_client()
+        await asyncio.to_thread(
+            client.put_object,
+            bucket.bucket_name,
+            object_key,
+            io.BytesIO(data),
+            len(data),
+            content_type=content_type or "application/octet-stream",
+            metadata={"Content-Encoding": content_encoding} if content_encoding else None,
+        )
+
     async def delete_object(self, bucket: StorageBucket, object_key: str) -> None:
         if bucket.storage_backend == "aws-s3":
             s3 = _get_s3_client(bucket.region)
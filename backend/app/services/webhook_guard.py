@@ -0,0 +1,92 @@
+"""
+Guard for requests to user-supplied URLs (job callbacks).
+
+The server sits inside our network, so a callback URL must not be able to
+reach loopback, private (RFC 1918 / ULA), link-local (including the cloud
+metadata address 169.254.169.254) or other non-global addresses. Checks:
+
+- `check_url()` when the URL is accepted: https only, no credentials, and
+  an IP-literal host must be public.
+- `post()` at delivery time: the host is resolved again, every address it
+  resolves to must be public, and the connection goes to the checked
+  address itself (TLS still verifies the certificate for the hostname).
+  Re-resolving at connect time closes the DNS-rebinding gap between the
+  check and the request. Redirects are never followed.
+"""
+
+import asyncio
+import ipaddress
+import socket
+from typing import Dict, List, Optional
+
+import httpx
+
+
+class UnsafeURL(ValueError):
+    pass
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def check_url(url: str) -> httpx.URL:
+    """Reject URLs that can never be delivered to safely. Raises UnsafeURL."""
+    parsed = httpx.URL(url)
+    if parsed.scheme != "https":
+        raise UnsafeURL("Callback URL must use https")
+    if not parsed.host:
+        raise UnsafeURL("Callback URL has no host")
+    if parsed.userinfo:
+        raise UnsafeURL("Callback URL must not contain credentials")
+    try:
+        literal = ipaddress.ip_address(parsed.host)
+    except ValueError:
+        return parsed
+    if not is_public_address(str(literal)):
+        raise UnsafeURL("Callback URL points to a private or reserved address")
+    return parsed
+
+
+async def resolve_public(host: str, port: int) -> str:
+    """One address for `host`, after checking that every address it resolves to is public."""
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, port, type=socket.SOCK_STREAM
+        )
+    except socket.gaierror as e:
+        raise UnsafeURL(f"Callback host {host} does not resolve: {e}") from e
+    addresses: List[str] = list(dict.fromkeys(info[4][0] for info in infos))
+    if not addresses:
+        raise UnsafeURL(f"Callback host {host} does not resolve")
+    if not all(is_public_address(address) for address in addresses):
+        raise UnsafeURL(
+            f"Callback host {host} resolves to a private or reserved address"
+        )
+    return addresses[0]
+
+
+async def post(
+    client: httpx.AsyncClient,
+    url: str,
+    content: bytes | str,
+    headers: Optional[Dict[str, str]] = None,
+) -> httpx.Response:
+    """
+    POST to a user-supplied URL, pinned to a checked public address. Use a
+    client without keep-alive: pooled connections are keyed by address, not
+    hostname, and must not be shared between different callback hosts.
+    """
+    parsed = check_url(url)
+    address = await resolve_public(parsed.host, parsed.port or 443)
+    request_headers = {**(headers or {}), "Host": parsed.netloc.decode("ascii")}
+    return await client.post(
+        parsed.copy_with(host=address),
+        content=content,
+        headers=request_headers,
+        extensions={"sni_hostname": parsed.host},
+        follow_redirects=False,
+    )
@@ -0,0 +1,137 @@
+"""
+Bounded in-process work queue with a fixed number of workers.
+
+Used for fire-and-forget side work (e.g. screenshots) that must not grow
+with request traffic. `submit()` never blocks: a job whose key was already
+submitted within `dedupe_window` seconds is skipped, and a job that finds
+the queue full is shed. Workers record how long jobs waited and ran so
+queue health can be read from `stats()`.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+DUPLICATE = "duplicate"
+SHED = "shed"
+
+
+def _percentile(samples: Deque[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class BoundedWorkQueue:
+    SAMPLE_WINDOW = 500
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[..., Awaitable[Any]],
+        workers: int,
+        max_size: int,
+        dedupe_window: float = 0.0,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self.dedupe_window = dedupe_window
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._recent: Dict[str, float] = {}
+        self._busy = 0
+        self._wait_times: Deque[float] = deque(maxlen=self.SAMPLE_WINDOW)
+        self._run_times: Deque[float] = deque(maxlen=self.SAMPLE_WINDOW)
+        self.processed = 0
+        self.failed = 0
+        self.shed = 0
+        self.deduplicated = 0
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(
+            f"{self.name} queue started ({self.workers} workers, max {self.max_size} queued)"
+        )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        dropped = self._queue.qsize() if self._queue else 0
+        self._tasks = []
+        self._queue = None
+        logger.info(f"{self.name} queue stopped ({dropped} queued jobs dropped)")
+
+    def submit(self, key: str, *args: Any) -> str:
+        """Queue `handler(*args)` unless `key` ran recently or the queue is full."""
+        if self._queue is None:
+            self.shed += 1
+            return SHED
+        now = time.monotonic()
+        if self.dedupe_window > 0:
+            last = self._recent.get(key)
+            if last is not None and now - last < self.dedupe_window:
+                self.deduplicated += 1
+                return DUPLICATE
+        try:
+            self._queue.put_nowait((now, args))
+        except asyncio.QueueFull:
+            self.shed += 1
+            logger.debug(f"{self.name} queue full, shedding job for {key}")
+            return SHED
+        if self.dedupe_window > 0:
+            self._recent[key] = now
+            if len(self._recent) > 4 * self.max_size:
+                self._prune_recent(now)
+        return QUEUED
+
+    def _prune_recent(self, now: float) -> None:
+        self._recent = {
+            k: t for k, t in self._recent.items() if now - t < self.dedupe_window
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            enqueued_at, args = await self._queue.get()
+            started = time.monotonic()
+            self._wait_times.append(started - enqueued_at)
+            self._busy += 1
+            try:
+                await self.handler(*args)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"{self.name} job failed: {e}")
+            finally:
+                self._busy -= 1
+                self._run_times.append(time.monotonic() - started)
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize() if self._queue else 0,
+            "max_size": self.max_size,
+            "workers": self.workers,
+            "busy_workers": self._busy,
+            "processed": self.processed,
+            "failed": self.failed,
+            "shed": self.shed,
+            "deduplicated": self.deduplicated,
+            "wait_p50": _percentile(self._wait_times, 0.5),
+            "wait_p95": _percentile(self._wait_times, 0.95),
+            "run_p50": _percentile(self._run_times, 0.5),
+            "run_p95": _percentile(self._run_times, 0.95),
+        }
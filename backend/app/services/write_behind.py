@@ -0,0 +1,94 @@
+"""
+Write-behind accumulation of counter increments.
+
+Hot paths call `add()`, which only bumps an in-memory delta. A background
+task hands the accumulated deltas to `flush_fn` every `interval` seconds
+(and once more on shutdown), so a database sees one additive update per
+key per interval instead of one write per request. If the process dies,
+at most one interval of increments is lost. A failed flush puts its
+deltas back to be retried on the next run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindCounter:
+    def __init__(
+        self,
+        name: str,
+        flush_fn: Callable[[Dict[Hashable, int]], None],
+        interval: float = 5.0,
+    ):
+        self.name = name
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self._pending: Dict[Hashable, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, key: Hashable, count: int = 1) -> None:
+        if count:
+            with self._lock:
+                self._pending[key] += count
+
+    def pending(self, key: Hashable) -> int:
+        """Increments for `key` not yet written (for read-your-writes displays)."""
+        with self._lock:
+            return self._pending.get(key, 0)
+
+    def discard(self, key: Hashable) -> None:
+        """Drop unwritten increments, e.g. after the row was deleted."""
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def flush(self) -> int:
+        """Write out accumulated deltas synchronously. Returns the number of keys flushed."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                deltas, self._pending = dict(self._pending), defaultdict(int)
+            try:
+                self.flush_fn(deltas)
+            except Exception as e:
+                logger.error(f"Flushing {self.name} counters failed, will retry: {e}")
+                with self._lock:
+                    for key, count in deltas.items():
+                        self._pending[key] += count
+                return 0
+            logger.debug(f"Flushed {self.name} counters for {len(deltas)} keys")
+            return len(deltas)
+
+    async def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Write-behind {self.name} counters started (interval: {self.interval}s)"
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+        logger.info(f"Write-behind {self.name} counters stopped")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            # Database I/O stays off the event loop
+            await asyncio.to_thread(self.flush)
@@ -0,0 +1,556 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session
+from starlette.requests import Request
+
+from app.api.routes import proxy
+from app.api.routes.proxy import principal_cache
+from app.core.compression import decompress
+from app.core.config import settings
+from app.core.http import http_clients
+from app.services.admission import Admission
+from app.services.circuit_breaker import OPEN, CircuitBreakerRegistry
+from app.services.endpoint_registry import EndpointRegistry
+from app.services.host_concurrency import HostConcurrencyLimiter
+from app.services.principal_cache import ApiPrincipal
+from app.services.request_budget import RequestBudget
+from app.services.response_cache import ResponseCache
+from app.services.storage_provisioner import storage_provisioner
+from app.tests.utils.user import create_random_user
+
+
+def _principal(
+    user_id: uuid.UUID | None = None, email: str = "user@example.com"
+) -> ApiPrincipal:
+    return ApiPrincipal(
+        id=user_id or uuid.uuid4(),
+        email=email,
+        token_id=uuid.uuid4(),
+        token_active=True,
+        user_active=True,
+        has_subscription=True,
+    )
+
+
+def _request() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/",
+            "headers": [],
+            "query_string": b"",
+        }
+    )
+
+
+def _admit_and_record_charges(monkeypatch: pytest.MonkeyPatch) -> list:
+    """Admit every request without rate limiting; returns the list token charges are recorded in."""
+    charged = []
+
+    async def admit(_user):
+        return Admission(True)
+
+    async def pace(_user):
+        pass
+
+    monkeypatch.setattr(proxy, "admit", admit)
+    monkeypatch.setattr(proxy, "pace", pace)
+    monkeypatch.setattr(
+        proxy.token_requests,
+        "add",
+        lambda token_id, count: charged.append((token_id, count)),
+    )
+    return charged
+
+
+def _fake_endpoints(
+    monkeypatch: pytest.MonkeyPatch, latencies: dict[str, float]
+) -> dict[str, list]:
+    """Replace try_endpoint with one that answers after a per-endpoint delay."""
+    seen: dict[str, list] = {"started": [], "cancelled": []}
+
+    async def try_endpoint(endpoint, *_args, **_kwargs):
+        seen["started"].append((endpoint, time.monotonic()))
+        try:
+            await asyncio.sleep(latencies[endpoint])
+        except asyncio.CancelledError:
+            seen["cancelled"].append(endpoint)
+            raise
+        return {"result": endpoint}
+
+    monkeypatch.setattr(proxy, "try_endpoint", try_endpoint)
+    monkeypatch.setattr(
+        proxy.endpoint_manager, "latency_percentile", lambda _region, _q: 0.05
+    )
+    return seen
+
+
+def _hedged() -> tuple:
+    async def run() -> tuple:
+        started = time.monotonic()
+        data, attempted = await proxy.try_hedged(
+            "primary", "backup", "us-east", "https://a.test/", "ua"
+        )
+        await asyncio.sleep(0)  # let cancellations land
+        return data, attempted, started
+
+    return asyncio.run(run())
+
+
+def test_hedge_not_sent_when_primary_answers_within_delay(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    seen = _fake_endpoints(monkeypatch, {"primary": 0.01, "backup": 0.01})
+    monkeypatch.setattr(proxy, "hedge_budget", RequestBudget(ratio=0.1))
+    data, attempted, _ = _hedged()
+    assert data == {"result": "primary"} and attempted == ["primary"]
+    assert [endpoint for endpoint, _ in seen["started"]] == ["primary"]
+
+
+def test_hedge_fires_after_delay_and_cancels_loser(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    seen = _fake_endpoints(monkeypatch, {"primary": 5.0, "backup": 0.01})
+    monkeypatch.setattr(proxy, "hedge_budget", RequestBudget(ratio=0.1))
+    data, attempted, started = _hedged()
+    assert data == {"result": "backup"} and attempted == ["primary", "backup"]
+    backup_started = dict(seen["started"])["backup"]
+    assert backup_started - started >= 0.05
+    assert seen["cancelled"] == ["primary"]
+
+
+def test_hedge_not_sent_without_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    seen = _fake_endpoints(monkeypatch, {"primary": 0.1, "backup": 0.01})
+    monkeypatch.setattr(proxy, "hedge_budget", RequestBudget(ratio=0.1, max_tokens=0.0))
+    data, attempted, _ = _hedged()
+    assert data == {"result": "primary"} and attempted == ["primary"]
+    assert len(seen["started"]) == 1
+
+
+def test_batch_streams_an_error_line_per_failing_url(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def fetch(url, *_args, **_kwargs):
+        if "unavailable" in url:
+            raise HTTPException(status_code=503, detail="No healthy proxy endpoints")
+        if "broken" in url:
+            raise RuntimeError("boom")
+        return {"result": f"<html>{url}</html>", "public_ip": "1.2.3.4"}, "us-east"
+
+    monkeypatch.setattr(proxy, "fetch_through_proxies", fetch)
+    monkeypatch.setattr(proxy, "schedule_screenshot", lambda _url, _user_agent: None)
+    charged = _admit_and_record_charges(monkeypatch)
+    user = _principal()
+    urls = [
+        "https://unavailable.test/",
+        "https://ok.test/",
+        "https://broken.test/",
+        "https://ok.test/2",
+    ]
+
+    async def run() -> list:
+        response = await proxy.proxy_fetch_batch(
+            _request(), "us-east", proxy.BatchProxyRequest(urls=urls), user
+        )
+        return [json.loads(line) async for line in response.body_iterator]
+
+    lines = sorted(asyncio.run(run()), key=lambda line: line["index"])
+    assert [(line["status"], line.get("status_code")) for line in lines] == [
+        ("error", 503),
+        ("ok", None),
+        ("error", 500),
+        ("ok", None),
+    ]
+    assert (
+        lines[0]["error"] == "No healthy proxy endpoints"
+        and lines[2]["error"] == "Internal error"
+    )
+    assert lines[3]["result"] == "<html>https://ok.test/2</html>"
+    assert charged == [(user.token_id, 2)]
+
+
+def test_serp_fanout_merges_pages_and_reports_failures(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def serp_result(position: int, link: str) -> proxy.SerpResult:
+        return proxy.SerpResult(position=position, title=link, link=link, snippet="")
+
+    async def fetch_serp_page(engine, q, *_args, page=1, **_kwargs):
+        if engine == "bing" and page == 2:
+            raise HTTPException(status_code=503, detail="No healthy proxy endpoints")
+        links = {
+            1: ["https://a.test/", "https://b.test/"],
+            2: ["https://b.test/", "https://c.test/"],
+        }[page]
+        return proxy.SerpResponse(
+            search_engine=engine,
+            search_query=q,
+            region_used="us-east",
+            organic_results=[serp_result(i, link) for i, link in enumerate(links, 1)],
+            page=page,
+        )
+
+    monkeypatch.setattr(proxy, "fetch_serp_page", fetch_serp_page)
+    charged = _admit_and_record_charges(monkeypatch)
+    user = _principal()
+    fanout = proxy.SerpFanoutRequest(
+        q="widgets",
+        engines=[
+            proxy.SerpEngineRequest(engine="google", pages=2),
+            proxy.SerpEngineRequest(engine="bing", pages=2),
+        ],
+    )
+
+    response = asyncio.run(proxy.serp_fanout(_request(), "us-east", fanout, user))
+    google, bing = response.engines["google"], response.engines["bing"]
+    # Numbered across pages, with the link repeated on page 2 dropped
+    assert [(r.position, r.link) for r in google.organic_results] == [
+        (1, "https://a.test/"),
+        (2, "https://b.test/"),
+        (3, "https://c.test/"),
+    ]
+    assert (google.pages_fetched, google.errors) == (2, [])
+    assert (bing.pages_fetched, bing.errors) == (
+        1,
+        ["page 2: No healthy proxy endpoints"],
+    )
+    assert len(bing.organic_results) == 2
+    assert charged == [(user.token_id, 3)]
+
+
+def test_cache_keeps_status_and_headers_and_skips_non_2xx(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    upstream = []
+
+    async def fetch(url, *_args, **_kwargs):
+        upstream.append(url)
+        status_code = 429 if "blocked" in url else 200
+        return {
+            "result": f"<html>{status_code}</html>",
+            "public_ip": "1.2.3.4",
+            "status_code": status_code,
+            "headers": {"Content-Type": "text/html"},
+        }, "us-east"
+
+    monkeypatch.setattr(proxy, "fetch_through_proxies", fetch)
+    monkeypatch.setattr(
+        proxy, "response_cache", ResponseCache(max_bytes=100_000, default_ttl=60.0)
+    )
+
+    async def fetch_twice(url: str) -> list:
+        return [await proxy.cached_fetch(url, "us-east", "ua") for _ in range(2)]
+
+    (_, _, first), (hit, region, second) = asyncio.run(fetch_twice("https://ok.test/"))
+    assert (first, second, region) == ("miss", "hit", "us-east")
+    assert hit == {
+        "result": "<html>200</html>",
+        "public_ip": "1.2.3.4",
+        "status_code": 200,
+        "headers": {"Content-Type": "text/html"},
+    }
+
+    (_, _, first), (blocked, _, second) = asyncio.run(
+        fetch_twice("https://blocked.test/")
+    )
+    assert (first, second, blocked["status_code"]) == ("miss", "miss", 429)
+    assert upstream == [
+        "https://ok.test/",
+        "https://blocked.test/",
+        "https://blocked.test/",
+    ]
+
+
+def test_offload_inline_below_threshold_and_on_upload_failure(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    uploads = []
+
+    async def put_object(bucket, key, body, content_type, content_encoding):
+        uploads.append((bucket.bucket_name, key, body, content_type, content_encoding))
+
+    async def presign(_bucket, key, expires_in):
+        return f"https://storage.test/{key}?expires={expires_in}"
+
+    async def failing_put_object(*_args, **_kwargs):
+        raise RuntimeError("bucket unavailable")
+
+    monkeypatch.setattr(settings, "PROXY_OFFLOAD_BUCKET", "results")
+    monkeypatch.setattr(settings, "PROXY_OFFLOAD_MIN_BYTES", 100)
+    monkeypatch.setattr(storage_provisioner, "put_object", put_object)
+    monkeypatch.setattr(storage_provisioner, "generate_presigned_download_url", presign)
+    user_id = uuid.uuid4()
+    page = "<html>" + "x" * 200 + "</html>"
+
+    assert asyncio.run(proxy.offload_result("<html></html>", user_id)) is None
+    assert uploads == []
+
+    ref = asyncio.run(proxy.offload_result(page, user_id))
+    [(bucket_name, key, body, content_type, content_encoding)] = uploads
+    assert bucket_name == "results" and key.startswith(f"proxy-results/{user_id}/")
+    assert (content_type, content_encoding) == (proxy.OFFLOAD_CONTENT_TYPE, "gzip")
+    assert decompress(body, "gzip").decode("utf-8") == page
+    assert ref.url.startswith(f"https://storage.test/{key}")
+    assert (ref.size_bytes, ref.stored_bytes) == (len(page), len(body))
+    assert ref.sha256 == hashlib.sha256(page.encode("utf-8")).hexdigest()
+
+    monkeypatch.setattr(storage_provisioner, "put_object", failing_put_object)
+    assert asyncio.run(proxy.offload_result(page, user_id)) is None
+
+
+def test_principal_cache_is_invalidated_on_commit_only(db: Session) -> None:
+    user = create_random_user(db)
+    principal = _principal(user.id, user.email)
+    principal_cache.set("test-key", principal)
+
+    user.full_name = "Rolled Back"
+    db.add(user)
+    db.flush()
+    assert principal_cache.get("test-key") == principal
+    db.rollback()
+    assert principal_cache.get("test-key") == principal
+
+    user.full_name = "Committed"
+    db.add(user)
+    db.commit()
+    assert principal_cache.get("test-key") is None
+
+
+def _target_limiter(
+    monkeypatch: pytest.MonkeyPatch, queue_timeout: float
+) -> HostConcurrencyLimiter:
+    limiter = HostConcurrencyLimiter(
+        initial=1, minimum=1, maximum=4, queue_timeout=queue_timeout
+    )
+    monkeypatch.setattr(proxy, "target_concurrency", limiter)
+    monkeypatch.setattr(proxy, "breakers", CircuitBreakerRegistry())
+    return limiter
+
+
+def test_open_circuit_is_skipped_without_waiting_for_a_host_slot(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    limiter = _target_limiter(monkeypatch, queue_timeout=5.0)
+    breaker = proxy.breakers.get("https://endpoint.test")
+    breaker.state, breaker.opened_at = OPEN, time.monotonic()
+
+    async def run() -> tuple:
+        held = await limiter.acquire("a.test")  # the host is at its limit
+        started = time.monotonic()
+        result = await proxy.try_endpoint(
+            "https://endpoint.test", "us-east", "https://a.test/", "ua"
+        )
+        limiter.release(held)
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(run())
+    assert result is None and elapsed < 0.5
+
+
+def test_host_slot_timeout_fails_over_instead_of_raising(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    limiter = _target_limiter(monkeypatch, queue_timeout=0.05)
+
+    async def run() -> tuple:
+        held = await limiter.acquire("a.test")
+        result = await proxy.try_endpoint(
+            "https://endpoint.test", "us-east", "https://a.test/", "ua"
+        )
+        limiter.release(held)
+        return result, limiter.stats()["busiest"]["a.test"]
+
+    result, host = asyncio.run(run())
+    assert result is None
+    assert (host["queue_timeouts"], host["in_flight"]) == (1, 0)
+
+
+def test_streamed_fetch_holds_a_host_slot_until_relayed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    limiter = _target_limiter(monkeypatch, queue_timeout=1.0)
+
+    def handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, json={"public_ip": "1.2.3.4", "result": "<html>page</html>"}
+        )
+
+    monkeypatch.setitem(
+        http_clients._async_clients,
+        "proxy",
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    async def run() -> tuple:
+        upstream = await proxy.open_endpoint_stream(
+            "https://endpoint.test", "us-east", "https://a.test/", "ua"
+        )
+        in_flight = limiter.stats()["busiest"]["a.test"]["in_flight"]
+        body = b"".join(
+            [chunk async for chunk in proxy.relay_upstream_stream(upstream)]
+        )
+        return in_flight, body, limiter.stats()["busiest"]["a.test"]
+
+    in_flight, body, host = asyncio.run(run())
+    assert body == b"<html>page</html>"
+    assert in_flight == 1
+    assert (host["in_flight"], host["successes"]) == (0, 1)
+
+
+def _ranked_manager(
+    monkeypatch: pytest.MonkeyPatch, seed: int = 7
+) -> proxy.ProxyEndpointManager:
+    registry = EndpointRegistry(
+        defaults={
+            "us-east": [
+                "https://fast.test",
+                "https://ok.test",
+                "https://slow.test",
+                "https://erroring.test",
+            ],
+            "europe": ["https://eu.test"],
+            "asia": ["https://asia.test"],
+        }
+    )
+    monkeypatch.setattr(proxy, "random", random.Random(seed))
+    return proxy.ProxyEndpointManager(registry)
+
+
+def test_endpoint_score_is_ewma_latency_inflated_by_errors(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    manager = _ranked_manager(monkeypatch)
+    assert manager.score("https://fast.test") == 0.0  # nothing measured yet
+    manager.record_result("https://fast.test", 1.0, success=True)
+    manager.record_result("https://fast.test", 2.0, success=True)
+    assert manager.score("https://fast.test") == pytest.approx(1.3)
+    # Unmeasured endpoints are scored at the measured average
+    assert manager.score("https://ok.test") == pytest.approx(1.3)
+
+    manager.record_result("https://erroring.test", 1.0, success=False)
+    assert manager.score("https://erroring.test") == pytest.approx(
+        1.0 * (1 + manager.ERROR_PENALTY)
+    )
+
+
+def test_endpoint_error_rate_decays_back(monkeypatch: pytest.MonkeyPatch) -> None:
+    manager = _ranked_manager(monkeypatch)
+    manager.record_result("https://erroring.test", 1.0, success=False)
+    stats = manager.stats["https://erroring.test"]
+
+    stats.updated_at -= manager.ERROR_HALF_LIFE
+    assert manager.score("https://erroring.test") == pytest.approx(
+        1.0 * (1 + manager.ERROR_PENALTY * 0.5)
+    )
+    # A new sample blends into the decayed rate, not the stale one
+    manager.record_result("https://erroring.test", 1.0, success=True)
+    assert stats.error_rate == pytest.approx(0.5 * (1 - manager.EWMA_ALPHA), abs=1e-3)
+
+    stats.updated_at -= 10 * manager.ERROR_HALF_LIFE
+    assert manager.score("https://erroring.test") == pytest.approx(1.0, abs=0.01)
+
+
+def test_order_endpoints_prefers_fast_and_ranks_slow_or_erroring_last(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    manager = _ranked_manager(monkeypatch)
+    for url, latency, success in [
+        ("https://fast.test", 0.1, True),
+        ("https://ok.test", 0.3, True),
+        ("https://slow.test", 3.0, True),
+        ("https://erroring.test", 0.1, False),
+    ]:
+        manager.record_result(url, latency, success)
+    urls = manager.get_endpoints("us-east")
+
+    orders = [manager.order_endpoints(urls) for _ in range(200)]
+    # The worst candidate loses every pairwise draw, so it always ends up last
+    assert all(order[-1] == "https://slow.test" for order in orders)
+    assert all(sorted(order) == sorted(urls) for order in orders)
+    # Power-of-two choices still gives runners-up some first attempts
+    firsts = [order[0] for order in orders]
+    assert firsts.count("https://fast.test") > firsts.count("https://ok.test") > 0
+    assert firsts.count("https://erroring.test") < firsts.count("https://ok.test")
+
+    manager.stats["https://slow.test"].latency = 0.05
+    manager.record_result("https://erroring.test", 0.1, success=True)
+    manager.stats["https://erroring.test"].updated_at -= 10 * manager.ERROR_HALF_LIFE
+    assert "https://slow.test" not in {
+        manager.order_endpoints(urls)[-1] for _ in range(50)
+    }
+
+
+def test_order_regions_puts_primary_first_then_fallbacks_by_best_score(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    manager = _ranked_manager(monkeypatch)
+    manager.record_result("https://fast.test", 0.5, success=True)
+    manager.record_result("https://eu.test", 2.0, success=True)
+    manager.record_result("https://asia.test", 0.2, success=True)
+
+    healthy = {
+        "us-east": ["https://fast.test"],
+        "europe": ["https://eu.test"],
+        "asia": ["https://asia.test"],
+    }
+    assert manager.order_regions("europe", lambda region: healthy[region]) == [
+        "europe",
+        "asia",
+        "us-east",
+    ]
+    # A region with nothing healthy is ranked by all of its endpoints
+    healthy["asia"] = []
+    manager.record_result("https://asia.test", 5.0, success=False)
+    assert manager.order_regions("europe", lambda region: healthy[region]) == [
+        "europe",
+        "us-east",
+        "asia",
+    ]
+
+
+def test_fetch_timeout_is_learned_per_target_host(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _target_limiter(monkeypatch, queue_timeout=1.0)
+    timeouts = proxy.AdaptiveTimeouts(
+        fallback=15.0, minimum=3.0, maximum=30.0, min_samples=5
+    )
+    monkeypatch.setattr(proxy, "fetch_timeouts", timeouts)
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(
+            (json.loads(request.content)["url"], request.extensions["timeout"]["read"])
+        )
+        return httpx.Response(200, json={"status_code": 200, "result": "<html></html>"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_clients, "get", lambda _name: client)
+    for _ in range(5):
+        timeouts.observe("slow.test", 12.0)
+        timeouts.observe("fast.test", 0.2)
+
+    async def run() -> None:
+        # A new endpoint inherits what was learned about the host from the others
+        for url in (
+            "https://slow.test/page",
+            "https://fast.test/",
+            "https://new.test/",
+        ):
+            await proxy.try_endpoint(
+                "https://fresh-endpoint.test", "us-east", url, "ua"
+            )
+
+    asyncio.run(run())
+    assert sent[0][1] == pytest.approx(18.0, rel=0.05)
+    assert sent[1:] == [("https://fast.test/", 3.0), ("https://new.test/", 15.0)]
+    assert timeouts.stats()["keys"] == 3
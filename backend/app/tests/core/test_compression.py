@@ -0,0 +1,140 @@
+import asyncio
+import zlib
+
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.compression import (
+    CompressionMiddleware,
+    StreamCompressor,
+    compress,
+    decompress,
+    negotiate,
+)
+
+PAGE = b"<html>" + b"<p>hello</p>" * 200 + b"</html>"
+
+
+def test_negotiate() -> None:
+    assert negotiate(None) is None
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0, identity") is None
+    assert negotiate("br;q=0.5, gzip;q=0.8", ["gzip", "br"]) == "gzip"
+    assert negotiate("*", ["gzip"]) == "gzip"
+
+
+def test_stream_compressor_flushes_each_chunk() -> None:
+    compressor = StreamCompressor("gzip")
+    reader = zlib.decompressobj(47)
+    assert reader.decompress(compressor.compress(b'{"line": 1}\n')) == b'{"line": 1}\n'
+    assert (
+        reader.decompress(compressor.compress(b'{"line": 2}\n') + compressor.finish())
+        == b'{"line": 2}\n'
+    )
+
+
+def test_round_trip() -> None:
+    page = b"<html>" + b"<p>hello</p>" * 1000 + b"</html>"
+    packed = compress(page, "gzip")
+    assert len(packed) < len(page) // 10
+    assert decompress(packed, "gzip") == page
+
+
+async def _page(_request) -> Response:
+    return Response(PAGE, media_type="text/html")
+
+
+async def _tiny(_request) -> Response:
+    return Response(b"ok", media_type="text/plain")
+
+
+async def _precompressed(_request) -> Response:
+    return Response(
+        compress(PAGE, "gzip"),
+        media_type="text/html",
+        headers={"Content-Encoding": "gzip"},
+    )
+
+
+async def _ndjson(_request) -> StreamingResponse:
+    async def lines():
+        for i in range(3):
+            yield f'{{"line": {i}}}\n'.encode()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _client() -> TestClient:
+    app = Starlette(
+        routes=[
+            Route("/page", _page),
+            Route("/tiny", _tiny),
+            Route("/precompressed", _precompressed),
+            Route("/ndjson", _ndjson),
+        ]
+    )
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(app)
+
+
+def test_middleware_compresses_and_sets_vary() -> None:
+    response = _client().get("/page", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(PAGE)
+    assert response.content == PAGE
+
+
+def test_middleware_skips_small_bodies_and_identity_clients() -> None:
+    client = _client()
+    response = client.get("/tiny", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b"ok"
+
+    response = client.get("/page", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == PAGE
+
+
+def test_middleware_passes_through_existing_content_encoding() -> None:
+    response = _client().get("/precompressed", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    # Decoded once by the client: the body was not compressed a second time
+    assert response.content == PAGE
+
+
+def test_middleware_flushes_each_streamed_chunk() -> None:
+    response = _client().get("/ndjson", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == b'{"line": 0}\n{"line": 1}\n{"line": 2}\n'
+
+    # Drive the ASGI app directly to see each body message as it is sent
+    async def run() -> list:
+        messages = []
+
+        async def receive() -> dict:
+            await asyncio.Event().wait()  # the client never disconnects
+            return {}
+
+        async def send(message: dict) -> None:
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/ndjson",
+            "raw_path": b"/ndjson",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"accept-encoding", b"gzip")],
+        }
+        await _client().app(scope, receive, send)
+        return [m["body"] for m in messages if m["type"] == "http.response.body"]
+
+    reader = zlib.decompressobj(47)
+    decoded = [reader.decompress(chunk) for chunk in asyncio.run(run())]
+    assert decoded[:3] == [b'{"line": 0}\n', b'{"line": 1}\n', b'{"line": 2}\n']
+    assert b"".join(decoded[3:]) == b""
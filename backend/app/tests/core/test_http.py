@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from app.core.http import ClientConfig, HTTPClientRegistry
+
+
+def _registry() -> HTTPClientRegistry:
+    registry = HTTPClientRegistry()
+    registry.register("upstream", ClientConfig(timeout=5.0, max_connections=4))
+    return registry
+
+
+def test_clients_are_created_lazily_and_reused() -> None:
+    registry = _registry()
+    client = registry.get("upstream")
+    assert registry.get("upstream") is client
+    assert client.timeout.read == 5.0
+
+    sync_client = registry.get_sync("upstream")
+    assert registry.get_sync("upstream") is sync_client
+    sync_client.close()
+
+    with pytest.raises(KeyError):
+        registry.get("unknown")
+
+
+def test_aclose_closes_both_pools_and_get_reopens() -> None:
+    registry = _registry()
+
+    async def run() -> tuple:
+        client = registry.get("upstream")
+        sync_client = registry.get_sync("upstream")
+        await registry.aclose()
+        reopened = registry.get("upstream")
+        await registry.aclose()
+        return client, sync_client, reopened
+
+    client, sync_client, reopened = asyncio.run(run())
+    assert client.is_closed and sync_client.is_closed
+    assert reopened is not client and reopened.is_closed
+    fresh = registry.get_sync("upstream")
+    assert fresh is not sync_client and not fresh.is_closed
+    fresh.close()
+
+
+def test_closed_client_is_replaced_on_get() -> None:
+    registry = _registry()
+    sync_client = registry.get_sync("upstream")
+    sync_client.close()
+    replacement = registry.get_sync("upstream")
+    assert replacement is not sync_client and not replacement.is_closed
+    replacement.close()
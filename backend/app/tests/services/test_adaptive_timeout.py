@@ -0,0 +1,63 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from app.services.adaptive_timeout import AdaptiveTimeouts, LatencySketch
+
+
+def test_sketch_quantiles_within_relative_accuracy() -> None:
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(0, 1) for _ in range(5000))
+    sketch = LatencySketch(relative_accuracy=0.02, max_count=10_000)
+    for v in values:
+        sketch.add(v)
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        assert abs(sketch.quantile(q) - exact) / exact < 0.05
+
+
+def test_sketch_forgets_old_samples() -> None:
+    sketch = LatencySketch(max_count=100)
+    for _ in range(100):
+        sketch.add(10.0)
+    for _ in range(500):
+        sketch.add(0.5)
+    assert sketch.quantile(0.99) < 1.0
+
+
+def test_timeout_fallback_clamp_and_timeouts() -> None:
+    timeouts = AdaptiveTimeouts(
+        fallback=15.0, minimum=2.0, maximum=30.0, min_samples=10
+    )
+    assert timeouts.timeout("fast") == 15.0
+    for _ in range(10):
+        timeouts.observe("fast", 0.2)
+        timeouts.observe("slow", 12.0)
+    assert timeouts.timeout("fast") == 2.0
+    assert timeouts.timeout("slow") == pytest.approx(18.0, rel=0.05)
+
+    async def hang(_timeout: float) -> None:
+        raise httpx.ReadTimeout("hung")
+
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(timeouts.run("fast", hang))
+    assert timeouts.timeouts_hit == 1
+    # 1 in 11 samples now sits at the old timeout, so p99 rises to follow
+    assert timeouts.timeout("fast") == pytest.approx(3.0, rel=0.05)
+
+
+def test_least_recently_observed_key_is_dropped() -> None:
+    timeouts = AdaptiveTimeouts(
+        fallback=15.0, minimum=1.0, maximum=30.0, min_samples=1, max_keys=2
+    )
+    timeouts.observe("a.test", 5.0)
+    timeouts.observe("b.test", 5.0)
+    timeouts.observe("a.test", 5.0)
+    timeouts.observe("c.test", 5.0)
+    assert timeouts.stats()["keys"] == 2
+    assert timeouts.timeout("b.test") == 15.0
+    assert timeouts.timeout("a.test") == pytest.approx(7.5, rel=0.05)
+    assert list(timeouts.stats(top=1)["timeouts"]) == ["a.test"]
+    assert "b.test" not in timeouts._timeouts  # dropped keys are not re-cached
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from app.services.admission import (
+    RATE_LIMITED,
+    TOO_MANY_IN_FLIGHT,
+    AdmissionController,
+    TierLimits,
+)
+
+TIERS = {"trial": TierLimits(rate=10.0, burst=2, max_in_flight=2)}
+
+
+def test_rate_and_in_flight_limits() -> None:
+    async def run() -> None:
+        admission = AdmissionController(TIERS)
+        first = await admission.acquire("user", "trial")
+        second = await admission.acquire("user", "trial")
+        assert first.allowed and second.allowed
+
+        rejected = await admission.acquire("user", "trial")
+        assert not rejected.allowed and rejected.reason == TOO_MANY_IN_FLIGHT
+
+        await first.release()
+        await first.release()  # idempotent
+        rejected = await admission.acquire("user", "trial")
+        assert rejected.reason == RATE_LIMITED
+        assert 0 < rejected.retry_after <= 0.1
+
+        await asyncio.sleep(rejected.retry_after)
+        assert (await admission.acquire("user", "trial")).allowed
+        assert (await admission.acquire("other", "trial")).allowed
+        assert admission.stats()["in_flight"] == 3
+
+    asyncio.run(run())
+
+
+def test_pace_waits_for_tokens() -> None:
+    async def run() -> float:
+        admission = AdmissionController(TIERS)
+        started = time.monotonic()
+        await asyncio.gather(*(admission.pace("user", "trial") for _ in range(4)))
+        return time.monotonic() - started
+
+    # Two tokens in the bucket, the other two arrive at 10/s
+    assert 0.15 <= asyncio.run(run()) < 0.5
+
+
+def test_cancelled_pace_refunds_tokens() -> None:
+    async def run() -> float:
+        admission = AdmissionController(TIERS)
+        waiters = [
+            asyncio.create_task(admission.pace("user", "trial")) for _ in range(20)
+        ]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        # The two burst tokens were spent; the 18 abandoned reservations were
+        # refunded, so the next caller waits for one token instead of 19
+        started = time.monotonic()
+        await admission.pace("user", "trial")
+        return time.monotonic() - started
+
+    assert asyncio.run(run()) < 0.2
+
+
+def test_shared_storage_backend() -> None:
+    async def run() -> None:
+        admission = AdmissionController(TIERS, storage_uri="async+memory://")
+        first = await admission.acquire("user", "trial")
+        second = await admission.acquire("user", "trial")
+        assert first.allowed and second.allowed
+        assert (await admission.acquire("user", "trial")).reason == TOO_MANY_IN_FLIGHT
+        await first.release()
+        rejected = await admission.acquire("user", "trial")
+        assert rejected.reason == RATE_LIMITED and rejected.retry_after > 0
+
+    asyncio.run(run())
@@ -0,0 +1,12 @@
+from app.services.bloom_filter import BloomFilter
+
+
+def test_no_false_negatives_and_low_false_positive_rate() -> None:
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    added = sum(bloom.add(f"https://a.test/{i}") for i in range(10000))
+    assert added > 9900  # a new key can collide with earlier ones
+    assert all(f"https://a.test/{i}" in bloom for i in range(10000))
+    assert not bloom.add("https://a.test/5")
+    false_positives = sum(f"https://b.test/{i}" in bloom for i in range(10000))
+    assert false_positives < 200  # 1% target, with slack
+    assert bloom.stats()["bytes"] < 13000
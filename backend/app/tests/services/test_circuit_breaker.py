@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_after_consecutive_timeouts() -> None:
+    breaker = CircuitBreaker("test", consecutive_timeouts=3)
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure(timeout=True)
+    assert breaker.state == OPEN
+    assert not breaker.is_available()
+    assert not breaker.allow_request()
+
+
+def test_opens_on_error_rate() -> None:
+    breaker = CircuitBreaker("test", error_rate_threshold=0.5, min_requests=4)
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_half_open_allows_single_probe() -> None:
+    breaker = CircuitBreaker("test", consecutive_timeouts=1, open_seconds=30.0)
+    with patch("app.services.circuit_breaker.time.monotonic", return_value=100.0):
+        breaker.record_failure(timeout=True)
+    with patch("app.services.circuit_breaker.time.monotonic", return_value=131.0):
+        assert breaker.is_available()
+        assert breaker.allow_request()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow_request()
+        breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_reopens() -> None:
+    breaker = CircuitBreaker("test", consecutive_timeouts=1, open_seconds=30.0)
+    with patch("app.services.circuit_breaker.time.monotonic", return_value=100.0):
+        breaker.record_failure(timeout=True)
+    with patch("app.services.circuit_breaker.time.monotonic", return_value=131.0):
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow_request()
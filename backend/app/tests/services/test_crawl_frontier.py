@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from app.services.crawl_frontier import CrawlFrontier
+
+
+def test_scope_depth_dedupe_and_budget() -> None:
+    async def run() -> CrawlFrontier:
+        frontier = CrawlFrontier(
+            ["https://www.a.test/"], max_pages=4, max_depth=1, scope="domain"
+        )
+        assert frontier.add("https://blog.a.test/post", 1)
+        assert not frontier.add(
+            "https://WWW.a.test:443/#top", 1
+        )  # the seed, normalized
+        assert not frontier.add("https://b.test/", 1)
+        assert not frontier.add("https://a.test/deep", 2)
+        assert not frontier.add("mailto:x@a.test", 1)
+        assert frontier.add("https://a.test/1", 1) and frontier.add(
+            "https://a.test/2", 1
+        )
+        assert not frontier.add("https://a.test/3", 1)
+        return frontier
+
+    frontier = asyncio.run(run())
+    assert (
+        frontier.admitted,
+        frontier.duplicates,
+        frontier.out_of_scope,
+        frontier.over_budget,
+    ) == (4, 1, 2, 1)
+
+
+def test_host_politeness_and_completion() -> None:
+    async def run() -> tuple:
+        frontier = CrawlFrontier(
+            ["https://a.test/", "https://b.test/"],
+            max_pages=10,
+            max_depth=1,
+            host_delay=0.05,
+        )
+        frontier.add("https://a.test/next", 1)
+        started = {}
+
+        async def worker() -> None:
+            while (item := await frontier.next()) is not None:
+                url, _ = item
+                started[url] = time.monotonic()
+                await asyncio.sleep(0.01)
+                frontier.done(url)
+
+        await asyncio.gather(*(worker() for _ in range(4)))
+        return started, frontier
+
+    started, frontier = asyncio.run(run())
+    assert set(started) == {"https://a.test/", "https://b.test/", "https://a.test/next"}
+    # One fetch at a time per host, host_delay apart; other hosts don't wait
+    assert started["https://a.test/next"] - started["https://a.test/"] >= 0.045
+    assert abs(started["https://b.test/"] - started["https://a.test/"]) < 0.03
+    assert frontier.stats()["completed"] == 3 and frontier.in_flight == 0
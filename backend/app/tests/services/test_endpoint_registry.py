@@ -0,0 +1,67 @@
+import json
+import os
+from pathlib import Path
+
+from app.services.endpoint_registry import EndpointRegistry
+
+DEFAULTS = {
+    "us-east": ["https://a.test/main", "https://b.test/main"],
+    "eu": ["https://c.test/main"],
+}
+
+
+def _write(path: Path, endpoints: list, mtime: float) -> None:
+    path.write_text(json.dumps({"endpoints": endpoints}))
+    os.utime(path, (mtime, mtime))
+
+
+def test_defaults_build_indexes() -> None:
+    registry = EndpointRegistry(DEFAULTS)
+    assert registry.snapshot.regions == DEFAULTS
+    assert registry.endpoint_id("https://b.test/main") == "us-east_1"
+    assert registry.region_of("https://c.test/main") == "eu"
+    assert registry.snapshot.by_id["eu_0"] == "https://c.test/main"
+
+
+def test_reload_drains_adds_and_keeps_last_good(tmp_path: Path) -> None:
+    path = tmp_path / "endpoints.json"
+    _write(
+        path,
+        [
+            {"url": "https://a.test/main", "region": "us-east"},
+            {"url": "https://b.test/main", "region": "us-east", "weight": 2},
+        ],
+        mtime=1000,
+    )
+    registry = EndpointRegistry(DEFAULTS, path=str(path))
+    changes = []
+    registry.on_change(lambda: changes.append(registry.snapshot))
+    assert registry.snapshot.regions == {
+        "us-east": ["https://a.test/main", "https://b.test/main"]
+    }
+    assert registry.weight("https://b.test/main") == 2.0
+    assert not registry.reload()  # unchanged file
+
+    _write(
+        path,
+        [
+            {"url": "https://a.test/main", "region": "us-east", "enabled": False},
+            {"url": "https://b.test/main", "region": "us-east"},
+            {"url": "https://d.test/main", "region": "asia", "id": "asia-primary"},
+        ],
+        mtime=2000,
+    )
+    assert registry.reload()
+    assert len(changes) == 1
+    assert registry.snapshot.regions == {
+        "us-east": ["https://b.test/main"],
+        "asia": ["https://d.test/main"],
+    }
+    # Drained endpoints stay resolvable for requests already in flight
+    assert registry.endpoint_id("https://a.test/main") == "us-east_0"
+    assert registry.endpoint_id("https://d.test/main") == "asia-primary"
+
+    path.write_text("{not json")
+    os.utime(path, (3000, 3000))
+    assert not registry.reload()
+    assert registry.snapshot.regions["asia"] == ["https://d.test/main"]
@@ -0,0 +1,52 @@
+import asyncio
+
+from app.services.host_concurrency import SUCCESS, THROTTLED, HostConcurrencyLimiter
+
+
+def test_additive_increase_multiplicative_decrease() -> None:
+    async def run() -> HostConcurrencyLimiter:
+        limiter = HostConcurrencyLimiter(initial=4, minimum=1, maximum=5, backoff=0.5)
+        for _ in range(20):
+            slot = await limiter.acquire("a.test")
+            slot.outcome = SUCCESS
+            limiter.release(slot)
+        assert limiter.stats()["busiest"]["a.test"]["limit"] == 5  # capped at maximum
+
+        # Throttled replies to requests in flight together cut the limit once
+        slots = [await limiter.acquire("a.test") for _ in range(3)]
+        for slot in slots:
+            slot.outcome = THROTTLED
+            limiter.release(slot)
+        assert limiter.stats()["busiest"]["a.test"]["limit"] == 2.5
+        slot = await limiter.acquire("a.test")
+        slot.outcome = THROTTLED
+        limiter.release(slot)
+        return limiter
+
+    stats = asyncio.run(run()).stats()["busiest"]["a.test"]
+    assert (
+        stats["limit"] == 1.25 and stats["throttled"] == 4 and stats["in_flight"] == 0
+    )
+
+
+def test_over_limit_fetches_queue_then_time_out() -> None:
+    async def run() -> tuple:
+        limiter = HostConcurrencyLimiter(initial=1, queue_timeout=0.05)
+        first = await limiter.acquire("a.test")
+        other_host = await limiter.acquire("b.test")
+        waiting = asyncio.create_task(limiter.acquire("a.test"))
+        await asyncio.sleep(0.01)
+        queued = limiter.stats()["queued"]
+        limiter.release(first)
+        second = await waiting
+        timed_out = await limiter.acquire("a.test")
+        limiter.release(second)
+        limiter.release(other_host)
+        return queued, second is not None, timed_out, limiter.stats()
+
+    queued, granted, timed_out, stats = asyncio.run(run())
+    assert queued == 1 and granted and timed_out is None
+    assert stats["busiest"]["a.test"]["queue_timeouts"] == 1
+    assert stats["queued"] == 0 and all(
+        h["in_flight"] == 0 for h in stats["busiest"].values()
+    )
@@ -0,0 +1,74 @@
+from app.services.html_extract import FIELDS, extract
+
+PAGE = """<html lang="en"><head>
+<title> Widget  review </title>
+<base href="https://shop.test/en/">
+<meta name="Description" content="A widget">
+<meta property="og:title" content="Widget">
+<meta property="og:image" content="https://shop.test/w.png">
+<link rel="alternate canonical" href="https://shop.test/widget">
+<script type="application/ld+json">[{"@type": "Product"}, {"@type": "Offer"}]</script>
+<script type="application/ld+json">{not json</script>
+</head><body>
+<nav><a href="/home">Home</a></nav>
+<main><h1>Widget</h1><p>It is <b>very</b> good.<!-- ad --></p><script>track()</script>
+<ul><li>Small</li><li>Sturdy</li></ul>
+<a href="reviews#top">Reviews</a> <a href="reviews">Again</a>
+<a href="mailto:x@shop.test">Mail</a> <a href="https://other.test/">Other</a></main>
+<footer>Copyright</footer>
+</body></html>"""
+
+
+def test_extracts_all_fields() -> None:
+    result = extract(PAGE, "https://shop.test/widget?ref=1", FIELDS)
+    assert result["title"] == "Widget review"
+    assert result["metadata"] == {
+        "description": "A widget",
+        "canonical": "https://shop.test/widget",
+        "lang": "en",
+    }
+    assert result["opengraph"] == {
+        "og:title": "Widget",
+        "og:image": "https://shop.test/w.png",
+    }
+    assert result["json_ld"] == [{"@type": "Product"}, {"@type": "Offer"}]
+    # Resolved against <base href>, fragments dropped, duplicates and non-http schemes skipped
+    assert result["links"] == [
+        {"url": "https://shop.test/home", "text": "Home"},
+        {"url": "https://shop.test/en/reviews", "text": "Reviews"},
+        {"url": "https://other.test/", "text": "Other"},
+    ]
+    assert (
+        result["text"]
+        == "Widget\nIt is very good.\nSmall\nSturdy\nReviews Again Mail Other"
+    )
+
+
+def test_only_requested_fields() -> None:
+    result = extract(PAGE, "https://shop.test/", ["links"])
+    assert set(result) == {"title", "links"}
+
+
+def test_empty_documents_return_every_requested_field() -> None:
+    empty = {
+        "title": None,
+        "text": "",
+        "links": [],
+        "metadata": {},
+        "opengraph": {},
+        "json_ld": [],
+    }
+    assert extract("", "https://shop.test/", FIELDS) == empty
+    assert extract("  \n ", "https://shop.test/", ["links"]) == {
+        "title": None,
+        "links": [],
+    }
+
+
+def test_malformed_hrefs_are_skipped() -> None:
+    page = (
+        '<base href="http://[bad/"><a href="http://[oops/">Bad</a><a href="/ok">Ok</a>'
+    )
+    assert extract(page, "https://shop.test/a", ["links"])["links"] == [
+        {"url": "https://shop.test/ok", "text": "Ok"}
+    ]
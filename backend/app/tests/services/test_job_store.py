@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+from app.models import ProxyJob, User
+from app.services.job_store import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+
+
+def _engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine, tables=[User.__table__, ProxyJob.__table__])
+    return engine
+
+
+def test_job_lifecycle_is_shared_between_stores() -> None:
+    async def run() -> None:
+        engine = _engine()
+        # Two stores on one database stand in for two API worker processes
+        runner = JobStore(engine, ttl=60.0)
+        poller = JobStore(engine, ttl=60.0)
+        owner = uuid.uuid4()
+        ok = await runner.create(owner, {"url": "https://a.test/"})
+        bad = await runner.create(owner, {"url": "https://b.test/"})
+        assert ok.status == QUEUED and await poller.pending(owner) == 2
+
+        await runner.start(ok)
+        assert (await poller.get(ok.id)).status == RUNNING
+        await runner.succeed(ok, b"page", {"encoding": "identity"})
+        await runner.fail(bad, 503, "No healthy proxy endpoints")
+        assert await poller.pending(owner) == 0
+        seen = await poller.get(ok.id)
+        assert (seen.status, seen.result, seen.result_meta) == (
+            SUCCEEDED,
+            b"page",
+            {"encoding": "identity"},
+        )
+        seen = await poller.get(bad.id)
+        assert (seen.status, seen.status_code) == (FAILED, 503)
+
+        refused = await runner.create(owner, {})
+        await runner.discard(refused)
+        assert await poller.get(refused.id) is None and await poller.pending(owner) == 0
+        assert await poller.get("not-a-job-id") is None
+
+    asyncio.run(run())
+
+
+def test_expiry() -> None:
+    async def run() -> None:
+        store = JobStore(_engine(), ttl=60.0)
+        finished = await store.create(uuid.uuid4(), {})
+        await store.succeed(finished, None, {})
+        await store._update(
+            finished, finished_at=finished.finished_at - timedelta(seconds=61)
+        )
+        assert await store.get(finished.id) is None
+
+        # A job whose worker went away expires from its creation time
+        orphan = await store.create(uuid.uuid4(), {})
+        await store._update(
+            orphan, created_at=orphan.created_at - timedelta(seconds=61)
+        )
+        assert (
+            await store.get(orphan.id) is None
+            and await store.pending(orphan.owner) == 0
+        )
+
+    asyncio.run(run())
+
+
+def test_wait_wakes_locally_and_polls_for_other_workers() -> None:
+    async def run() -> tuple:
+        engine = _engine()
+        store = JobStore(engine, ttl=60.0, poll_interval=0.02)
+        other_worker = JobStore(engine, ttl=60.0)
+        job = await store.create(uuid.uuid4(), {})
+        timed_out = await store.wait(job, 0.01)
+
+        asyncio.get_running_loop().call_later(
+            0.02, lambda: asyncio.ensure_future(store.succeed(job, b"done", {}))
+        )
+        local = await store.wait(await store.get(job.id), 5.0)
+
+        remote_job = await store.create(uuid.uuid4(), {})
+        asyncio.get_running_loop().call_later(
+            0.05, lambda: asyncio.ensure_future(other_worker.fail(remote_job, 500, "x"))
+        )
+        remote = await store.wait(await store.get(remote_job.id), 5.0)
+        return timed_out.status, local.status, remote.status, store._waiters
+
+    assert asyncio.run(run()) == (QUEUED, SUCCEEDED, FAILED, {})
@@ -0,0 +1,37 @@
+import json
+
+from app.services.json_stream import JsonFieldStreamer
+
+
+def _feed_in_chunks(raw: bytes, size: int) -> tuple[JsonFieldStreamer, str]:
+    streamer = JsonFieldStreamer("result")
+    out = "".join(streamer.feed(raw[i : i + size]) for i in range(0, len(raw), size))
+    return streamer, out
+
+
+def test_extracts_field_across_any_chunk_boundary() -> None:
+    page = 'é "quoted" \\ back\nslash \U0001f600 </p>'
+    for ensure_ascii in (True, False):
+        raw = json.dumps(
+            {
+                "public_ip": "1.2.3.4",
+                "result": page,
+                "nested": {"a": ["}", 1]},
+                "status_code": 200,
+            },
+            ensure_ascii=ensure_ascii,
+        ).encode()
+        for size in range(1, 12):
+            streamer, out = _feed_in_chunks(raw, size)
+            assert out == page
+            assert streamer.done
+            assert streamer.fields == {"public_ip": "1.2.3.4", "status_code": 200}
+
+
+def test_field_started_before_value_is_complete() -> None:
+    streamer = JsonFieldStreamer("result")
+    assert streamer.feed(b'{"device_id": "d", "result": "<html>') == "<html>"
+    assert streamer.field_started and not streamer.done
+    assert streamer.fields == {"device_id": "d"}
+    assert streamer.feed(b'</html>"}') == "</html>"
+    assert streamer.done
@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime, timedelta
+
+from app.services.principal_cache import ApiPrincipal, PrincipalCache
+
+
+def _principal(user_id=None, **kwargs) -> ApiPrincipal:
+    fields = {
+        "id": user_id or uuid.uuid4(),
+        "email": "user@example.com",
+        "token_id": uuid.uuid4(),
+        "token_active": True,
+        "user_active": True,
+        "has_subscription": False,
+    }
+    fields.update(kwargs)
+    return ApiPrincipal(**fields)
+
+
+def test_invalidate_by_user_and_token() -> None:
+    cache = PrincipalCache(max_entries=10, ttl=60.0)
+    user_id = uuid.uuid4()
+    first, second = _principal(user_id), _principal(user_id)
+    cache.set("key-1", first)
+    cache.set("key-2", second)
+    cache.invalidate_token(first.token_id)
+    assert cache.get("key-1") is None
+    assert cache.get("key-2") == second
+    cache.invalidate_user(user_id)
+    assert cache.get("key-2") is None
+
+
+def test_ttl_and_size_bound() -> None:
+    cache = PrincipalCache(max_entries=2, ttl=0.0)
+    cache.set("key", _principal())
+    assert cache.get("key") is None
+
+    cache = PrincipalCache(max_entries=2, ttl=60.0)
+    for key in ("a", "b", "c"):
+        cache.set(key, _principal())
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_trial_validity_is_evaluated_at_check_time() -> None:
+    now = datetime.utcnow()
+    principal = _principal(trial_expires_at=now + timedelta(minutes=1))
+    assert principal.subscription_valid(now)
+    assert not principal.subscription_valid(now + timedelta(minutes=2))
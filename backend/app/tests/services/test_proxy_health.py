@@ -0,0 +1,112 @@
+import asyncio
+
+from app.services.proxy_health import ProxyHealthMonitor
+
+
+class FakeEndpointManager:
+    def __init__(self, endpoints: dict[str, list[str]]):
+        self.endpoints = endpoints
+
+    def get_endpoints(self, region: str) -> list[str]:
+        return self.endpoints.get(region, [])
+
+
+class FakeProbe:
+    """Answers each endpoint from `healthy`; endpoints in `raising` throw."""
+
+    def __init__(self):
+        self.healthy: dict[str, bool] = {}
+        self.raising: set[str] = set()
+
+    async def __call__(self, endpoint: str, _region: str) -> dict:
+        if endpoint in self.raising:
+            raise ConnectionError("probe crashed")
+        healthy = self.healthy.get(endpoint, True)
+        return {
+            "is_healthy": healthy,
+            "response_time": 0.1,
+            "error": None if healthy else "503",
+        }
+
+
+def _monitor(endpoints: dict[str, list[str]], failure_threshold: int = 2) -> tuple:
+    manager = FakeEndpointManager(endpoints)
+    probe = FakeProbe()
+    return (
+        ProxyHealthMonitor(manager, probe, failure_threshold=failure_threshold),
+        manager,
+        probe,
+    )
+
+
+def test_unhealthy_after_threshold_and_recovers_on_success() -> None:
+    monitor, _, probe = _monitor({"us-east": ["https://a", "https://b"]})
+    # Endpoints start healthy so traffic flows before the first sweep
+    assert monitor.healthy_endpoints("us-east") == ["https://a", "https://b"]
+
+    probe.healthy["https://a"] = False
+    asyncio.run(monitor.check_all())
+    assert monitor.healthy_endpoints("us-east") == ["https://a", "https://b"]
+    assert monitor.endpoint_health("https://a").consecutive_failures == 1
+
+    asyncio.run(monitor.check_all())
+    assert monitor.healthy_endpoints("us-east") == ["https://b"]
+    assert monitor.endpoint_health("https://a").last_error == "503"
+    assert monitor.region_health("us-east").healthy_endpoints == 1
+
+    probe.healthy["https://a"] = True
+    asyncio.run(monitor.check_all())
+    state = monitor.endpoint_health("https://a")
+    assert (state.is_healthy, state.consecutive_failures, state.last_error) == (
+        True,
+        0,
+        None,
+    )
+    assert monitor.healthy_endpoints("us-east") == ["https://a", "https://b"]
+
+
+def test_sync_endpoints_adds_and_removes() -> None:
+    monitor, manager, probe = _monitor({"us-east": ["https://a"]}, failure_threshold=1)
+    probe.healthy["https://a"] = False
+    asyncio.run(monitor.check_all())
+    assert monitor.healthy_endpoints("us-east") == []
+
+    manager.endpoints["us-east"] = ["https://b"]
+    manager.endpoints["us-west"] = ["https://a"]  # moved: starts over as healthy
+    monitor.sync_endpoints()
+    assert monitor.healthy_endpoints("us-east") == ["https://b"]
+    assert monitor.healthy_endpoints("us-west") == ["https://a"]
+    assert monitor.endpoint_health("https://a").region == "us-west"
+
+    del manager.endpoints["us-west"]
+    monitor.sync_endpoints()
+    assert monitor.endpoint_health("https://a") is None
+    assert monitor.region_health("us-west") is None
+
+
+def test_indexes_are_swapped_not_mutated() -> None:
+    monitor, _, probe = _monitor(
+        {"us-east": ["https://a", "https://b"]}, failure_threshold=1
+    )
+    before = monitor.healthy_endpoints("us-east")
+    region_before = monitor.region_health("us-east")
+
+    probe.healthy["https://b"] = False
+    asyncio.run(monitor.check_all())
+    # A reader holding the old index still sees a complete, consistent view
+    assert before == ["https://a", "https://b"]
+    assert region_before.healthy_endpoints == 2
+    assert monitor.healthy_endpoints("us-east") == ["https://a"]
+    assert monitor.region_health("us-east") is not region_before
+
+
+def test_probe_exception_counts_as_failure_without_aborting_sweep() -> None:
+    monitor, _, probe = _monitor(
+        {"us-east": ["https://a", "https://b"]}, failure_threshold=1
+    )
+    probe.raising.add("https://a")
+    asyncio.run(monitor.check_all())
+    a, b = monitor.endpoint_health("https://a"), monitor.endpoint_health("https://b")
+    assert (a.is_healthy, a.last_error) == (False, "probe crashed")
+    assert (b.is_healthy, b.last_latency) == (True, 0.1) and b.last_checked is not None
+    assert monitor.healthy_endpoints("us-east") == ["https://b"]
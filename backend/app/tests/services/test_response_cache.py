@@ -0,0 +1,51 @@
+from app.services.response_cache import ResponseCache, normalize_url
+
+
+def test_normalize_url() -> None:
+    assert (
+        normalize_url("HTTPS://Example.com:443/a?b=2&a=1#frag")
+        == "https://example.com/a?a=1&b=2"
+    )
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+
+
+def test_hit_and_expiry() -> None:
+    cache = ResponseCache(max_bytes=10_000, default_ttl=60.0)
+    cache.set("k", "value", size=10)
+    entry, fresh = cache.get("k")
+    assert entry and fresh and entry.value == "value"
+
+    cache.set("k", "value", ttl=0.0, size=10)
+    entry, fresh = cache.get("k")
+    assert entry is None and not fresh
+
+
+def test_stale_entry_with_validators_is_kept() -> None:
+    cache = ResponseCache(max_bytes=10_000, default_ttl=60.0, stale_ttl=60.0)
+    cache.set("k", "value", ttl=0.0, etag='"v1"', size=10)
+    entry, fresh = cache.get("k")
+    assert entry and not fresh
+    assert entry.validators() == {"If-None-Match": '"v1"'}
+    cache.refresh("k")
+    assert cache.get("k")[1]
+
+
+def test_lru_eviction_by_size() -> None:
+    cache = ResponseCache(max_bytes=25, default_ttl=60.0)
+    cache.set("a", "a", size=10)
+    cache.set("b", "b", size=10)
+    cache.get("a")
+    cache.set("c", "c", size=10)
+    assert cache.get("b")[0] is None
+    assert cache.get("a")[0] is not None
+    assert cache.get("c")[0] is not None
+
+
+def test_entry_age_resets_on_refresh() -> None:
+    cache = ResponseCache(max_bytes=10_000, default_ttl=60.0)
+    cache.set("k", "value", size=10)
+    entry, _ = cache.get("k")
+    entry.stored_at -= 30
+    assert entry.age >= 30
+    cache.refresh("k")
+    assert cache.get("k")[0].age < 1
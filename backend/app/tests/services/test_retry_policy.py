@@ -0,0 +1,73 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.request_budget import RequestBudget
+from app.services.retry_policy import RetryPolicy, is_transient, is_unprocessed
+
+
+def _status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://upstream.test/")
+    return httpx.HTTPStatusError(
+        "error", request=request, response=httpx.Response(code, request=request)
+    )
+
+
+def test_classification() -> None:
+    request = httpx.Request("GET", "https://upstream.test/")
+    assert is_transient(httpx.ConnectError("refused", request=request))
+    assert is_transient(httpx.ReadTimeout("slow", request=request))
+    assert is_transient(_status_error(503))
+    assert not is_transient(_status_error(404))
+    assert not is_transient(ValueError("bad json"))
+
+    assert is_unprocessed(httpx.ConnectTimeout("slow", request=request))
+    assert is_unprocessed(_status_error(429))
+    assert not is_unprocessed(httpx.ReadTimeout("slow", request=request))
+    assert not is_unprocessed(_status_error(502))
+
+
+def test_decorrelated_jitter_stays_in_bounds() -> None:
+    policy = RetryPolicy(base_delay=0.1, max_delay=1.0)
+    delay = policy.base_delay
+    for _ in range(50):
+        previous, delay = delay, policy.next_delay(delay)
+        assert (
+            policy.base_delay
+            <= delay
+            <= min(policy.max_delay, max(policy.base_delay, previous * 3))
+        )
+
+
+def test_call_retries_until_success_or_budget_runs_out() -> None:
+    policy = RetryPolicy(
+        max_attempts=3,
+        base_delay=0.001,
+        max_delay=0.002,
+        budget=RequestBudget(ratio=0.0, max_tokens=2),
+    )
+    calls = []
+
+    async def flaky() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise _status_error(503)
+        return "ok"
+
+    assert asyncio.run(policy.call(flaky)) == "ok"
+    assert len(calls) == 3
+
+    async def not_found() -> str:
+        raise _status_error(404)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(policy.call(not_found))
+    assert policy.retries == 2
+
+    # Both budget tokens were spent above; the next failure is not retried
+    calls.clear()
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(policy.call(flaky))
+    assert len(calls) == 1
+    assert policy.budget_exhausted == 1
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+
+from app.services.serp_parser import PARSERS, SOUP_PARSERS, parse_duckduckgo
+
+FIXTURES = Path(__file__).resolve().parent.parent / "fixtures" / "serp"
+
+
+@pytest.mark.parametrize("path", sorted(FIXTURES.glob("*.html")), ids=lambda p: p.stem)
+def test_lxml_parsers_match_reference(path: Path) -> None:
+    engine = path.stem.split("_")[0]
+    html = path.read_text()
+    results = PARSERS[engine](html)
+    assert len(results) == 10
+    assert results == SOUP_PARSERS[engine](html)
+
+
+def test_duckduckgo_redirect_links_are_unwrapped() -> None:
+    html = (
+        '<div class="result"><a class="result__a" '
+        'href="//duckduckgo.com/l/?uddg=https%3A%2F%2Fexample.com%2Fa%3Fb%3D1&amp;rut=x">Title</a>'
+        '<a class="result__snippet">  Snippet  </a></div>'
+    )
+    assert parse_duckduckgo(html) == [
+        {
+            "position": 1,
+            "title": "Title",
+            "link": "https://example.com/a?b=1",
+            "snippet": "Snippet",
+        }
+    ]
+
+
+def test_empty_page() -> None:
+    for parser in PARSERS.values():
+        assert parser("") == []
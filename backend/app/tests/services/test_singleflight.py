@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_result() -> None:
+    async def run() -> tuple:
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "page"
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)))
+        return results, calls, flight.coalesced, flight.in_flight
+
+    results, calls, coalesced, in_flight = asyncio.run(run())
+    assert results == [("page", False), ("page", True), ("page", True)]
+    assert (calls, coalesced, in_flight) == (1, 2, 0)
+
+
+def test_concurrent_callers_share_exception() -> None:
+    async def run() -> list:
+        flight = SingleFlight()
+
+        async def fail() -> None:
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream down")
+
+        return await asyncio.gather(
+            *(flight.do("key", fail) for _ in range(2)), return_exceptions=True
+        )
+
+    first, second = asyncio.run(run())
+    assert isinstance(first, ValueError) and second is first
+
+
+def test_cancelled_leader_does_not_strand_followers() -> None:
+    async def run() -> tuple:
+        flight = SingleFlight()
+
+        async def fetch() -> str:
+            await asyncio.sleep(0.02)
+            return "page"
+
+        leader = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, flight.in_flight
+
+    assert asyncio.run(run()) == (("page", True), 0)
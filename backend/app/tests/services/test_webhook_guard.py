@@ -0,0 +1,84 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import webhook_guard
+from app.services.webhook_guard import (
+    UnsafeURL,
+    check_url,
+    is_public_address,
+    resolve_public,
+)
+
+
+@pytest.mark.parametrize(
+    "address",
+    [
+        "127.0.0.1",
+        "10.1.2.3",
+        "172.16.0.9",
+        "192.168.1.1",
+        "169.254.169.254",
+        "100.64.0.1",
+        "0.0.0.0",
+        "::1",
+        "fe80::1",
+        "fd00::1",
+        "::ffff:127.0.0.1",
+        "224.0.0.1",
+    ],
+)
+def test_non_public_addresses(address: str) -> None:
+    assert not is_public_address(address)
+
+
+def test_public_addresses() -> None:
+    assert is_public_address("93.184.215.14") and is_public_address("2606:4700::1111")
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://hooks.example.com/cb",
+        "https://user:pw@hooks.example.com/cb",
+        "https://169.254.169.254/latest/meta-data/",
+        "https://[::1]/cb",
+    ],
+)
+def test_check_url_rejects(url: str) -> None:
+    with pytest.raises(UnsafeURL):
+        check_url(url)
+
+
+def test_resolution_is_checked() -> None:
+    with pytest.raises(UnsafeURL):
+        asyncio.run(resolve_public("localhost", 443))
+    assert asyncio.run(resolve_public("93.184.215.14", 443)) == "93.184.215.14"
+
+
+def test_post_is_pinned_to_the_checked_address_without_redirects(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    seen = []
+
+    async def resolve(_host: str, _port: int) -> str:
+        return "93.184.215.14"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(302, headers={"Location": "http://127.0.0.1/"})
+
+    monkeypatch.setattr(webhook_guard, "resolve_public", resolve)
+
+    async def run() -> httpx.Response:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await webhook_guard.post(
+                client, "https://hooks.example.com:8443/cb?x=1", content=b"{}"
+            )
+
+    response = asyncio.run(run())
+    assert response.status_code == 302 and len(seen) == 1
+    assert str(seen[0].url) == "https://93.184.215.14:8443/cb?x=1"
+    assert seen[0].headers["host"] == "hooks.example.com:8443"
+    assert seen[0].extensions["sni_hostname"] == "hooks.example.com"
@@ -0,0 +1,36 @@
+import asyncio
+
+from app.services.work_queue import DUPLICATE, QUEUED, SHED, BoundedWorkQueue
+
+
+def test_dedupe_shed_and_metrics() -> None:
+    done = []
+    release = asyncio.Event()
+
+    async def handler(url: str) -> None:
+        await release.wait()
+        done.append(url)
+
+    async def run() -> dict:
+        queue = BoundedWorkQueue(
+            "test", handler, workers=1, max_size=1, dedupe_window=60.0
+        )
+        await queue.start()
+        assert queue.submit("a", "a") == QUEUED
+        await asyncio.sleep(0)  # worker picks up "a"
+        assert queue.submit("a", "a") == DUPLICATE
+        assert queue.submit("b", "b") == QUEUED
+        assert queue.submit("c", "c") == SHED
+        assert queue.stats()["depth"] == 1
+        release.set()
+        while len(done) < 2:
+            await asyncio.sleep(0.01)
+        stats = queue.stats()
+        await queue.stop()
+        return stats
+
+    stats = asyncio.run(run())
+    assert done == ["a", "b"]
+    assert stats["processed"] == 2
+    assert (stats["shed"], stats["deduplicated"]) == (1, 1)
+    assert stats["wait_p95"] is not None
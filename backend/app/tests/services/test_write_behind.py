@@ -0,0 +1,45 @@
+import asyncio
+
+from app.services.write_behind import WriteBehindCounter
+
+
+def test_flush_aggregates_deltas_per_key() -> None:
+    flushed = []
+    counter = WriteBehindCounter("test", flushed.append)
+    counter.add("a")
+    counter.add("a", 2)
+    counter.add("b")
+    assert counter.pending("a") == 3
+    assert counter.flush() == 2
+    assert flushed == [{"a": 3, "b": 1}]
+    assert counter.pending("a") == 0
+    assert counter.flush() == 0
+
+
+def test_failed_flush_is_retried() -> None:
+    calls = []
+
+    def flaky(deltas):
+        calls.append(deltas)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+
+    counter = WriteBehindCounter("test", flaky)
+    counter.add("a")
+    assert counter.flush() == 0
+    counter.add("a")
+    assert counter.flush() == 1
+    assert calls[-1] == {"a": 2}
+
+
+def test_stop_flushes_remaining_counts() -> None:
+    flushed = []
+
+    async def run() -> None:
+        counter = WriteBehindCounter("test", flushed.append, interval=60.0)
+        await counter.start()
+        counter.add("a", 5)
+        await counter.stop()
+
+    asyncio.run(run())
+    assert flushed == [{"a": 5}]
@@ -0,0 +1,54 @@
+"""
+Compare the lxml SERP parsers with the BeautifulSoup reference parsers.
+
+Runs every parser over the saved result pages in
+app/tests/fixtures/serp/ and prints the mean time per page.
+
+    python scripts/benchmark_serp_parsers.py [--rounds 50]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from app.services.serp_parser import PARSERS, SOUP_PARSERS
+
+FIXTURES = (
+    Path(__file__).resolve().parent.parent / "app" / "tests" / "fixtures" / "serp"
+)
+
+
+def time_parser(parser, pages, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            parser(page)
+    return (time.perf_counter() - started) / (rounds * len(pages))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--rounds", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    print(
+        f"{'engine':<12}{'pages':>6}{'avg KB':>9}{'soup ms':>10}{'lxml ms':>10}{'speedup':>9}"
+    )
+    for engine, parser in PARSERS.items():
+        pages = [path.read_text() for path in sorted(FIXTURES.glob(f"{engine}_*.html"))]
+        if not pages:
+            continue
+        for page in pages:
+            assert parser(page) == SOUP_PARSERS[engine](
+                page
+            ), f"{engine} parsers disagree"
+        soup = time_parser(SOUP_PARSERS[engine], pages, args.rounds)
+        fast = time_parser(parser, pages, args.rounds)
+        size = sum(len(page) for page in pages) / len(pages) / 1024
+        print(
+            f"{engine:<12}{len(pages):>6}{size:>9.1f}{soup * 1000:>10.2f}{fast * 1000:>10.2f}{soup / fast:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()